@@ -0,0 +1,237 @@
+# benchmarks/run_benchmarks.py
+
+"""
+Benchmarks dos pipelines de imagem, sem janela (plataforma "offscreen" do Qt).
+
+Gera imagens sintéticas (1, 12, 50 e 200 MP por padrão), mede o ImageHandler
+(pré-visualização, projeção, lupa, miniatura e traços), o PlaylistManager
+(salvar/carregar) e o preenchimento da ThumbnailListWidget, grava os
+resultados em JSON e termina com código 1 se algum limite de
+benchmarks/thresholds.json for excedido.
+
+Uso:
+    python benchmarks/run_benchmarks.py [--sizes 1,12] [--repeat 5] [--output resultados.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QSize, QRectF, QPointF
+from PySide6.QtGui import QColor, QPainterPath
+
+from core.image_handler import ImageHandler
+from core.canvas_state import CanvasState, DrawingStroke
+from core.geometry import calculate_crop_info
+from core.playlist_manager import PlaylistManager
+from ui.widgets.thumbnail_list import ThumbnailListWidget
+
+DEFAULT_SIZES = (1, 12, 50, 200)
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+# Fora do controle de versão (ver .gitignore)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json")
+SCREEN_SIZE = QSize(1920, 1080)
+THUMBNAIL_SIZE = QSize(128, 128)
+
+def make_synthetic_image(megapixels: int, directory: str) -> str:
+    """Cria um JPEG 4:3 com gradientes e detalhes (compressão parecida com a de uma foto)."""
+    path = os.path.join(directory, f"sintetica_{megapixels}mp.jpg")
+    if os.path.exists(path):
+        return path
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(megapixels)
+    detail = Image.fromarray((rng.random((height // 16, width // 16, 3)) * 255).astype(np.uint8))
+    image = detail.resize((width, height), Image.Resampling.BILINEAR)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.composite(image, Image.merge("RGB", (gradient,) * 3), Image.new("L", (width, height), 160))
+    image.save(path, quality=90)
+    return path
+
+def make_strokes(count: int, points_per_stroke: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(count):
+        x, y = rng.random(), rng.random()
+        path = QPainterPath(QPointF(x, y))
+        for _ in range(points_per_stroke - 1):
+            x = min(max(x + rng.uniform(-0.01, 0.01), 0.0), 1.0)
+            y = min(max(y + rng.uniform(-0.01, 0.01), 0.0), 1.0)
+            path.lineTo(QPointF(x, y))
+        strokes.append(DrawingStroke(path, QColor(255, 0, 0), 5.0))
+    return strokes
+
+def measure(function, repeat: int) -> dict:
+    """Tempo da primeira chamada (fria) e estatísticas das chamadas seguintes, em segundos."""
+    start = time.perf_counter()
+    function()
+    cold = time.perf_counter() - start
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return {
+        "cold": cold,
+        "median": statistics.median(runs) if runs else cold,
+        "max": max(runs) if runs else cold,
+        "runs": len(runs),
+    }
+
+def bench_image(path: str, repeat: int) -> dict:
+    results = {}
+
+    def open_handler():
+        ImageHandler(path)
+    results["open"] = measure(open_handler, repeat)
+
+    # Cada caso usa um handler novo, para que o tempo frio inclua a decodificação que ele exige
+    handler = ImageHandler(path)
+    results["thumbnail"] = measure(lambda: handler.get_thumbnail_pixmap(THUMBNAIL_SIZE), repeat)
+
+    state = CanvasState()
+    handler = ImageHandler(path)
+    results["preview"] = measure(lambda: handler.get_processed_pixmap_for_preview(state, SCREEN_SIZE), repeat)
+
+    # Os casos de projeção medem um slide novo: a região já processada do quadro anterior é descartada
+    def project(state, crop_info=None):
+        handler.release_projection_base()
+        return handler.get_processed_pixmap_for_projection(state, crop_info, SCREEN_SIZE)
+
+    handler = ImageHandler(path)
+    results["projection"] = measure(lambda: project(state), repeat)
+
+    adjusted = CanvasState()
+    adjusted.brightness = 1.2
+    adjusted.contrast_applied = True
+    adjusted.rotation = 90
+    results["projection_adjusted"] = measure(lambda: project(adjusted), repeat)
+
+    zoomed = CanvasState()
+    zoomed.zoom_enabled = True
+    zoomed.zoom_rect = QRectF(0.4, 0.4, 0.2, 0.1125)
+    handler = ImageHandler(path)
+    results["projection_zoom"] = measure(lambda: project(zoomed, calculate_crop_info(zoomed, handler.image_size)), repeat)
+
+    # Traços: rasterização de 200 traços do zero, e depois o acréscimo de um traço por quadro
+    inked = CanvasState()
+    inked.set_strokes(make_strokes(200, 100))
+    handler = ImageHandler(path)
+    handler.get_processed_pixmap_for_projection(state, None, SCREEN_SIZE)
+    def render_all_strokes():
+        handler.annotation_layer.reset() # A camada já existe: o quadro acima a criou no tamanho da tela
+        handler.get_processed_pixmap_for_projection(inked, None, SCREEN_SIZE)
+    results["strokes_full"] = measure(render_all_strokes, repeat)
+
+    extra = iter(make_strokes(repeat + 1, 100, seed=1))
+    def render_with_new_stroke():
+        inked.append_stroke(next(extra))
+        handler.get_processed_pixmap_for_projection(inked, None, SCREEN_SIZE)
+    results["strokes_append"] = measure(render_with_new_stroke, repeat)
+    return results
+
+def bench_playlist(directory: str, image_path: str, repeat: int) -> dict:
+    manager = PlaylistManager()
+    images_data = []
+    for i in range(50):
+        state = CanvasState()
+        state.set_strokes(make_strokes(20, 200, seed=i))
+        images_data.append({"path": image_path, "name": f"imagem_{i}", "canvas_state": state})
+    playlist_path = os.path.join(directory, "playlist.json")
+    return {
+        "save": measure(lambda: manager.save_playlist(images_data, playlist_path), repeat),
+        "load": measure(lambda: manager.load_playlist(playlist_path), repeat),
+    }
+
+def bench_thumbnail_list(path: str, repeat: int, count: int = 24) -> dict:
+    widget = ThumbnailListWidget()
+    def populate():
+        # Handlers novos a cada rodada: mede a decodificação das miniaturas, como ao abrir uma pasta
+        widget.populate_from_data([{"path": path, "name": f"{i}.jpg", "handler": ImageHandler(path),
+                                    "canvas_state": None} for i in range(count)])
+    return measure(populate, repeat)
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and "cold" not in value:
+            flat.update(flatten(value, f"{name}/"))
+        else:
+            flat[name] = value
+    return flat
+
+def check_thresholds(flat: dict, thresholds: dict) -> list[str]:
+    """Limites no formato {"12mp/preview.median": 0.1}; retorna as violações; chaves com "_" são notas."""
+    failures = []
+    for key, limit in thresholds.items():
+        if key.startswith("_"):
+            continue
+        name, _, metric = key.rpartition(".")
+        value = flat.get(name, {}).get(metric)
+        if value is not None and value > limit:
+            failures.append(f"{key}: {value:.3f}s > {limit:.3f}s")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks dos pipelines de imagem")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Tamanhos das imagens sintéticas em megapixels, separados por vírgula.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições após a chamada fria.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Arquivo JSON de resultados (padrão: benchmarks/results.json).")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="Arquivo JSON de limites (vazio para não verificar).")
+    parser.add_argument("--image-dir", default=None, help="Diretório para guardar/reaproveitar as imagens sintéticas.")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    directory = args.image_dir or tempfile.mkdtemp(prefix="projetor_bench_")
+    os.makedirs(directory, exist_ok=True)
+
+    results = {}
+    for megapixels in sizes:
+        print(f"Gerando imagem de {megapixels} MP...", flush=True)
+        path = make_synthetic_image(megapixels, directory)
+        print(f"Medindo {megapixels} MP...", flush=True)
+        results[f"{megapixels}mp"] = bench_image(path, args.repeat)
+        results[f"{megapixels}mp"]["thumbnail_list"] = bench_thumbnail_list(path, max(1, args.repeat // 2))
+    results["playlist"] = bench_playlist(directory, make_synthetic_image(sizes[0] if sizes else 1, directory), args.repeat)
+
+    flat = flatten(results)
+    failures = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            failures = check_thresholds(flat, json.load(f))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": flat,
+        "failures": failures,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    for name, value in flat.items():
+        print(f"{name:40s} frio {value['cold']:.4f}s  mediana {value['median']:.4f}s")
+    print(f"Resultados gravados em: {args.output}")
+    for failure in failures:
+        print(f"LIMITE EXCEDIDO: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
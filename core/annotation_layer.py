@@ -0,0 +1,156 @@
+# core/annotation_layer.py
+
+import logging
+from PIL import Image, ImageDraw
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+def output_scale(box: tuple[int, int, int, int], size: tuple[int, int]) -> float:
+    """Pixels de saída por pixel da original quando a região `box` é lida em `size`."""
+    left, top, right, bottom = box
+    return (size[0] / (right - left) + size[1] / (bottom - top)) / 2
+
+def stroke_width(thickness: float, scale: float) -> float:
+    """
+    Largura, em pixels de saída, de um traço de espessura `thickness` (pixels da
+    original). A mesma fórmula vale para a camada e para a tinta provisória da
+    projeção, para que o traço não mude de largura ao ser concluído.
+    """
+    return max(1.0, thickness * scale)
+
+class AnnotationLayer:
+    """
+    Camada RGBA transparente que guarda os traços já rasterizados na
+    resolução da saída: ela cobre a região `box` da imagem original em
+    `size` pixels (o tamanho em que essa região é projetada), então pode ser
+    composta direto sobre a imagem processada, sem recorte nem redimensionamento.
+    Novos traços são desenhados de forma incremental, e a camada só é
+    reconstruída quando traços são removidos ou a lista é trocada.
+    """
+    # Acima disso, reconstruir a camada inteira tende a ser mais barato
+    MAX_REGION_CHANGES = 64
+
+    def __init__(self, image_size: tuple[int, int], box: tuple[int, int, int, int] | None = None,
+                 size: tuple[int, int] | None = None):
+        """
+        Args:
+            image_size (tuple): Tamanho da imagem original (os traços são normalizados por ele).
+            box (tuple, opcional): Região da original coberta pela camada (padrão: a imagem toda).
+            size (tuple, opcional): Tamanho da camada em pixels (padrão: o da região).
+        """
+        img_w, img_h = image_size
+        left, top, right, bottom = box or (0, 0, img_w, img_h)
+        self.size = size or (right - left, bottom - top)
+        self.box = (left, top, right, bottom)
+        # Coordenada normalizada (0-1) da original -> pixel da camada
+        scale_x = self.size[0] / (right - left)
+        scale_y = self.size[1] / (bottom - top)
+        self._factor = (img_w * scale_x, img_h * scale_y)
+        self._offset = (-left * scale_x, -top * scale_y)
+        # Espessuras estão em pixels da original
+        self.scale = output_scale(self.box, self.size)
+        self.image = None
+        self._rendered_strokes = []
+        # Incrementado a cada alteração da camada
+        self.version = 0
+
+    def sync(self, strokes: list, index=None) -> Image.Image | None:
+        """
+        Garante que a camada contenha exatamente os traços informados.
+
+        Args:
+            strokes (list): A lista de DrawingStroke do CanvasState.
+            index (StrokeGridIndex, opcional): Índice espacial dos traços. Quando
+                informado, remoções e reinserções redesenham apenas a região afetada.
+
+        Returns:
+            Image: A camada RGBA com os traços, ou None se não houver traços.
+        """
+        if not strokes:
+            self.reset()
+            return None
+
+        rendered = self._rendered_strokes
+        is_prefix = len(strokes) >= len(rendered) and all(a is b for a, b in zip(strokes, rendered))
+        if self.image is not None and index is not None and not is_prefix:
+            current_ids = {id(s) for s in strokes}
+            rendered_ids = {id(s) for s in rendered}
+            changed = [s for s in rendered if id(s) not in current_ids] + [s for s in strokes if id(s) not in rendered_ids]
+            if changed and len(changed) <= self.MAX_REGION_CHANGES:
+                # Poucos traços removidos/reinseridos: redesenha só a área deles
+                self._redraw_region(changed, index)
+                self._rendered_strokes = list(strokes)
+                self.version += 1
+                return self.image
+
+        if self.image is None or not is_prefix:
+            # Traços removidos ou substituídos: reconstrói do zero
+            self.image = Image.new("RGBA", self.size, (0, 0, 0, 0))
+            self._rendered_strokes = []
+            self.version += 1
+
+        new_strokes = strokes[len(self._rendered_strokes):]
+        if new_strokes:
+            draw = ImageDraw.Draw(self.image)
+            for stroke in new_strokes:
+                self._rasterize_stroke(draw, stroke)
+            self._rendered_strokes.extend(new_strokes)
+            self.version += 1
+        return self.image
+
+    def reset(self):
+        if self.image is not None:
+            self.image = None
+            self._rendered_strokes = []
+            self.version += 1
+
+    def _redraw_region(self, changed_strokes: list, index):
+        layer_w, layer_h = self.size
+        (fx, fy), (ox, oy) = self._factor, self._offset
+        dirty = index.bounding_rect(changed_strokes[0])
+        for stroke in changed_strokes[1:]:
+            dirty = dirty.united(index.bounding_rect(stroke))
+        margin = max(s.thickness for s in changed_strokes) * self.scale / 2 + 2
+        left = max(int(dirty.left() * fx + ox - margin), 0)
+        top = max(int(dirty.top() * fy + oy - margin), 0)
+        right = min(int(dirty.right() * fx + ox + margin) + 1, layer_w)
+        bottom = min(int(dirty.bottom() * fy + oy + margin) + 1, layer_h)
+        if right <= left or bottom <= top:
+            return
+
+        # Traços restantes que tocam a região, expandida pela maior espessura indexada
+        region = dirty.adjusted(-margin / fx, -margin / fy, margin / fx, margin / fy)
+        reach = (index.max_thickness * self.scale / 2 + 2) / min(fx, fy)
+        candidates = index.query_rect(region, reach)
+
+        # O ladrilho cobre os traços redesenhados por inteiro (limitado à camada): o
+        # ImageDraw arredonda coordenadas negativas e recorta bordas de forma diferente,
+        # e o resultado precisa ser idêntico ao de desenhar na camada inteira.
+        origin_x, origin_y, end_x, end_y = left, top, right, bottom
+        for stroke in candidates:
+            bbox = index.bounding_rect(stroke)
+            pad = stroke.thickness * self.scale + 2
+            origin_x = min(origin_x, int(bbox.left() * fx + ox - pad))
+            origin_y = min(origin_y, int(bbox.top() * fy + oy - pad))
+            end_x = max(end_x, int(bbox.right() * fx + ox + pad) + 1)
+            end_y = max(end_y, int(bbox.bottom() * fy + oy + pad) + 1)
+        origin_x, origin_y = max(origin_x, 0), max(origin_y, 0)
+        end_x, end_y = min(end_x, layer_w), min(end_y, layer_h)
+
+        tile = Image.new("RGBA", (end_x - origin_x, end_y - origin_y), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(tile)
+        for stroke in candidates:
+            self._rasterize_stroke(draw, stroke, offset=(origin_x, origin_y))
+        region_box = (left - origin_x, top - origin_y, right - origin_x, bottom - origin_y)
+        self.image.paste(tile.crop(region_box), (left, top))
+
+    def _rasterize_stroke(self, draw: ImageDraw.ImageDraw, stroke, offset=(0, 0)):
+        (fx, fy), (ox, oy) = self._factor, self._offset
+        off_x, off_y = offset
+        points = []
+        for i in range(stroke.path.elementCount()):
+            el = stroke.path.elementAt(i)
+            points.append((el.x * fx + ox - off_x, el.y * fy + oy - off_y))
+        if len(points) > 1:
+            color_tuple = (stroke.color.red(), stroke.color.green(), stroke.color.blue(), stroke.color.alpha())
+            draw.line(points, fill=color_tuple, width=int(stroke_width(stroke.thickness, self.scale)), joint="curve")
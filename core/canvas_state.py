@@ -1,7 +1,11 @@
 # core/canvas_state.py
 
+from contextlib import contextmanager
 from PySide6.QtCore import QObject, Signal, QRectF, QPointF
 from PySide6.QtGui import QColor, QPainterPath
+from core.stroke_simplifier import simplify_path
+from core.stroke_index import StrokeGridIndex
+from core.history import CommandHistory, PropertyChange, AddStroke, RemoveStroke, ClearStrokes
 
 class DrawingStroke:
     def __init__(self, path: QPainterPath, color: QColor, thickness: float):
@@ -10,8 +14,19 @@ class DrawingStroke:
         self.thickness = thickness
 
 class CanvasState(QObject):
+    # Propriedades cujas alterações entram no histórico de desfazer/refazer
+    HISTORY_PROPERTIES = ('rotation', 'brightness', 'contrast_applied', 'zoom_enabled', 'zoom_rect', 'lupa_rotation')
+    # Propriedades das ferramentas: mudam a interface, mas não o quadro projetado (não alteram `revision`)
+    TOOL_PROPERTIES = ('active_tool', 'pen_color', 'pen_thickness', 'highlighter_color', 'highlighter_thickness',
+                       'eraser_radius', 'laser_style')
+
     state_changed = Signal()
     laser_position_changed = Signal()
+    # Traço em andamento: cada evento de entrada emite apenas o novo segmento (coords normalizadas)
+    live_stroke_extended = Signal(QPointF, QPointF)
+    live_stroke_finished = Signal()
+    # Emitido após desfazer/refazer, com o conjunto do que mudou (nomes de propriedades ou "strokes")
+    history_replayed = Signal(object)
 
     def __init__(self):
         super().__init__()
@@ -27,6 +42,12 @@ class CanvasState(QObject):
         self.highlighter_color = QColor(255, 255, 0, 100)
         self.highlighter_thickness = 25.0
         self.strokes = []
+        self.stroke_index = StrokeGridIndex()
+        # TIFF de várias páginas: `strokes` são os da página `strokes_page`; os das demais ficam aqui
+        self.strokes_page = 0
+        self.page_strokes = {}
+        self.live_stroke = None
+        self.eraser_radius = 0.015 # Raio da borracha, em coordenadas normalizadas
         self.laser_position = None
         self.laser_style = "Brilho Intenso"
         self.laser_animation_frame = 0
@@ -35,21 +56,163 @@ class CanvasState(QObject):
         # --- NOVO: Estado para a rotação da lupa ---
         self.lupa_rotation = 0 # Pode ser 0, 90, 180, 270
 
+        # Simplificação dos traços ao serem confirmados (tolerância em pixels de saída; 0 desativa)
+        self.stroke_simplify_tolerance = 1.0
+        # Pixels da saída ocupados pela imagem original inteira (com zoom e corte); a janela
+        # principal usa a da projeção exibida e, sem ela, o tamanho da tela de projeção
+        self.stroke_reference_size = (1920, 1080)
+
+        # Histórico por imagem (apenas diferenças)
+        self.history = CommandHistory()
+        self._replaying_history = False
+
+        # Incrementada a cada state_changed que altera o quadro: identifica a versão renderizada deste estado
+        self.revision = 0
+        self._tool_change = False
+        self.state_changed.connect(self._bump_revision)
+
+    def _bump_revision(self):
+        if not self._tool_change:
+            self.revision += 1
+
     def add_stroke(self, path: QPainterPath):
+        if self.active_tool in ("pen", "highlighter") and self.stroke_simplify_tolerance > 0:
+            path = simplify_path(path, self.stroke_simplify_tolerance, self.stroke_reference_size)
         if self.active_tool == "pen":
-            stroke = DrawingStroke(path, self.pen_color, self.pen_thickness)
-            self.strokes.append(stroke)
-            self.state_changed.emit()
+            self.append_stroke(DrawingStroke(path, self.pen_color, self.pen_thickness))
         elif self.active_tool == "highlighter":
-            stroke = DrawingStroke(path, self.highlighter_color, self.highlighter_thickness)
-            self.strokes.append(stroke)
-            self.state_changed.emit()
+            self.append_stroke(DrawingStroke(path, self.highlighter_color, self.highlighter_thickness))
+
+    def append_stroke(self, stroke: DrawingStroke):
+        self.strokes.append(stroke)
+        self.stroke_index.insert(stroke)
+        self._record(AddStroke(stroke))
+        self.state_changed.emit()
+
+    def insert_stroke(self, position: int, stroke: DrawingStroke, order=None):
+        self.strokes.insert(position, stroke)
+        self.stroke_index.insert(stroke, order)
+        self._record(AddStroke(stroke))
+        self.state_changed.emit()
+
+    def set_strokes(self, strokes: list):
+        """Substitui todos os traços (ex.: ao carregar uma galeria) mantendo o índice espacial."""
+        self.strokes = list(strokes)
+        self.stroke_index.rebuild(self.strokes)
+        self.state_changed.emit()
+
+    def show_page_strokes(self, page: int):
+        """
+        Guarda os traços da página atual e passa a exibir os de `page`. O
+        histórico é limpo: seus comandos se referem aos traços da página anterior.
+        """
+        if page == self.strokes_page:
+            return
+        if self.strokes:
+            self.page_strokes[self.strokes_page] = self.strokes
+        self.strokes_page = page
+        self.history.clear()
+        self.set_strokes(self.page_strokes.pop(page, []))
+
+    def remove_stroke(self, stroke: DrawingStroke):
+        # O caso comum (desfazer o último traço) é O(1)
+        if self.strokes and self.strokes[-1] is stroke:
+            position = len(self.strokes) - 1
+        elif stroke in self.strokes:
+            position = self.strokes.index(stroke)
+        else:
+            return
+        order = self.stroke_index.order_of(stroke)
+        del self.strokes[position]
+        self.stroke_index.remove(stroke)
+        self._record(RemoveStroke(stroke, position, order))
+        self.state_changed.emit()
+
+    def erase_at(self, pos: QPointF) -> bool:
+        """Remove o traço mais recente sob a borracha. Retorna True se algum traço foi apagado."""
+        stroke = self.stroke_index.hit_test(pos, self.eraser_radius)
+        if stroke is None:
+            return False
+        self.remove_stroke(stroke)
+        return True
+
+    def begin_live_stroke(self, pos: QPointF):
+        """Inicia a captura de um traço com a ferramenta ativa (caneta ou marca-texto)."""
+        if self.active_tool == "pen":
+            color, thickness = self.pen_color, self.pen_thickness
+        elif self.active_tool == "highlighter":
+            color, thickness = self.highlighter_color, self.highlighter_thickness
+        else:
+            return
+        path = QPainterPath()
+        path.moveTo(pos)
+        self.live_stroke = DrawingStroke(path, color, thickness)
+
+    def extend_live_stroke(self, pos: QPointF):
+        if not self.live_stroke:
+            return
+        last_pos = self.live_stroke.path.currentPosition()
+        if last_pos == pos:
+            return
+        self.live_stroke.path.lineTo(pos)
+        self.live_stroke_extended.emit(last_pos, pos)
+
+    def finish_live_stroke(self):
+        """Confirma o traço em andamento (via add_stroke) e descarta a tinta provisória."""
+        if not self.live_stroke:
+            return
+        stroke = self.live_stroke
+        self.live_stroke = None
+        if stroke.path.elementCount() > 1:
+            self.add_stroke(stroke.path)
+        self.live_stroke_finished.emit()
 
     def clear_drawings(self):
         if self.strokes:
-            self.strokes.clear()
+            # Uma lista nova é criada para que o histórico guarde a antiga sem copiá-la
+            self._record(ClearStrokes(self.strokes))
+            self.strokes = []
+            self.stroke_index.clear()
             self.state_changed.emit()
 
+    def _record(self, command):
+        if not self._replaying_history:
+            self.history.record(command)
+
+    @contextmanager
+    def history_group(self):
+        """Agrupa as alterações feitas no bloco em um único passo do histórico."""
+        self.history.begin_group()
+        try:
+            yield
+        finally:
+            self.history.end_group()
+
+    @property
+    def is_replaying_history(self) -> bool:
+        """True enquanto um desfazer/refazer é aplicado (antes de history_replayed)."""
+        return self._replaying_history
+
+    def undo(self) -> bool:
+        return self._replay(self.history.pop_undo(), undo=True)
+
+    def redo(self) -> bool:
+        return self._replay(self.history.pop_redo(), undo=False)
+
+    def _replay(self, command, undo: bool) -> bool:
+        if command is None:
+            return False
+        self._replaying_history = True
+        try:
+            if undo:
+                command.undo(self)
+            else:
+                command.redo(self)
+        finally:
+            self._replaying_history = False
+        self.history_replayed.emit(command.changed())
+        return True
+
     def update_laser_position(self, pos: QPointF | None):
         if self.laser_position != pos:
             self.laser_position = pos
@@ -57,9 +220,15 @@ class CanvasState(QObject):
 
     def set_property(self, name, value):
         if hasattr(self, name) and getattr(self, name) != value:
+            if name in self.HISTORY_PROPERTIES:
+                self._record(PropertyChange(name, getattr(self, name), value))
             setattr(self, name, value)
             if name == 'laser_style':
                 self.laser_position_changed.emit()
             else:
-                self.state_changed.emit()
+                self._tool_change = name in self.TOOL_PROPERTIES
+                try:
+                    self.state_changed.emit()
+                finally:
+                    self._tool_change = False
 
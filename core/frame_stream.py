@@ -0,0 +1,85 @@
+# core/frame_stream.py
+
+import queue
+import logging
+import threading
+from PIL import Image
+from core.image_decoder import to_native_mode
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class FrameStream:
+    """
+    Decodificação contínua dos quadros de uma animação (GIF, WebP, APNG).
+    Uma thread lê os quadros em sequência e os deixa num buffer circular de
+    poucos quadros: a animação nunca é expandida inteira na memória, e a
+    decodificação fica no máximo `buffer_size` quadros à frente da exibição.
+    Ao chegar ao fim, recomeça do primeiro quadro.
+    """
+    # Duração usada quando o arquivo não informa (ou informa 0), como fazem os navegadores
+    DEFAULT_DURATION_MS = 100
+    MIN_DURATION_MS = 20
+
+    def __init__(self, file_path: str, buffer_size: int = 4):
+        self.file_path = file_path
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        self._stop_event = threading.Event()
+        self.frame_count = None # Conhecido depois da primeira volta
+        self._thread = threading.Thread(target=self._run, name="FrameStream", daemon=True)
+        self._thread.start()
+
+    def next_frame(self, timeout: float = 0.0):
+        """
+        Próximo quadro decodificado: (índice, imagem, duração em ms), ou None
+        se a decodificação ainda não o tiver entregue dentro de `timeout`.
+        """
+        try:
+            return self._buffer.get(timeout=timeout) if timeout > 0 else self._buffer.get_nowait()
+        except queue.Empty:
+            return None
+
+    @property
+    def is_alive(self) -> bool:
+        """False quando a thread terminou (fim sem quadros ou erro) e não há mais quadros no buffer."""
+        return self._thread.is_alive() or not self._buffer.empty()
+
+    def close(self):
+        self._stop_event.set()
+        # Libera a thread caso esteja esperando espaço no buffer
+        try:
+            while True:
+                self._buffer.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout=1.0)
+
+    def _put(self, item) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                self._buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            with Image.open(self.file_path) as image:
+                while not self._stop_event.is_set():
+                    index = 0
+                    while True:
+                        try:
+                            image.seek(index)
+                        except EOFError:
+                            break
+                        # Cada quadro já vem composto sobre os anteriores pelo Pillow (regras de descarte do GIF/WebP)
+                        frame = to_native_mode(image.copy())
+                        duration = image.info.get("duration") or self.DEFAULT_DURATION_MS
+                        if not self._put((index, frame, max(self.MIN_DURATION_MS, int(duration)))):
+                            return
+                        index += 1
+                    if index == 0:
+                        return
+                    self.frame_count = index
+        except Exception:
+            logger.error(f"Falha ao decodificar a animação {self.file_path}", exc_info=True)
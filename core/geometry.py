@@ -0,0 +1,121 @@
+# core/geometry.py
+
+"""
+Geometria da lupa e da projeção, independente de widgets.
+
+A pré-visualização mostra uma "tela" com a proporção do monitor de projeção e,
+dentro dela, a imagem girada e ajustada (KeepAspectRatio). A lupa é um retângulo
+normalizado (0-1) relativo a essa tela. Como o corte resultante não depende do
+tamanho em pixels da pré-visualização, tudo aqui é calculado numa tela virtual
+de altura 1, a partir apenas do CanvasState e do tamanho da imagem.
+
+As funções em cache devolvem objetos Qt compartilhados: não os modifique.
+"""
+
+from functools import lru_cache
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QTransform
+
+def _rotated_size(img_w: float, img_h: float, rotation: int) -> tuple[float, float]:
+    if rotation % 180 == 90:
+        return img_h, img_w
+    return img_w, img_h
+
+def rotated_size(width: float, height: float, rotation: int) -> tuple[float, float]:
+    """Tamanho da imagem depois de girada por um múltiplo de 90°."""
+    return _rotated_size(width, height, rotation)
+
+def orientation_transform(rotation: int, width: float, height: float) -> QTransform:
+    """
+    Transformação de pixels de uma imagem width x height não girada para a
+    mesma imagem girada (sentido anti-horário, como Image.rotate com
+    expand=True). Aplicada no QPainter, dispensa gerar a cópia girada.
+    """
+    rotation %= 360
+    if rotation == 90:
+        return QTransform(0, -1, 1, 0, 0, width)
+    if rotation == 180:
+        return QTransform(-1, 0, 0, -1, width, height)
+    if rotation == 270:
+        return QTransform(0, 1, -1, 0, height, 0)
+    return QTransform()
+
+@lru_cache(maxsize=256)
+def fit_image_in_screen(img_w: int, img_h: int, rotation: int, aspect_ratio: float) -> tuple[QRectF, QRectF]:
+    """
+    Retorna (tela, imagem_na_tela) na tela virtual de tamanho aspect_ratio x 1,
+    com a imagem girada centralizada e ajustada sem distorção.
+    """
+    screen = QRectF(0, 0, aspect_ratio, 1.0)
+    rot_w, rot_h = _rotated_size(img_w, img_h, rotation)
+    scale = min(aspect_ratio / rot_w, 1.0 / rot_h)
+    image_rect = QRectF(0, 0, rot_w * scale, rot_h * scale)
+    image_rect.moveCenter(screen.center())
+    return screen, image_rect
+
+@lru_cache(maxsize=256)
+def screen_to_image_transform(img_w: int, img_h: int, rotation: int, aspect_ratio: float) -> QTransform:
+    """Transformação da tela virtual para pixels da imagem original (não girada)."""
+    _, image_rect = fit_image_in_screen(img_w, img_h, rotation, aspect_ratio)
+    rot_w, _ = _rotated_size(img_w, img_h, rotation)
+    scale = image_rect.width() / rot_w
+
+    image_to_screen = QTransform()
+    image_to_screen.translate(image_rect.center().x(), image_rect.center().y())
+    image_to_screen.rotate(rotation)
+    image_to_screen.scale(scale, scale)
+    image_to_screen.translate(-img_w / 2, -img_h / 2)
+    inverse, _ = image_to_screen.inverted()
+    return inverse
+
+@lru_cache(maxsize=1024)
+def _crop_geometry(img_w: int, img_h: int, rotation: int, lupa_rotation: int, aspect_ratio: float,
+                   zoom_rect: tuple[float, float, float, float]) -> tuple[float, float, float, float, int]:
+    screen, _ = fit_image_in_screen(img_w, img_h, rotation, aspect_ratio)
+    zx, zy, zw, zh = zoom_rect
+
+    # 1. Retângulo da lupa na tela virtual
+    lupa_rect = QRectF(screen.x() + zx * screen.width(), screen.y() + zy * screen.height(),
+                       zw * screen.width(), zh * screen.height())
+
+    # 2. Cantos da lupa girados em torno do seu centro
+    center = lupa_rect.center()
+    lupa_transform = QTransform().translate(center.x(), center.y()).rotate(lupa_rotation).translate(-center.x(), -center.y())
+    corners = [lupa_transform.map(p) for p in (lupa_rect.topLeft(), lupa_rect.topRight(),
+                                               lupa_rect.bottomRight(), lupa_rect.bottomLeft())]
+
+    # 3. Cantos mapeados para a imagem original e sua caixa delimitadora
+    to_image = screen_to_image_transform(img_w, img_h, rotation, aspect_ratio)
+    mapped = [to_image.map(p) for p in corners]
+    min_x = min(p.x() for p in mapped)
+    max_x = max(p.x() for p in mapped)
+    min_y = min(p.y() for p in mapped)
+    max_y = max(p.y() for p in mapped)
+
+    final_rotation = (rotation - lupa_rotation) % 360
+    return min_x, min_y, max_x - min_x, max_y - min_y, final_rotation
+
+def calculate_crop_info(state, image_size: tuple[int, int]) -> dict | None:
+    """
+    Calcula o retângulo de corte (em pixels da imagem original) e a rotação final
+    da projeção para a lupa do estado informado.
+
+    Args:
+        state (CanvasState): Estado com rotation, lupa_rotation, zoom_rect e projection_aspect_ratio.
+        image_size (tuple): Largura e altura da imagem original.
+
+    Returns:
+        dict: {"crop_rect": QRectF, "final_rotation": int}, ou None se a imagem for vazia.
+    """
+    img_w, img_h = image_size
+    if img_w <= 0 or img_h <= 0 or state.projection_aspect_ratio <= 0:
+        return None
+    zoom_rect = state.zoom_rect
+    x, y, w, h, final_rotation = _crop_geometry(
+        img_w, img_h, state.rotation % 360, state.lupa_rotation % 360, float(state.projection_aspect_ratio),
+        (zoom_rect.x(), zoom_rect.y(), zoom_rect.width(), zoom_rect.height())
+    )
+    return {
+        "crop_rect": QRectF(x, y, w, h),
+        "final_rotation": final_rotation
+    }
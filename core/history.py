@@ -0,0 +1,140 @@
+# core/history.py
+
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+# Nome usado em `changed` pelos comandos que alteram os traços
+STROKES = "strokes"
+
+class HistoryCommand(ABC):
+    """Uma ação reversível. Guarda apenas a diferença, nunca uma cópia do estado."""
+    @abstractmethod
+    def undo(self, state): ...
+    @abstractmethod
+    def redo(self, state): ...
+    @abstractmethod
+    def changed(self) -> set:
+        """Propriedades do CanvasState alteradas pelo comando (STROKES para os traços)."""
+    def estimated_size(self) -> int: return 64
+
+class PropertyChange(HistoryCommand):
+    def __init__(self, name: str, old_value, new_value):
+        self.name = name
+        self.old_value = old_value
+        self.new_value = new_value
+        self.timestamp = time.monotonic()
+
+    def undo(self, state): state.set_property(self.name, self.old_value)
+    def redo(self, state): state.set_property(self.name, self.new_value)
+    def changed(self) -> set: return {self.name}
+
+class AddStroke(HistoryCommand):
+    def __init__(self, stroke):
+        self.stroke = stroke
+
+    def undo(self, state): state.remove_stroke(self.stroke)
+    def redo(self, state): state.append_stroke(self.stroke)
+    def changed(self) -> set: return {STROKES}
+    def estimated_size(self) -> int: return 64 + 16 * self.stroke.path.elementCount()
+
+class RemoveStroke(HistoryCommand):
+    def __init__(self, stroke, position: int, order=None):
+        self.stroke = stroke
+        self.position = position
+        self.order = order # Posição na ordem de desenho do índice espacial
+
+    def undo(self, state): state.insert_stroke(self.position, self.stroke, self.order)
+    def redo(self, state): state.remove_stroke(self.stroke)
+    def changed(self) -> set: return {STROKES}
+    def estimated_size(self) -> int: return 64 + 16 * self.stroke.path.elementCount()
+
+class ClearStrokes(HistoryCommand):
+    def __init__(self, strokes: list):
+        # A lista antiga é mantida por referência (CanvasState cria uma nova ao limpar)
+        self.strokes = strokes
+
+    def undo(self, state): state.set_strokes(self.strokes)
+    def redo(self, state): state.clear_drawings()
+    def changed(self) -> set: return {STROKES}
+    def estimated_size(self) -> int: return 64 + sum(16 * s.path.elementCount() for s in self.strokes)
+
+class CommandGroup(HistoryCommand):
+    """Vários comandos desfeitos e refeitos como um único passo."""
+    def __init__(self, commands: list):
+        self.commands = commands
+
+    def undo(self, state):
+        for command in reversed(self.commands): command.undo(state)
+    def redo(self, state):
+        for command in self.commands: command.redo(state)
+    def changed(self) -> set: return set().union(*(c.changed() for c in self.commands))
+    def estimated_size(self) -> int: return sum(c.estimated_size() for c in self.commands)
+
+class CommandHistory:
+    """
+    Pilhas de desfazer/refazer de um CanvasState. Alterações seguidas da mesma
+    propriedade (ex.: arrastar o slider de brilho) são agrupadas em um único
+    passo, e os passos mais antigos são descartados ao exceder o orçamento.
+    Entre begin_group() e end_group(), os comandos registrados viram um só passo.
+    """
+    MERGE_INTERVAL = 0.5 # segundos
+
+    def __init__(self, max_entries: int = 200, memory_budget: int = 4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.memory_budget = memory_budget
+        self._undo = deque()
+        self._redo = deque()
+        self._memory_used = 0
+        self._group = None
+
+    def can_undo(self) -> bool: return bool(self._undo)
+    def can_redo(self) -> bool: return bool(self._redo)
+
+    def begin_group(self):
+        self._group = []
+
+    def end_group(self):
+        commands, self._group = self._group, None
+        if commands:
+            self.record(commands[0] if len(commands) == 1 else CommandGroup(commands))
+
+    def record(self, command: HistoryCommand):
+        if self._group is not None:
+            self._group.append(command)
+            return
+        if self._redo:
+            self._memory_used -= sum(c.estimated_size() for c in self._redo)
+            self._redo.clear()
+
+        last = self._undo[-1] if self._undo else None
+        if (isinstance(command, PropertyChange) and isinstance(last, PropertyChange) and
+                last.name == command.name and command.timestamp - last.timestamp < self.MERGE_INTERVAL):
+            last.new_value = command.new_value
+            last.timestamp = command.timestamp
+            if last.new_value == last.old_value:
+                # O valor voltou ao de antes (ex.: slider arrastado e devolvido): o passo não muda nada
+                self._memory_used -= self._undo.pop().estimated_size()
+            return
+
+        self._undo.append(command)
+        self._memory_used += command.estimated_size()
+        while self._undo and (len(self._undo) > self.max_entries or self._memory_used > self.memory_budget):
+            self._memory_used -= self._undo.popleft().estimated_size()
+
+    def pop_undo(self) -> HistoryCommand | None:
+        if not self._undo: return None
+        command = self._undo.pop()
+        self._redo.append(command)
+        return command
+
+    def pop_redo(self) -> HistoryCommand | None:
+        if not self._redo: return None
+        command = self._redo.pop()
+        self._undo.append(command)
+        return command
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._memory_used = 0
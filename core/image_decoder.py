@@ -0,0 +1,170 @@
+# core/image_decoder.py
+
+import os
+import math
+import logging
+from abc import ABC, abstractmethod
+from PIL import Image
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage, QImageReader
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+# O limite padrão do Pillow contra "decompression bombs" (~89 MP, erro acima de ~179 MP) recusaria
+# panorâmicas e digitalizações que a pirâmide de ladrilhos foi feita para exibir
+Image.MAX_IMAGE_PIXELS = 512 * 1024 * 1024
+
+# Modos mantidos como estão; os demais são convertidos para o equivalente mais próximo
+NATIVE_MODES = ("L", "LA", "RGB", "RGBA")
+
+# Formatos em que vários quadros formam uma animação; nos demais (TIFF) são páginas
+ANIMATED_FORMATS = ("GIF", "WEBP", "PNG")
+
+def probe_sequence(file_path: str) -> tuple[str | None, int]:
+    """
+    Verifica se o arquivo tem vários quadros, lendo o mínimo possível.
+
+    Returns:
+        tuple: ("animation", 0) para GIF/WebP/APNG animados (a contagem exigiria
+               percorrer o arquivo), ("pages", n) para TIFF de várias páginas,
+               ou (None, 1) para imagens de um quadro só.
+    """
+    with Image.open(file_path) as image:
+        if not getattr(image, "is_animated", False):
+            return None, 1
+        if image.format in ANIMATED_FORMATS:
+            return "animation", 0
+        return "pages", image.n_frames
+
+def to_native_mode(image: Image.Image) -> Image.Image:
+    """Converte a imagem decodificada para um dos NATIVE_MODES, sem adicionar alfa desnecessário."""
+    if image.mode in NATIVE_MODES:
+        return image
+    if image.mode == "P" or image.mode == "PA":
+        has_alpha = image.mode == "PA" or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB")
+    if image.mode in ("1", "I", "I;16", "I;16B", "I;16L", "F"):
+        return image.convert("L")
+    return image.convert("RGB")
+
+class ImageDecoder(ABC):
+    """
+    Interface de decodificação usada pelo ImageHandler. Cada pedido informa a
+    resolução mínima de que precisa (`min_size`), e o decodificador escolhe o
+    caminho mais barato que a atenda: o resultado tem pelo menos `min_size` em
+    cada dimensão (ou o tamanho original, se for menor), mantém a proporção
+    e está num dos NATIVE_MODES.
+    """
+    name = ""
+
+    def supports(self, extension: str) -> bool:
+        return True
+
+    @abstractmethod
+    def probe_size(self, file_path: str) -> tuple[int, int]:
+        """Lê apenas o cabeçalho e retorna (largura, altura) originais."""
+
+    @abstractmethod
+    def decode(self, file_path: str, min_size: tuple[int, int] | None = None, frame: int = 0) -> Image.Image:
+        """Decodifica o quadro (ou página) `frame` com pelo menos `min_size`."""
+
+class PillowDecoder(ImageDecoder):
+    """
+    Pillow com draft() (redução na própria descompressão do JPEG, em 1/2, 1/4
+    ou 1/8) seguido de reduce() (média em blocos inteiros) até o tamanho pedido.
+    """
+    name = "pillow"
+
+    def probe_size(self, file_path: str) -> tuple[int, int]:
+        with Image.open(file_path) as image:
+            return image.size
+
+    def decode(self, file_path: str, min_size: tuple[int, int] | None = None, frame: int = 0) -> Image.Image:
+        image = Image.open(file_path)
+        if frame:
+            image.seek(frame)
+        if min_size:
+            image.draft(image.mode, min_size)
+        image = to_native_mode(image)
+        image.load()
+        if min_size:
+            factor = min(image.width // max(1, min_size[0]), image.height // max(1, min_size[1]))
+            if factor >= 2:
+                image = image.reduce(factor)
+        return image
+
+class QtDecoder(ImageDecoder):
+    """QImageReader com setScaledSize (os plugins de JPEG e WebP reduzem durante a decodificação)."""
+    name = "qt"
+
+    def __init__(self):
+        self._formats = None
+
+    def supports(self, extension: str) -> bool:
+        if self._formats is None:
+            self._formats = {bytes(f).decode("ascii").lower() for f in QImageReader.supportedImageFormats()}
+        return extension.lower().lstrip(".") in self._formats
+
+    @staticmethod
+    def _reader(file_path: str) -> QImageReader:
+        reader = QImageReader(file_path)
+        # Mantém a orientação armazenada, como o Pillow (a rotação é escolhida pelo usuário)
+        reader.setAutoTransform(False)
+        return reader
+
+    def probe_size(self, file_path: str) -> tuple[int, int]:
+        size = self._reader(file_path).size()
+        if not size.isValid():
+            raise OSError(f"Não foi possível ler o tamanho de {file_path}")
+        return size.width(), size.height()
+
+    def decode(self, file_path: str, min_size: tuple[int, int] | None = None, frame: int = 0) -> Image.Image:
+        reader = self._reader(file_path)
+        if frame and not reader.jumpToImage(frame):
+            raise OSError(f"Quadro {frame} indisponível em {file_path}")
+        size = reader.size()
+        if min_size and size.isValid():
+            scale = max(min_size[0] / size.width(), min_size[1] / size.height())
+            if scale < 1.0:
+                reader.setScaledSize(QSize(max(1, math.ceil(size.width() * scale)),
+                                           max(1, math.ceil(size.height() * scale))))
+        qimage = reader.read()
+        if qimage.isNull():
+            raise OSError(f"Falha ao decodificar {file_path}: {reader.errorString()}")
+
+        if qimage.hasAlphaChannel():
+            qformat, mode = QImage.Format.Format_RGBA8888, "RGBA"
+        elif qimage.isGrayscale():
+            qformat, mode = QImage.Format.Format_Grayscale8, "L"
+        else:
+            qformat, mode = QImage.Format.Format_RGB888, "RGB"
+        qimage = qimage.convertToFormat(qformat)
+        # copy(): os pixels passam a pertencer ao Pillow, independentes do QImage
+        return Image.frombuffer(mode, (qimage.width(), qimage.height()), qimage.constBits(),
+                                "raw", mode, qimage.bytesPerLine(), 1).copy()
+
+DECODERS = {
+    PillowDecoder.name: PillowDecoder(),
+    QtDecoder.name: QtDecoder(),
+}
+
+# Decodificador preferido por formato, escolhido por medição (6000x4500, pedido de 1920x1080):
+# JPEG e TIFF são mais rápidos no Pillow; WebP é ~35% mais rápido no Qt; PNG empata.
+FORMAT_DECODERS = {
+    ".webp": QtDecoder.name,
+}
+DEFAULT_DECODER = PillowDecoder.name
+
+def set_format_decoder(extension: str, name: str):
+    """Seleciona o decodificador de um formato (ex.: ".png", "qt")."""
+    if name not in DECODERS:
+        raise ValueError(f"Decodificador desconhecido: {name}")
+    FORMAT_DECODERS["." + extension.lower().lstrip(".")] = name
+
+def decoder_for(file_path: str) -> ImageDecoder:
+    """Decodificador configurado para o formato do arquivo, com o Pillow como alternativa."""
+    extension = os.path.splitext(file_path)[1].lower()
+    decoder = DECODERS[FORMAT_DECODERS.get(extension, DEFAULT_DECODER)]
+    if not decoder.supports(extension):
+        decoder = DECODERS[DEFAULT_DECODER]
+    return decoder
@@ -1,72 +1,319 @@
 # core/image_handler.py
 
+import math
 import logging
-from PIL import Image, ImageOps, ImageEnhance, ImageDraw
-from PySide6.QtGui import QPixmap, QImage
+from PIL import Image, ImageOps, ImageEnhance
+from PySide6.QtGui import QPixmap, QImage, QTransform
 from PySide6.QtCore import QSize, QRectF
+from core.annotation_layer import AnnotationLayer, output_scale
+from core.image_pyramid import ImagePyramid
+from core.geometry import orientation_transform
+from core.image_decoder import DECODERS, DEFAULT_DECODER, decoder_for, probe_sequence
+from utils.perf_monitor import perf
 
 logger = logging.getLogger("ImageProjectorLogger")
 
+# Formato Qt e bytes por pixel de cada modo nativo
+_QIMAGE_FORMATS = {
+    "L": (QImage.Format.Format_Grayscale8, 1),
+    "RGB": (QImage.Format.Format_RGB888, 3),
+    "RGBA": (QImage.Format.Format_RGBA8888, 4),
+}
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("LA", "RGBA")
+
 class ImageHandler:
-    def __init__(self, file_path: str):
+    # Acima deste tamanho a imagem é lida através de uma pirâmide de ladrilhos
+    PYRAMID_MIN_PIXELS = 16 * 1024 * 1024
+
+    # Acima desta escala a decodificação reduzida quase não economiza: decodifica-se a imagem inteira
+    REDUCED_DECODE_MAX_SCALE = 0.5
+
+    def __init__(self, file_path: str, pixel_cache=None, decoder=None):
+        self.file_path = file_path
+        self.pixel_cache = pixel_cache
+        self.decoder = decoder or decoder_for(file_path)
+        self.pyramid = None
+        # Criada na primeira projeção, no tamanho da saída (ver _get_projected_overlay)
+        self.annotation_layer = None
+        # Região da última projeção já lida e ajustada: traços novos só recompõem as anotações
+        self._projection_base = None
+        self._projection_base_key = None
+        # Nada é decodificado aqui: só o cabeçalho é lido, e cada pedido decodifica na resolução de que precisa
+        self._full_image = None
+        self._reduced_image = None
+        self._full_decode_failed = False
+        # Arquivos com vários quadros: "animation" (GIF/WebP/APNG) ou "pages" (TIFF), com a página exibida
+        self.sequence_kind = None
+        self.page_count = 1
+        self.page = 0
+        # Incrementada quando a imagem de origem muda (página ou quadro da animação)
+        self.source_version = 0
         try:
-            self.original_image = Image.open(file_path).convert("RGBA")
-        except Exception as e:
+            self.image_size = self.decoder.probe_size(file_path)
+            self.sequence_kind, self.page_count = probe_sequence(file_path)
+        except Exception:
             logger.error(f"Falha ao carregar a imagem: {file_path}", exc_info=True)
-            self.original_image = None
+            self.image_size = None
+        self._annotation_layer_key = None
+
+    @property
+    def is_animated(self) -> bool:
+        return self.sequence_kind == "animation"
+
+    def set_page(self, page: int) -> bool:
+        """
+        Passa a exibir outra página de um TIFF de várias páginas. Os pixels da
+        página anterior são descartados e os da nova são decodificados sob
+        demanda, como os da primeira. Retorna False se a página não existir.
+        """
+        if self.sequence_kind != "pages" or not (0 <= page < self.page_count) or page == self.page:
+            return False
+        try:
+            size = self._probe_page_size(page)
+        except Exception:
+            logger.error(f"Falha ao ler a página {page + 1} de {self.file_path}", exc_info=True)
+            return False
+        self.page = page
+        self._replace_source(None, size)
+        return True
+
+    def _probe_page_size(self, page: int) -> tuple[int, int]:
+        with Image.open(self.file_path) as image:
+            image.seek(page)
+            return image.size
+
+    def set_frame_image(self, frame: Image.Image):
+        """Usa um quadro já decodificado (da FrameStream) como imagem de origem, durante a animação."""
+        self._replace_source(frame, frame.size)
+
+    def _replace_source(self, image: Image.Image | None, size: tuple[int, int]):
+        self.source_version += 1
+        self._full_image = image
+        self._reduced_image = None
+        self._full_decode_failed = False
+        self.pyramid = None
+        self.release_projection_base()
+        if size != self.image_size:
+            # Páginas de tamanhos diferentes: a camada de anotações é recriada no próximo quadro
+            self.image_size = size
+            self.annotation_layer = None
 
+    def release_projection_base(self):
+        """Descarta a região guardada da última projeção (o slide deixou de ser exibido)."""
+        self._projection_base = None
+        self._projection_base_key = None
+
+    @perf.timed("imagem.decodificação")
+    def _decode(self, min_size: tuple[int, int] | None = None) -> Image:
+        try:
+            return self.decoder.decode(self.file_path, min_size, self.page)
+        except Exception:
+            fallback = DECODERS[DEFAULT_DECODER]
+            if self.decoder is fallback:
+                raise
+            logger.warning(f"Decodificador '{self.decoder.name}' falhou para {self.file_path}; usando '{fallback.name}'.", exc_info=True)
+            return fallback.decode(self.file_path, min_size, self.page)
+
+    @property
+    def original_image(self) -> Image:
+        """
+        Imagem em resolução total, decodificada (ou mapeada do cache de pixels) no
+        primeiro acesso. Imagens grandes passam para a pirâmide (nível 0 em disco)
+        e não ficam em memória: para elas retorna None, e a leitura é feita por
+        _read_region.
+        """
+        if self._full_image is None and self.pyramid is None and self.image_size and not self._full_decode_failed:
+            try:
+                # Com cache, os pixels já decodificados são mapeados do disco em vez de decodificados
+                # A imagem fica no modo de origem (L, RGB...); o alfa só é adicionado onde a composição exige
+                # O cache de pixels guarda só a primeira página de cada arquivo
+                use_cache = self.pixel_cache is not None and self.page == 0
+                image = self.pixel_cache.load(self.file_path) if use_cache else None
+                if image is None:
+                    image = self._decode()
+                    if use_cache:
+                        # A escrita em disco fica para a thread do cache: a primeira visita só paga a decodificação
+                        self.pixel_cache.store_async(self.file_path, image)
+            except Exception:
+                logger.error(f"Falha ao carregar a imagem: {self.file_path}", exc_info=True)
+                self._full_decode_failed = True
+                return None
+            self._set_full_image(image)
+        return self._full_image
+
+    def _set_full_image(self, image: Image.Image):
+        self._reduced_image = None
+        img_w, img_h = image.size
+        if img_w * img_h >= self.PYRAMID_MIN_PIXELS:
+            # A pirâmide lê o nível 0 do disco: a imagem decodificada é descartada
+            self.pyramid = ImagePyramid(image)
+            self._full_image = None
+        else:
+            self._full_image = image
+
+    def _source_for_scale(self, scale: float) -> Image:
+        """
+        Imagem inteira com pelo menos `scale` da resolução original: a decodificada
+        em resolução total, se já existir, ou uma decodificação reduzida.
+        """
+        if self._full_image is not None or scale > self.REDUCED_DECODE_MAX_SCALE:
+            return self.original_image
+        img_w, img_h = self.image_size
+        min_size = (max(1, math.ceil(img_w * scale)), max(1, math.ceil(img_h * scale)))
+        reduced = self._reduced_image
+        if reduced is None or reduced.width < min_size[0] or reduced.height < min_size[1]:
+            # Pixels de uma sessão anterior no cache custam menos que qualquer decodificação
+            cached = self.pixel_cache.load(self.file_path) if self.pixel_cache and self.page == 0 else None
+            if cached is not None:
+                self._set_full_image(cached)
+                return self._full_image
+            try:
+                reduced = self._decode(min_size)
+            except Exception:
+                logger.error(f"Falha ao decodificar {self.file_path} em {min_size}", exc_info=True)
+                return self.original_image
+            logger.debug(f"Decodificada em {reduced.width}x{reduced.height} (pedido {min_size}): {self.file_path}")
+            self._reduced_image = reduced
+        return reduced
+
+    @perf.timed("imagem.conversão")
     def _pil_to_qpixmap(self, pil_image: Image) -> QPixmap:
         try:
-            data = pil_image.tobytes("raw", "RGBA")
-            qimage = QImage(data, pil_image.width, pil_image.height, QImage.Format.Format_RGBA8888)
+            if pil_image.mode not in _QIMAGE_FORMATS:
+                pil_image = pil_image.convert("RGBA" if has_alpha(pil_image) else "RGB")
+            qformat, bytes_per_pixel = _QIMAGE_FORMATS[pil_image.mode]
+            data = pil_image.tobytes("raw", pil_image.mode)
+            qimage = QImage(data, pil_image.width, pil_image.height, pil_image.width * bytes_per_pixel, qformat)
             return QPixmap.fromImage(qimage)
         except Exception as e:
             logger.error(f"Erro ao converter imagem PIL para QPixmap: {e}", exc_info=True)
             return QPixmap()
 
-    def _draw_strokes_on_image(self, image: Image, strokes: list) -> Image:
-        if not strokes:
-            return image
-        image_with_drawings = image.copy()
-        draw = ImageDraw.Draw(image_with_drawings)
-        img_w, img_h = image.size
-        for stroke in strokes:
-            points = []
-            for i in range(stroke.path.elementCount()):
-                el = stroke.path.elementAt(i)
-                points.append((el.x * img_w, el.y * img_h))
-            if len(points) > 1:
-                color_tuple = (stroke.color.red(), stroke.color.green(), stroke.color.blue(), stroke.color.alpha())
-                draw.line(points, fill=color_tuple, width=int(stroke.thickness), joint="curve")
-        return image_with_drawings
-
-    def get_processed_pixmap_for_preview(self, state):
-        if not self.original_image: return None
-        processed_image = self.original_image
+    @staticmethod
+    def pil_to_qimage(pil_image: Image) -> QImage:
+        """Converte para uma QImage com memória própria (pode ser usada fora da thread da interface)."""
+        if pil_image.mode not in _QIMAGE_FORMATS:
+            pil_image = pil_image.convert("RGBA" if has_alpha(pil_image) else "RGB")
+        qformat, bytes_per_pixel = _QIMAGE_FORMATS[pil_image.mode]
+        data = pil_image.tobytes("raw", pil_image.mode)
+        return QImage(data, pil_image.width, pil_image.height, pil_image.width * bytes_per_pixel, qformat).copy()
+
+    @staticmethod
+    def _fit_region_size(box_size: tuple[int, int], rotation: int, target_size: QSize | None,
+                         display_mode: str = "Ajustar (Fit)") -> tuple[int, int]:
+        """
+        Tamanho (antes da rotação) em que a região deve ser lida para preencher
+        `target_size` segundo o modo de exibição, sem nunca ampliar a imagem.
+        """
+        box_w, box_h = box_size
+        if target_size is None or target_size.isEmpty() or display_mode in ("Centralizar (Center)", "Lado a Lado (Tile)"):
+            return box_w, box_h
+        target_w, target_h = target_size.width(), target_size.height()
+        if rotation % 180 == 90:
+            target_w, target_h = target_h, target_w
+        if display_mode in ("Preencher (Fill)", "Esticar (Stretch)"):
+            scale = max(target_w / box_w, target_h / box_h)
+        else:
+            scale = min(target_w / box_w, target_h / box_h)
+        if scale >= 1.0:
+            return box_w, box_h
+        return max(1, round(box_w * scale)), max(1, round(box_h * scale))
+
+    @perf.timed("imagem.leitura")
+    def _read_region(self, box: tuple[int, int, int, int], out_size: tuple[int, int],
+                     resample=Image.Resampling.BILINEAR) -> Image.Image | None:
+        """Lê a região `box` (em pixels da imagem original) já no tamanho `out_size`."""
+        img_w, img_h = self.image_size
+        box_size = (box[2] - box[0], box[3] - box[1])
+        source = None if self.pyramid else self._source_for_scale(max(out_size[0] / box_size[0], out_size[1] / box_size[1]))
+        if self.pyramid:
+            # Criada agora ou antes: toda leitura da imagem grande passa pelos ladrilhos
+            region = self.pyramid.read_region(box, out_size, resample)
+        elif source is None:
+            return None
+        elif source is not self._full_image:
+            # Decodificação reduzida: a caixa é levada à escala real do resultado (nem sempre exata)
+            scale_x, scale_y = source.width / img_w, source.height / img_h
+            l, t, r, b = box[0] * scale_x, box[1] * scale_y, box[2] * scale_x, box[3] * scale_y
+            x0, y0, x1, y1 = math.floor(l), math.floor(t), math.ceil(r), math.ceil(b)
+            region = source.crop((x0, y0, x1, y1))
+            region = region.resize(out_size, resample, box=(l - x0, t - y0, r - x0, b - y0), reducing_gap=2.0)
+        elif box == (0, 0, img_w, img_h) and out_size == box_size:
+            return source
+        else:
+            region = source.crop(box)
+            if region.size != out_size:
+                region = region.resize(out_size, resample, reducing_gap=2.0)
+
+        # Fora da imagem (lupa além da borda) a projeção deve mostrar o fundo: só aqui o alfa é necessário
+        left, top, right, bottom = box
+        if (left < 0 or top < 0 or right > img_w or bottom > img_h) and not has_alpha(region):
+            scale_x, scale_y = out_size[0] / box_size[0], out_size[1] / box_size[1]
+            mask = Image.new("L", out_size, 0)
+            mask.paste(255, (round((max(left, 0) - left) * scale_x), round((max(top, 0) - top) * scale_y),
+                             round((min(right, img_w) - left) * scale_x), round((min(bottom, img_h) - top) * scale_y)))
+            region = region.convert("LA" if region.mode == "L" else "RGBA")
+            region.putalpha(mask)
+        return region
+
+    @staticmethod
+    @perf.timed("imagem.ajustes")
+    def _apply_adjustments(image: Image, state) -> Image:
+        """Brilho e contraste automático, preservando o modo (e o alfa) da imagem."""
         if state.brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(processed_image)
-            processed_image = enhancer.enhance(state.brightness)
+            enhancer = ImageEnhance.Brightness(image)
+            image = enhancer.enhance(state.brightness)
         if state.contrast_applied:
-            processed_image_rgb = processed_image.convert("RGB")
-            contrasted_image = ImageOps.autocontrast(processed_image_rgb)
-            processed_image = contrasted_image.convert("RGBA")
-        if state.rotation != 0:
-            processed_image = processed_image.rotate(state.rotation, expand=True)
+            if has_alpha(image):
+                # O autocontraste só opera nas bandas de cor; o alfa é reanexado depois
+                alpha = image.getchannel("A")
+                color = ImageOps.autocontrast(image.convert("L" if image.mode == "LA" else "RGB"))
+                color.putalpha(alpha)
+                image = color
+            else:
+                image = ImageOps.autocontrast(image)
+        return image
+
+    @staticmethod
+    @perf.timed("imagem.composição")
+    def _composite_overlay(image: Image, overlay: Image) -> Image:
+        """Compõe a camada RGBA de anotações, convertendo a imagem só o necessário."""
+        if has_alpha(image):
+            return Image.alpha_composite(image.convert("RGBA"), overlay)
+        # Base opaca: colar com a máscara alfa equivale à composição e mantém o RGB sem alfa
+        base = image.convert("RGB") if image.mode != "RGB" else image.copy()
+        base.paste(overlay.convert("RGB"), (0, 0), overlay)
+        return base
+
+    @perf.timed("pipeline.preview")
+    def get_processed_pixmap_for_preview(self, state, target_size: QSize | None = None):
+        if not self.image_size: return None
+        img_w, img_h = self.image_size
+        region_size = self._fit_region_size((img_w, img_h), state.rotation, target_size)
+        processed_image = self._read_region((0, 0, img_w, img_h), region_size)
+        if processed_image is None: return None
+        processed_image = self._apply_adjustments(processed_image, state)
+        # Sem girar: a ZoomPreview aplica state.rotation como transformação ao pintar
         return self._pil_to_qpixmap(processed_image)
 
-    def get_processed_pixmap_for_projection(self, state, crop_info: dict | None):
-        if not self.original_image: return None
-        
-        processed_image = self.original_image
-        
-        if state.strokes:
-            processed_image = self._draw_strokes_on_image(processed_image, state.strokes)
+    @staticmethod
+    def get_projection_rotation(state, crop_info: dict | None) -> int:
+        """Rotação (anti-horária, múltipla de 90°) com que a projeção deve ser exibida."""
+        rotation = crop_info.get("final_rotation", 0) if crop_info else state.rotation
+        return rotation % 360
 
+    def _projection_geometry(self, state, crop_info: dict | None, output_size: QSize | None = None):
+        """
+        Resolve a região da imagem original (pixels inteiros), a rotação final e o
+        tamanho em que a região é lida (antes da rotação) para a projeção.
+        """
+        img_w, img_h = self.image_size
+        crop_box = (0, 0, img_w, img_h)
+        rotation = self.get_projection_rotation(state, crop_info)
         if crop_info:
             crop_rect = crop_info.get("crop_rect")
-            final_rotation = crop_info.get("final_rotation", 0)
-
-            # --- CORREÇÃO: Pipeline Crop -> Rotate ---
             if crop_rect and crop_rect.isValid():
                 left = int(crop_rect.left())
                 top = int(crop_rect.top())
@@ -74,36 +321,113 @@ class ImageHandler:
                 bottom = int(crop_rect.bottom())
                 
                 # Garante que a área de corte não exceda as dimensões da imagem
-                if right > processed_image.width: right = processed_image.width
-                if bottom > processed_image.height: bottom = processed_image.height
-
-                processed_image = processed_image.crop((left, top, right, bottom))
-            
-            # Aplica a rotação final APÓS o corte
-            if final_rotation != 0:
-                processed_image = processed_image.rotate(final_rotation, expand=True, fillcolor=(0,0,0,0))
-        else:
-            # Se não houver zoom, aplica apenas a rotação da imagem
-            if state.rotation != 0:
-                 processed_image = processed_image.rotate(state.rotation, expand=True, fillcolor=(0,0,0,0))
+                if right > img_w: right = img_w
+                if bottom > img_h: bottom = img_h
+                if right > left and bottom > top:
+                    crop_box = (left, top, right, bottom)
+        box_size = (crop_box[2] - crop_box[0], crop_box[3] - crop_box[1])
+        region_size = self._fit_region_size(box_size, rotation, output_size, state.display_mode)
+        return crop_box, rotation, region_size
 
+    # Image.rotate gira no sentido anti-horário, assim como as transposições ROTATE_*
+    _TRANSPOSES = {
+        90: Image.Transpose.ROTATE_90,
+        180: Image.Transpose.ROTATE_180,
+        270: Image.Transpose.ROTATE_270,
+    }
 
-        # Efeitos são aplicados após a transformação
-        if state.brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(processed_image)
-            processed_image = enhancer.enhance(state.brightness)
-        if state.contrast_applied:
-            processed_image_rgb = processed_image.convert("RGB")
-            contrasted_image = ImageOps.autocontrast(processed_image_rgb)
-            processed_image = contrasted_image.convert("RGBA")
+    @classmethod
+    def _transpose(cls, image: Image, rotation: int) -> Image:
+        """Giro exato por transposição, só onde os pixels precisam de fato mudar de lugar."""
+        method = cls._TRANSPOSES.get(rotation % 360)
+        return image.transpose(method) if method is not None else image
+
+    def get_projection_transform(self, state, crop_info: dict | None, output_size: QSize | None = None) -> QTransform:
+        """
+        Retorna a transformação que leva coordenadas normalizadas (0-1) da imagem
+        original para pixels da imagem entregue à projeção (após corte e rotação).
+        Usada para desenhar o traço em andamento direto na janela de projeção.
+        """
+        if not self.image_size: return QTransform()
+        img_w, img_h = self.image_size
+        (left, top, right, bottom), rotation, (out_w, out_h) = self._projection_geometry(state, crop_info, output_size)
+
+        transform = QTransform.fromScale(img_w, img_h)
+        transform *= QTransform.fromTranslate(-left, -top)
+        transform *= QTransform.fromScale(out_w / (right - left), out_h / (bottom - top))
+        transform *= orientation_transform(rotation, out_w, out_h)
+        return transform
+
+    def get_projection_ink_scale(self, state, crop_info: dict | None, output_size: QSize | None = None) -> float:
+        """Pixels da imagem projetada por pixel da original: converte a espessura dos traços, como na AnnotationLayer."""
+        if not self.image_size: return 1.0
+        crop_box, _, region_size = self._projection_geometry(state, crop_info, output_size)
+        return output_scale(crop_box, region_size)
+
+    @perf.timed("imagem.anotações")
+    def _get_projected_overlay(self, state, geometry):
+        """
+        Retorna a camada de anotações da região projetada (sem girar). A camada
+        é rasterizada direto no tamanho da saída: os traços ficam nítidos em
+        qualquer zoom e não há recorte nem redimensionamento por quadro. Ela
+        só é recriada quando a região ou o tamanho da saída mudam; fora isso,
+        novos traços continuam sendo desenhados de forma incremental.
+        """
+        crop_box, _, region_size = geometry
+        layer_key = (self.image_size, crop_box, region_size)
+        if self.annotation_layer is None or layer_key != self._annotation_layer_key:
+            self.annotation_layer = AnnotationLayer(self.image_size, crop_box, region_size)
+            self._annotation_layer_key = layer_key
+        return self.annotation_layer.sync(state.strokes, state.stroke_index)
+
+    @perf.timed("pipeline.projeção")
+    def get_processed_pixmap_for_projection(self, state, crop_info: dict | None, output_size: QSize | None = None):
+        """
+        Gera a imagem da projeção. Com `output_size` (pixels da tela de projeção),
+        a região é lida já reduzida para a saída, e os ajustes passam a custar
+        proporcionalmente à tela e não ao tamanho da imagem original.
 
+        A imagem é entregue sem girar: a ProjectionWindow aplica a rotação de
+        get_projection_rotation() como transformação ao pintar.
+        """
+        processed_image = self.render_projection_image(state, crop_info, output_size)
+        if processed_image is None: return None
         return self._pil_to_qpixmap(processed_image)
 
+    def render_projection_image(self, state, crop_info: dict | None, output_size: QSize | None = None) -> Image.Image | None:
+        """
+        Etapas de get_processed_pixmap_for_projection que só usam o Pillow
+        (leitura, ajustes e anotações), sem criar objetos de interface: podem
+        rodar em outra thread, desde que cada ImageHandler seja usado por uma
+        thread de cada vez.
+        """
+        if not self.image_size: return None
+        
+        geometry = self._projection_geometry(state, crop_info, output_size)
+        crop_box, _, region_size = geometry
+
+        base_key = (self.source_version, crop_box, region_size, state.brightness, state.contrast_applied)
+        if base_key != self._projection_base_key:
+            base = self._read_region(crop_box, region_size)
+            if base is None: return None
+            # Efeitos são aplicados após o corte, apenas sobre a imagem
+            self._projection_base = self._apply_adjustments(base, state)
+            self._projection_base_key = base_key
+        processed_image = self._projection_base
+
+        # As anotações ficam numa camada própria, composta por cima da imagem já processada
+        overlay = self._get_projected_overlay(state, geometry)
+        if overlay is not None:
+            processed_image = self._composite_overlay(processed_image, overlay)
+        return processed_image
+
+    @perf.timed("pipeline.miniatura")
     def get_thumbnail_pixmap(self, size: QSize, rotation_angle=0):
-        if not self.original_image: return None
-        thumbnail_image = self.original_image.copy()
-        thumbnail_image.thumbnail((size.width(), size.height()), Image.Resampling.LANCZOS)
-        if rotation_angle != 0:
-            thumbnail_image = thumbnail_image.rotate(rotation_angle, expand=True)
+        if not self.image_size: return None
+        img_w, img_h = self.image_size
+        thumb_size = self._fit_region_size((img_w, img_h), 0, size)
+        thumbnail_image = self._read_region((0, 0, img_w, img_h), thumb_size, Image.Resampling.LANCZOS)
+        if thumbnail_image is None: return None
+        # O ícone da lista é exibido como está, então aqui os pixels giram de verdade
+        thumbnail_image = self._transpose(thumbnail_image, rotation_angle)
         return self._pil_to_qpixmap(thumbnail_image)
-
@@ -0,0 +1,159 @@
+# core/image_pyramid.py
+
+import math
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class ImagePyramid:
+    """
+    Pirâmide de resoluções (mipmap) dividida em ladrilhos, para imagens muito grandes.
+
+    O nível 0 é a imagem original; cada nível seguinte tem metade da largura e da
+    altura. Os ladrilhos são gerados sob demanda (um ladrilho do nível k é a
+    redução 2x2 dos quatro ladrilhos correspondentes do nível k-1) e guardados num
+    cache LRU limitado por memória. Uma leitura escolhe o nível cuja resolução mais
+    se aproxima do tamanho de saída e monta apenas os ladrilhos que cobrem a região,
+    então o custo por quadro depende do tamanho da saída, não do tamanho da imagem.
+
+    A pirâmide não guarda a imagem recebida: o nível 0 é copiado, em faixas, para
+    um arquivo temporário mapeado em memória, e os ladrilhos dele são lidos do
+    disco sob demanda. Quem a cria pode descartar a imagem decodificada; a memória
+    residente fica limitada a `memory_budget` mais as páginas do arquivo que o
+    sistema operacional mantiver em cache (e pode descartar).
+    """
+    # Modos copiados para o arquivo do nível 0, com o número de bandas (uint8)
+    SPILL_BANDS = {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+    # Linhas copiadas por vez para o arquivo do nível 0
+    SPILL_ROWS = 256
+
+    def __init__(self, image: Image.Image, tile_size: int = 512, memory_budget: int = 256 * 1024 * 1024):
+        self.mode = image.mode
+        self.size = image.size
+        self.tile_size = tile_size
+        self.memory_budget = memory_budget
+        self._tiles = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._level0 = None
+        self._image = None
+        if self.mode in self.SPILL_BANDS:
+            self._level0 = self._spill(image)
+        else:
+            # Modos sem representação em uint8: o nível 0 fica em memória
+            logger.warning(f"Pirâmide: modo {self.mode} mantido em memória.")
+            self._image = image
+
+        self.level_sizes = [image.size]
+        w, h = image.size
+        while w > tile_size or h > tile_size:
+            w, h = (w + 1) // 2, (h + 1) // 2
+            self.level_sizes.append((w, h))
+        logger.info(f"Pirâmide criada para imagem {image.size[0]}x{image.size[1]} com {len(self.level_sizes)} níveis.")
+
+    def _spill(self, image: Image.Image):
+        """Copia a imagem para um arquivo temporário mapeado (faixa a faixa, sem uma segunda cópia inteira)."""
+        import numpy as np # Só para imagens grandes: a importação fica fora da inicialização
+        width, height = image.size
+        bands = self.SPILL_BANDS[self.mode]
+        shape = (height, width, bands) if bands > 1 else (height, width)
+        # Arquivo anônimo: removido pelo sistema quando o mapeamento for liberado
+        with tempfile.TemporaryFile(prefix="piramide_") as spill_file:
+            pixels = np.memmap(spill_file, dtype=np.uint8, mode="w+", shape=shape)
+        for top in range(0, height, self.SPILL_ROWS):
+            bottom = min(top + self.SPILL_ROWS, height)
+            pixels[top:bottom] = np.asarray(image.crop((0, top, width, bottom))).reshape((bottom - top,) + shape[1:])
+        pixels.flush()
+        return pixels
+
+    def _read_level0(self, box: tuple[int, int, int, int]) -> Image.Image:
+        if self._level0 is None:
+            return self._image.crop(box)
+        import numpy as np
+        left, top, right, bottom = box
+        return Image.fromarray(np.ascontiguousarray(self._level0[top:bottom, left:right]))
+
+    def _empty(self, size: tuple[int, int]) -> Image.Image:
+        return Image.new(self.mode, size)
+
+    def _get_tile(self, level: int, tx: int, ty: int) -> Image.Image:
+        key = (level, tx, ty)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                return tile
+
+        t = self.tile_size
+        level_w, level_h = self.level_sizes[level]
+        box = (tx * t, ty * t, min((tx + 1) * t, level_w), min((ty + 1) * t, level_h))
+        if level == 0:
+            tile = self._read_level0(box)
+        else:
+            # Junta os (até) quatro ladrilhos do nível anterior e reduz pela metade
+            prev_w, prev_h = self.level_sizes[level - 1]
+            source = self._empty((min(2 * (box[2] - box[0]), prev_w - 2 * box[0]),
+                                  min(2 * (box[3] - box[1]), prev_h - 2 * box[1])))
+            for dy in (0, 1):
+                for dx in (0, 1):
+                    sx, sy = 2 * tx + dx, 2 * ty + dy
+                    if sx * t < prev_w and sy * t < prev_h:
+                        source.paste(self._get_tile(level - 1, sx, sy), (dx * t, dy * t))
+            tile = source.reduce(2)
+
+        size = tile.width * tile.height * len(tile.getbands())
+        with self._lock:
+            if key not in self._tiles:
+                self._tiles[key] = tile
+                self._memory_used += size
+                while self._memory_used > self.memory_budget and len(self._tiles) > 1:
+                    _, evicted = self._tiles.popitem(last=False)
+                    self._memory_used -= evicted.width * evicted.height * len(evicted.getbands())
+        return tile
+
+    def level_for_scale(self, scale: float) -> int:
+        """Maior nível cuja redução (2^k) não ultrapassa 1/scale."""
+        if scale >= 1.0:
+            return 0
+        level = int(math.floor(math.log2(1.0 / scale)))
+        return max(0, min(level, len(self.level_sizes) - 1))
+
+    def read_region(self, box: tuple[float, float, float, float], out_size: tuple[int, int],
+                    resample=Image.Resampling.BILINEAR) -> Image.Image:
+        """
+        Lê a região `box` (em pixels do nível 0; pode exceder a imagem, que é
+        completada com pixels vazios) já redimensionada para `out_size`.
+        """
+        left, top, right, bottom = box
+        out_w, out_h = max(1, out_size[0]), max(1, out_size[1])
+        scale = min(out_w / max(right - left, 1e-9), out_h / max(bottom - top, 1e-9))
+        level = self.level_for_scale(scale)
+        factor = 2 ** level
+        level_w, level_h = self.level_sizes[level]
+
+        # Região no nível escolhido, com borda inteira para montar os ladrilhos
+        l, t_, r, b = left / factor, top / factor, right / factor, bottom / factor
+        x0, y0 = int(math.floor(l)), int(math.floor(t_))
+        x1, y1 = int(math.ceil(r)), int(math.ceil(b))
+        canvas = self._empty((max(1, x1 - x0), max(1, y1 - y0)))
+
+        t = self.tile_size
+        tx0, ty0 = max(x0, 0) // t, max(y0, 0) // t
+        tx1, ty1 = (min(x1, level_w) - 1) // t, (min(y1, level_h) - 1) // t
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                canvas.paste(self._get_tile(level, tx, ty), (tx * t - x0, ty * t - y0))
+
+        sub_box = (l - x0, t_ - y0, r - x0, b - y0)
+        if canvas.size == (out_w, out_h) and sub_box == (0, 0, out_w, out_h):
+            return canvas
+        return canvas.resize((out_w, out_h), resample, box=sub_box)
+
+    def clear_cache(self):
+        with self._lock:
+            self._tiles.clear()
+            self._memory_used = 0
@@ -0,0 +1,179 @@
+# core/local_server.py
+
+import json
+import secrets
+import logging
+from abc import ABCMeta, abstractmethod
+from urllib.parse import parse_qs
+from PySide6.QtCore import QObject, Slot
+from PySide6.QtNetwork import QHostAddress, QNetworkInterface, QTcpServer
+from PySide6.QtWebSockets import QWebSocketServer
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class _AbstractQObjectMeta(ABCMeta, type(QObject)):
+    """Permite métodos abstratos numa subclasse de QObject (o Shiboken tem metaclasse própria)."""
+
+class LocalServer(QObject, metaclass=_AbstractQObjectMeta):
+    """
+    Base dos servidores locais (controle remoto, transmissão da projeção):
+    HTTP e WebSocket na mesma porta, no laço de eventos do Qt, sem threads.
+    O QTcpServer aceita as conexões; as que pedem upgrade para WebSocket são
+    entregues intactas ao QWebSocketServer, e as demais são pedidos HTTP
+    simples, repassados a `_route`.
+
+    Subclasses implementam `_route(socket, method, path)` e, se aceitarem
+    WebSocket, `_on_websocket(client)`.
+
+    Pedidos (e upgrades para WebSocket) com um cabeçalho Origin que não seja
+    o próprio servidor recebem 403: uma página qualquer aberta no navegador
+    não consegue comandar o servidor. Fora do loopback, todo pedido também
+    precisa do token da sessão (`?token=` na URL ou cabeçalho X-Token), que
+    é registrado no log junto com o endereço.
+    """
+    MAX_REQUEST_BYTES = 16 * 1024
+    REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+               431: "Request Header Fields Too Large"}
+
+    def __init__(self, name: str, host: str = "127.0.0.1", port: int = 0, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.host = host
+        self.port = port
+        # Só exigido quando o servidor aceita conexões de outros aparelhos
+        self.token = None if QHostAddress(host).isLoopback() else secrets.token_urlsafe(16)
+        self._http_sockets = set()
+
+        self._tcp_server = QTcpServer(self)
+        self._tcp_server.newConnection.connect(self._on_new_connection)
+        self._ws_server = QWebSocketServer(name, QWebSocketServer.SslMode.NonSecureMode, self)
+        self._ws_server.newConnection.connect(self._on_new_websocket)
+
+    @property
+    def is_listening(self) -> bool:
+        return self._tcp_server.isListening()
+
+    def start(self) -> bool:
+        if not self._tcp_server.listen(QHostAddress(self.host), self.port):
+            logger.error(f"{self.name}: não foi possível escutar em {self.host}:{self.port} ({self._tcp_server.errorString()}).")
+            return False
+        self.port = self._tcp_server.serverPort() # Porta 0: escolhida pelo sistema
+        logger.info(f"{self.name} ativo em {self.url()}")
+        return True
+
+    def url(self, path: str = "/") -> str:
+        """Endereço de `path` no servidor, com o token da sessão quando ele é exigido."""
+        return f"http://{self.host}:{self.port}{path}" + (f"?token={self.token}" if self.token else "")
+
+    def _allowed_origins(self) -> set:
+        hosts = {self.host, "localhost"}
+        address = QHostAddress(self.host)
+        if address in (QHostAddress(QHostAddress.SpecialAddress.Any), QHostAddress(QHostAddress.SpecialAddress.AnyIPv4)):
+            # Escutando em todas as interfaces: a página pode ter sido aberta por qualquer endereço local
+            hosts.update(a.toString() for a in QNetworkInterface.allAddresses() if a.protocol() == QHostAddress.NetworkLayerProtocol.IPv4Protocol)
+        return {f"http://{host}:{self.port}" for host in hosts}
+
+    def _authorize(self, headers: dict, query: str) -> bool:
+        origin = headers.get("origin")
+        if origin is not None and origin not in self._allowed_origins():
+            return False
+        if self.token is None:
+            return True
+        supplied = parse_qs(query).get("token", [headers.get("x-token", "")])[0]
+        return secrets.compare_digest(supplied, self.token)
+
+    def stop(self):
+        self._tcp_server.close()
+        for socket in list(self._http_sockets):
+            socket.abort()
+        self._http_sockets.clear()
+
+    def respond(self, socket, status: int, body, content_type: str = "application/json"):
+        """Envia uma resposta HTTP completa (`body` str ou objeto JSON) e encerra a conexão."""
+        payload = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+        self.write_head(socket, status, content_type, {"Content-Length": str(len(payload)), "Connection": "close"})
+        socket.write(payload)
+        socket.disconnectFromHost()
+
+    def write_head(self, socket, status: int, content_type: str, extra_headers: dict | None = None):
+        headers = {"Content-Type": content_type, "Cache-Control": "no-store", **(extra_headers or {})}
+        lines = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}"] + [f"{key}: {value}" for key, value in headers.items()]
+        socket.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    @abstractmethod
+    def _route(self, socket, method: str, path: str):
+        """Atende um pedido HTTP já lido por inteiro (responder com respond() ou write_head())."""
+
+    def _on_websocket(self, client):
+        client.close()
+
+    def _on_socket_closed(self, socket):
+        """Chamado quando uma conexão HTTP termina, antes de o socket ser liberado."""
+
+    @Slot()
+    def _on_new_websocket(self):
+        while self._ws_server.hasPendingConnections():
+            self._on_websocket(self._ws_server.nextPendingConnection())
+
+    @Slot()
+    def _on_new_connection(self):
+        while self._tcp_server.hasPendingConnections():
+            socket = self._tcp_server.nextPendingConnection()
+            self._http_sockets.add(socket)
+            socket.readyRead.connect(lambda socket=socket: self._on_http_data(socket))
+            socket.disconnected.connect(lambda socket=socket: self._on_http_disconnected(socket))
+
+    def _on_http_disconnected(self, socket):
+        if socket in self._http_sockets:
+            self._http_sockets.discard(socket)
+            self._on_socket_closed(socket)
+            # Sem as conexões com lambdas, a destruição do socket não volta a chamar este objeto
+            socket.readyRead.disconnect()
+            socket.disconnected.disconnect()
+            socket.deleteLater()
+
+    def _on_http_data(self, socket):
+        # peek: um pedido de WebSocket precisa chegar intacto ao QWebSocketServer
+        data = bytes(socket.peek(self.MAX_REQUEST_BYTES))
+        header_end = data.find(b"\r\n\r\n")
+        if header_end == -1:
+            if len(data) >= self.MAX_REQUEST_BYTES:
+                self.respond(socket, 431, {"error": "cabeçalho muito grande"})
+            return
+        lines = data[:header_end].decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            self.respond(socket, 400, {"error": "pedido inválido"})
+            return
+        path, _, query = target.partition("?")
+        if not self._authorize(headers, query):
+            logger.warning(f"{self.name}: pedido recusado de {socket.peerAddress().toString()} (origem {headers.get('origin')}).")
+            socket.readAll()
+            self.respond(socket, 403, {"error": "acesso negado"})
+            return
+
+        if headers.get("upgrade", "").lower() == "websocket":
+            socket.readyRead.disconnect()
+            socket.disconnected.disconnect()
+            self._http_sockets.discard(socket)
+            self._ws_server.handleConnection(socket)
+            return
+
+        try:
+            body_length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            body_length = -1
+        if body_length < 0:
+            socket.readAll()
+            self.respond(socket, 400, {"error": "Content-Length inválido"})
+            return
+        if len(data) < header_end + 4 + body_length:
+            return
+        socket.read(header_end + 4 + body_length)
+        self._route(socket, method, path)
@@ -2,20 +2,22 @@
 import logging
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QScreen
+from utils.logger import RATE_LIMITED
 
 logger = logging.getLogger("ImageProjectorLogger")
 
 def get_available_screens() -> list[QScreen]:
     """Retorna uma lista de todos os monitores conectados (QScreen)."""
     screens = QApplication.screens()
-    logger.debug(f"Detectados {len(screens)} monitores.")
+    # Caminho quente (cada atualização de monitores): formatação adiada e limitada por ponto de chamada
+    logger.debug("Detectados %d monitores.", len(screens), extra=RATE_LIMITED)
     return screens
 
 def get_primary_screen() -> QScreen | None:
     """Retorna o monitor principal do sistema."""
     primary = QApplication.primaryScreen()
     if primary:
-        logger.debug(f"Monitor principal detectado: {primary.name()}")
+        logger.debug("Monitor principal detectado: %s", primary.name(), extra=RATE_LIMITED)
     else:
         logger.warning("Nenhum monitor principal encontrado.")
     return primary
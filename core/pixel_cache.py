@@ -0,0 +1,161 @@
+# core/pixel_cache.py
+
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+# Modos guardados como array (altura, largura, canais) de uint8
+_MODE_BANDS = {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+class PixelCache:
+    """
+    Cache em disco de pixels já decodificados, lidos de volta como arquivos
+    mapeados em memória (.npy). A chave é a identidade do arquivo de origem
+    (caminho, tamanho e data de modificação), então editar a imagem invalida a
+    entrada. Várias instâncias do programa podem compartilhar o mesmo diretório:
+    as páginas mapeadas vêm do cache de páginas do sistema operacional.
+
+    `store_async` grava numa thread própria: quem acabou de decodificar (a
+    thread da interface, na primeira visita a um slide) não espera pela escrita.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 4 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Tamanho do diretório mantido a cada gravação; None até a primeira varredura
+        self._total_bytes = None
+        # Thread das gravações em segundo plano (criada na primeira) e entradas na fila dela
+        self._writer = None
+        self._queued = set()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def default_dir() -> str:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "projetor_de_imagem", "pixels")
+
+    def _entry_path(self, file_path: str, mode: str) -> str | None:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        identity = f"{os.path.abspath(file_path)}|{st.st_size}|{st.st_mtime_ns}"
+        key = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}_{mode}.npy")
+
+    def load(self, file_path: str, mode: str | None = None) -> Image.Image | None:
+        """
+        Retorna a imagem apoiada diretamente no arquivo mapeado (somente leitura),
+        ou None se não houver entrada válida. Sem `mode`, aceita a entrada em
+        qualquer modo guardado (as imagens são armazenadas no modo nativo).
+        """
+        for mode in ([mode] if mode else _MODE_BANDS):
+            entry = self._entry_path(file_path, mode)
+            if entry is None:
+                return None
+            if os.path.exists(entry):
+                break
+        else:
+            return None
+        try:
+            import numpy as np # Só quando há cache: a importação fica fora da inicialização
+            pixels = np.load(entry, mmap_mode="r")
+            height, width = pixels.shape[:2]
+            image = Image.frombuffer(mode, (width, height), pixels, "raw", mode, 0, 1)
+            os.utime(entry) # Marca como usado recentemente para o descarte por tamanho
+            logger.debug(f"Pixels mapeados do cache para: {file_path}")
+            return image
+        except Exception:
+            logger.warning(f"Entrada de cache inválida, ignorando: {entry}", exc_info=True)
+            return None
+
+    def store(self, file_path: str, image: Image.Image) -> bool:
+        """Grava os pixels de `image` no cache (escrita atômica) e aplica o limite de tamanho."""
+        bands = _MODE_BANDS.get(image.mode)
+        entry = self._entry_path(file_path, image.mode)
+        if bands is None or entry is None:
+            return False
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            import numpy as np
+            shape = (image.height, image.width, bands) if bands > 1 else (image.height, image.width)
+            mapped = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=shape)
+            mapped[...] = np.asarray(image).reshape(shape)
+            mapped.flush()
+            del mapped
+            replaced = os.path.getsize(entry) if os.path.exists(entry) else 0
+            os.replace(tmp_path, entry)
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes += os.path.getsize(entry) - replaced
+        except Exception:
+            logger.warning(f"Falha ao gravar pixels no cache: {file_path}", exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def store_async(self, file_path: str, image: Image.Image):
+        """Agenda store() na thread de gravação; a mesma entrada não é enfileirada duas vezes."""
+        entry = self._entry_path(file_path, image.mode)
+        if entry is None or image.mode not in _MODE_BANDS:
+            return
+        with self._lock:
+            if entry in self._queued:
+                return
+            self._queued.add(entry)
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PixelCache")
+        self._writer.submit(self._store_queued, entry, file_path, image)
+
+    def _store_queued(self, entry: str, file_path: str, image: Image.Image):
+        try:
+            self.store(file_path, image)
+        finally:
+            with self._lock:
+                self._queued.discard(entry)
+
+    def shutdown(self):
+        """Descarta as gravações ainda na fila; a que estiver em andamento termina (a escrita é atômica)."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=False, cancel_futures=True)
+
+    def evict(self):
+        """
+        Remove as entradas usadas há mais tempo até o cache caber em `max_bytes`.
+        O diretório só é varrido quando o total mantido passa do limite (ou
+        ainda não é conhecido); a varredura também corrige o total, que pode
+        ter mudado por outras instâncias usando o mesmo diretório.
+        """
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".npy"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    # Em sistemas POSIX, quem já mapeou o arquivo continua com acesso às páginas
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
@@ -4,6 +4,7 @@ import json
 import logging
 from PySide6.QtCore import QObject, QRectF
 from core.canvas_state import CanvasState, DrawingStroke
+from utils.perf_monitor import perf
 
 logger = logging.getLogger("ImageProjectorLogger")
 
@@ -11,7 +12,9 @@ class PlaylistManager(QObject):
     """
     Gerencia o salvamento e carregamento de listas de reprodução (galerias).
     Uma playlist contém a lista de caminhos de imagem, seus nomes internos,
-    e o estado de cada imagem (rotação, brilho, anotações, etc.).
+    as anotações do apresentador e a página exibida (TIFF de várias páginas)
+    de cada imagem e o estado de cada imagem
+    (rotação, brilho, desenhos, etc.).
     """
     def __init__(self):
         super().__init__()
@@ -29,19 +32,7 @@ class PlaylistManager(QObject):
             state = data['canvas_state']
             
             # Serializa os desenhos
-            strokes_to_save = []
-            if state.strokes:
-                for stroke in state.strokes:
-                    points = []
-                    for i in range(stroke.path.elementCount()):
-                        el = stroke.path.elementAt(i)
-                        points.append({'x': el.x, 'y': el.y})
-                    
-                    strokes_to_save.append({
-                        'points': points,
-                        'color': stroke.color.name(),
-                        'thickness': stroke.thickness
-                    })
+            strokes_to_save = self._serialize_strokes(state.strokes)
 
             state_dict = {
                 'rotation': state.rotation,
@@ -51,12 +42,16 @@ class PlaylistManager(QObject):
                 'zoom_enabled': state.zoom_enabled,
                 'zoom_rect': [state.zoom_rect.x(), state.zoom_rect.y(), state.zoom_rect.width(), state.zoom_rect.height()],
                 'strokes': strokes_to_save,
+                # Traços das outras páginas (TIFF de várias páginas), por número da página
+                'page_strokes': {str(page): self._serialize_strokes(strokes) for page, strokes in state.page_strokes.items()},
                 'projection_aspect_ratio': state.projection_aspect_ratio
             }
             
             playlist_to_save.append({
                 'path': data['path'],
                 'name': data['name'],
+                'notes': data.get('notes', ''),
+                'page': data['handler'].page if data.get('handler') else 0,
                 'state': state_dict
             })
 
@@ -69,6 +64,7 @@ class PlaylistManager(QObject):
             logger.error(f"Falha ao salvar a playlist em {file_path}", exc_info=True)
             return False
 
+    @perf.timed("carregamento.playlist")
     def load_playlist(self, file_path: str):
         """
         Carrega uma playlist de um arquivo JSON.
@@ -100,25 +96,16 @@ class PlaylistManager(QObject):
                 state.projection_aspect_ratio = state_dict.get('projection_aspect_ratio', 16.0 / 9.0)
 
                 # Carrega os desenhos
-                loaded_strokes = state_dict.get('strokes', [])
-                from PySide6.QtGui import QPainterPath, QColor
-                from PySide6.QtCore import QPointF
-
-                for stroke_data in loaded_strokes:
-                    path = QPainterPath()
-                    points = stroke_data.get('points', [])
-                    if points:
-                        path.moveTo(QPointF(points[0]['x'], points[0]['y']))
-                        for i in range(1, len(points)):
-                            path.lineTo(QPointF(points[i]['x'], points[i]['y']))
-                    
-                    color = QColor(stroke_data.get('color', '#ff0000'))
-                    thickness = stroke_data.get('thickness', 5.0)
-                    state.strokes.append(DrawingStroke(path, color, thickness))
+                state.set_strokes(self._deserialize_strokes(state_dict.get('strokes', [])))
+                state.strokes_page = item.get('page', 0)
+                state.page_strokes = {int(page): self._deserialize_strokes(strokes)
+                                      for page, strokes in state_dict.get('page_strokes', {}).items()}
 
                 images_data.append({
                     'path': item['path'],
                     'name': item['name'],
+                    'notes': item.get('notes', ''),
+                    'page': item.get('page', 0),
                     'canvas_state': state
                 })
             
@@ -128,3 +115,38 @@ class PlaylistManager(QObject):
             logger.error(f"Falha ao carregar a playlist de {file_path}", exc_info=True)
             return []
 
+    @staticmethod
+    def _serialize_strokes(strokes: list) -> list:
+        strokes_to_save = []
+        for stroke in strokes:
+            points = []
+            for i in range(stroke.path.elementCount()):
+                el = stroke.path.elementAt(i)
+                points.append({'x': el.x, 'y': el.y})
+            
+            strokes_to_save.append({
+                'points': points,
+                'color': stroke.color.name(),
+                'thickness': stroke.thickness
+            })
+        return strokes_to_save
+
+    @staticmethod
+    def _deserialize_strokes(loaded_strokes: list) -> list:
+        from PySide6.QtGui import QPainterPath, QColor
+        from PySide6.QtCore import QPointF
+
+        strokes = []
+        for stroke_data in loaded_strokes:
+            path = QPainterPath()
+            points = stroke_data.get('points', [])
+            if points:
+                path.moveTo(QPointF(points[0]['x'], points[0]['y']))
+                for i in range(1, len(points)):
+                    path.lineTo(QPointF(points[i]['x'], points[i]['y']))
+            
+            color = QColor(stroke_data.get('color', '#ff0000'))
+            thickness = stroke_data.get('thickness', 5.0)
+            strokes.append(DrawingStroke(path, color, thickness))
+        return strokes
+
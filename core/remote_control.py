@@ -0,0 +1,226 @@
+# core/remote_control.py
+
+import json
+import time
+import logging
+from PySide6.QtCore import QPointF, QTimer, Qt, Signal, Slot
+from core.local_server import LocalServer
+from utils.html_generator import generate_remote_control_html
+from utils.perf_monitor import perf
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class RemoteControlServer(LocalServer):
+    """
+    Servidor local de controle remoto (HTTP e WebSocket, ver LocalServer).
+    O HTTP serve uma página de controle
+    e comandos avulsos (POST /api/next, /api/previous, /api/goto/<índice>,
+    /api/tool/<ferramenta>; GET /api/status); o WebSocket recebe os mesmos
+    comandos em JSON ({"cmd": "next"}, {"cmd": "goto", "index": 3}...) e o
+    fluxo de posições do laser ({"cmd": "laser", "x": 0.5, "y": 0.5, "t": ms}).
+
+    As posições do laser chegam em qualquer ritmo; só a mais recente de cada
+    quadro (LASER_FRAME_MS) é entregue por `laser_moved`, e a primeira após
+    uma pausa é entregue na hora. O atraso de cada posição aplicada é medido
+    da chegada ao servidor e, quando o cliente informa "t" (Date.now() no
+    navegador), desde o envio, e resumido no log a cada STATS_INTERVAL_S.
+    """
+    next_requested = Signal()
+    previous_requested = Signal()
+    goto_requested = Signal(int)
+    tool_requested = Signal(str)
+    laser_moved = Signal(object) # QPointF relativo (0-1) à projeção, ou None para esconder
+
+    TOOLS = ("none", "pen", "highlighter", "laser", "eraser")
+    LASER_FRAME_MS = 16
+    STATS_INTERVAL_S = 10
+    # Atrasos informados pelo cliente acima disto indicam relógios dessincronizados
+    MAX_CLIENT_LATENCY_MS = 10000
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, parent=None):
+        super().__init__("Controle remoto", host, port, parent)
+        self._status = {}
+        self._clients = set()
+
+        self._laser_pending = None # (posição, chegada, envio pelo cliente em ms ou None)
+        self._laser_applied_at = 0.0
+        self._laser_timer = QTimer(self)
+        self._laser_timer.setSingleShot(True)
+        self._laser_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._laser_timer.timeout.connect(self._apply_laser)
+        self._stats_timer = QTimer(self)
+        self._stats_timer.timeout.connect(self.log_stats)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.laser_received = 0
+        self.laser_applied = 0
+        self.queue_total_ms = 0.0
+        self.queue_max_ms = 0.0
+        self.client_latency_count = 0
+        self.client_latency_total_ms = 0.0
+        self.client_latency_max_ms = 0.0
+
+    def start(self) -> bool:
+        if not super().start():
+            return False
+        self._stats_timer.start(self.STATS_INTERVAL_S * 1000)
+        return True
+
+    def stop(self):
+        if not self.is_listening:
+            return
+        self._stats_timer.stop()
+        self._laser_timer.stop()
+        super().stop()
+        for client in list(self._clients):
+            client.close()
+        self._clients.clear()
+        self.log_stats()
+
+    def publish_status(self, status: dict):
+        """Atualiza o estado informado em /api/status e o envia aos clientes WebSocket."""
+        self._status = dict(status)
+        message = json.dumps({"type": "status", **self._status})
+        for client in self._clients:
+            client.sendTextMessage(message)
+
+    def stats(self) -> dict:
+        applied = self.laser_applied or 1
+        return {
+            "laser_received": self.laser_received,
+            "laser_applied": self.laser_applied,
+            "queue_avg_ms": self.queue_total_ms / applied,
+            "queue_max_ms": self.queue_max_ms,
+            "client_avg_ms": self.client_latency_total_ms / self.client_latency_count if self.client_latency_count else None,
+            "client_max_ms": self.client_latency_max_ms if self.client_latency_count else None,
+        }
+
+    @Slot()
+    def log_stats(self):
+        if not self.laser_received:
+            return
+        stats = self.stats()
+        message = (f"Laser remoto: {stats['laser_received']} posições recebidas, {stats['laser_applied']} aplicadas; "
+                   f"espera no servidor média {stats['queue_avg_ms']:.1f} ms (máx. {stats['queue_max_ms']:.1f} ms)")
+        if stats["client_avg_ms"] is not None:
+            message += f"; do envio à aplicação média {stats['client_avg_ms']:.1f} ms (máx. {stats['client_max_ms']:.1f} ms)"
+        logger.info(message + ".")
+        self._reset_stats()
+
+    # --- Comandos (comuns ao HTTP e ao WebSocket) ---
+
+    def _handle_command(self, command: dict) -> str | None:
+        """Executa um comando; retorna uma mensagem de erro, ou None se foi aceito."""
+        name = command.get("cmd")
+        if name == "laser":
+            self._queue_laser(command)
+        elif name == "next":
+            self.next_requested.emit()
+        elif name == "previous":
+            self.previous_requested.emit()
+        elif name == "goto":
+            try:
+                self.goto_requested.emit(int(command.get("index")))
+            except (TypeError, ValueError):
+                return "índice inválido"
+        elif name == "tool":
+            if command.get("name") not in self.TOOLS:
+                return f"ferramenta inválida (use {', '.join(self.TOOLS)})"
+            self.tool_requested.emit(command["name"])
+        else:
+            return f"comando desconhecido: {name}"
+        return None
+
+    def _queue_laser(self, command: dict):
+        received = time.perf_counter()
+        x, y = command.get("x"), command.get("y")
+        position = None
+        if x is not None and y is not None:
+            position = QPointF(min(1.0, max(0.0, float(x))), min(1.0, max(0.0, float(y))))
+        self.laser_received += 1
+        sent_at = command.get("t")
+        # Posições ainda não aplicadas são substituídas: só a mais recente chega à projeção
+        self._laser_pending = (position, received, float(sent_at) if sent_at is not None else None)
+        if not self._laser_timer.isActive():
+            wait_ms = self.LASER_FRAME_MS - (received - self._laser_applied_at) * 1000
+            self._laser_timer.start(max(0, round(wait_ms)))
+
+    @Slot()
+    def _apply_laser(self):
+        if self._laser_pending is None:
+            return
+        position, received, sent_at = self._laser_pending
+        self._laser_pending = None
+        self.laser_moved.emit(position)
+        self._laser_applied_at = now = time.perf_counter()
+
+        queue_ms = (now - received) * 1000
+        self.laser_applied += 1
+        self.queue_total_ms += queue_ms
+        self.queue_max_ms = max(self.queue_max_ms, queue_ms)
+        if sent_at is not None:
+            client_ms = time.time() * 1000 - sent_at
+            if 0 <= client_ms <= self.MAX_CLIENT_LATENCY_MS:
+                self.client_latency_count += 1
+                self.client_latency_total_ms += client_ms
+                self.client_latency_max_ms = max(self.client_latency_max_ms, client_ms)
+        if perf.enabled:
+            perf.record("controle_remoto.laser", now - received)
+
+    # --- WebSocket ---
+
+    def _on_websocket(self, client):
+        self._clients.add(client)
+        client.textMessageReceived.connect(lambda message, client=client: self._on_ws_message(client, message))
+        client.disconnected.connect(lambda client=client: self._on_ws_disconnected(client))
+        if self._status:
+            client.sendTextMessage(json.dumps({"type": "status", **self._status}))
+        logger.info(f"Controle remoto: cliente conectado de {client.peerAddress().toString()}.")
+
+    def _on_ws_message(self, client, message: str):
+        try:
+            command = json.loads(message)
+            if command.get("cmd") == "ping":
+                # O cliente mede a ida e volta com o próprio relógio
+                client.sendTextMessage(json.dumps({"type": "pong", "t": command.get("t")}))
+                return
+            error = self._handle_command(command)
+        except (ValueError, TypeError, AttributeError):
+            error = "mensagem inválida"
+        if error:
+            client.sendTextMessage(json.dumps({"type": "error", "message": error}))
+
+    def _on_ws_disconnected(self, client):
+        self._clients.discard(client)
+        client.textMessageReceived.disconnect()
+        client.disconnected.disconnect()
+        client.deleteLater()
+
+    # --- HTTP ---
+
+    def _route(self, socket, method: str, path: str):
+        if method == "GET" and path in ("/", "/index.html"):
+            self.respond(socket, 200, generate_remote_control_html(), "text/html; charset=utf-8")
+            return
+        if method == "GET" and path == "/api/status":
+            self.respond(socket, 200, self._status)
+            return
+
+        parts = path.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "api":
+            self.respond(socket, 404, {"error": "não encontrado"})
+            return
+        if method != "POST":
+            self.respond(socket, 405, {"error": "use POST para comandos"})
+            return
+        command = {"cmd": parts[1]}
+        if parts[1] == "goto" and len(parts) > 2:
+            command["index"] = parts[2]
+        elif parts[1] == "tool" and len(parts) > 2:
+            command["name"] = parts[2]
+        elif parts[1] == "laser":
+            self.respond(socket, 400, {"error": "o laser só é aceito pelo WebSocket"})
+            return
+        error = self._handle_command(command)
+        self.respond(socket, 400 if error else 200, {"error": error} if error else {"ok": True})
@@ -0,0 +1,133 @@
+# core/stroke_index.py
+
+import math
+from typing import TYPE_CHECKING
+from PySide6.QtCore import QRectF, QPointF
+from core.stroke_simplifier import path_to_points
+
+if TYPE_CHECKING:
+    import numpy as np
+
+class StrokeGridIndex:
+    """
+    Índice espacial em grade uniforme sobre as caixas delimitadoras dos traços
+    (em coordenadas normalizadas 0-1). Cada traço é registrado nas células que
+    sua caixa cobre, então consultas por ponto ou retângulo só examinam os
+    traços próximos em vez de percorrer toda a lista.
+    """
+    def __init__(self, cells_per_side: int = 32):
+        self.cells_per_side = cells_per_side
+        self._cells = {}
+        # id(traço) -> (traço, caixa, ordem de inserção, pontos)
+        self._entries = {}
+        self._next_order = 0
+        # Maior espessura já indexada (limite superior usado para expandir regiões sujas)
+        self.max_thickness = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell_range(self, rect: QRectF):
+        n = self.cells_per_side
+        x0 = min(max(int(math.floor(rect.left() * n)), 0), n - 1)
+        x1 = min(max(int(math.floor(rect.right() * n)), 0), n - 1)
+        y0 = min(max(int(math.floor(rect.top() * n)), 0), n - 1)
+        y1 = min(max(int(math.floor(rect.bottom() * n)), 0), n - 1)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
+
+    def insert(self, stroke, order: float | None = None):
+        """
+        Registra um traço. `order` define sua posição na ordem de desenho; por
+        padrão o traço vai para o topo (usado ao reinserir um traço desfeito).
+        """
+        key = id(stroke)
+        if key in self._entries:
+            return
+        if order is None:
+            order = self._next_order
+        bbox = stroke.path.controlPointRect()
+        self._entries[key] = (stroke, bbox, order, path_to_points(stroke.path))
+        self._next_order = max(self._next_order, int(order) + 1)
+        self.max_thickness = max(self.max_thickness, stroke.thickness)
+        for cell in self._cell_range(bbox):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, stroke):
+        entry = self._entries.pop(id(stroke), None)
+        if entry is None:
+            return
+        for cell in self._cell_range(entry[1]):
+            bucket = self._cells.get(cell)
+            if bucket:
+                bucket.discard(id(stroke))
+                if not bucket:
+                    del self._cells[cell]
+
+    def rebuild(self, strokes: list):
+        self.clear()
+        for stroke in strokes:
+            self.insert(stroke)
+
+    def clear(self):
+        self._cells.clear()
+        self._entries.clear()
+        self._next_order = 0
+        self.max_thickness = 0.0
+
+    def order_of(self, stroke):
+        entry = self._entries.get(id(stroke))
+        return entry[2] if entry else None
+
+    def bounding_rect(self, stroke) -> QRectF:
+        entry = self._entries.get(id(stroke))
+        return QRectF(entry[1]) if entry else stroke.path.controlPointRect()
+
+    def query_rect(self, rect: QRectF, margin: float = 0.0) -> list:
+        """
+        Retorna os traços cuja caixa intersecta `rect` (expandido por `margin`),
+        na ordem em que foram desenhados.
+        """
+        query = rect.adjusted(-margin, -margin, margin, margin)
+        candidates = set()
+        for cell in self._cell_range(query):
+            candidates.update(self._cells.get(cell, ()))
+        hits = []
+        for key in candidates:
+            stroke, bbox, order, _ = self._entries[key]
+            # Caixas degeneradas (traços retos) têm largura ou altura zero
+            if (bbox.left() <= query.right() and bbox.right() >= query.left() and
+                    bbox.top() <= query.bottom() and bbox.bottom() >= query.top()):
+                hits.append((order, stroke))
+        hits.sort(key=lambda item: item[0])
+        return [stroke for _, stroke in hits]
+
+    def hit_test(self, pos: QPointF, radius: float):
+        """
+        Retorna o traço mais recente que passa a até `radius` de `pos`, ou None.
+        Apenas os traços das células vizinhas são verificados com a distância
+        exata aos segmentos.
+        """
+        import numpy as np
+        query = QRectF(pos.x() - radius, pos.y() - radius, 2 * radius, 2 * radius)
+        point = np.array([pos.x(), pos.y()])
+        for stroke in reversed(self.query_rect(query)):
+            points = self._entries[id(stroke)][3]
+            if _distance_to_polyline(point, points) <= radius:
+                return stroke
+        return None
+
+def _distance_to_polyline(point: "np.ndarray", points: "np.ndarray") -> float:
+    import numpy as np
+    if len(points) == 0:
+        return math.inf
+    if len(points) == 1:
+        return float(np.hypot(*(points[0] - point)))
+    starts, ends = points[:-1], points[1:]
+    segments = ends - starts
+    lengths_sq = np.einsum('ij,ij->i', segments, segments)
+    t = np.einsum('ij,ij->i', point - starts, segments) / np.where(lengths_sq == 0, 1, lengths_sq)
+    t = np.clip(t, 0.0, 1.0)
+    closest = starts + segments * t[:, None]
+    return float(np.min(np.hypot(closest[:, 0] - point[0], closest[:, 1] - point[1])))
@@ -0,0 +1,97 @@
+# core/stroke_simplifier.py
+
+from typing import TYPE_CHECKING
+from PySide6.QtGui import QPainterPath
+from PySide6.QtCore import QPointF
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# O NumPy é importado dentro das funções: só o primeiro traço confirmado paga a importação,
+# e não a inicialização do programa
+
+def simplify_points(points: "np.ndarray", tolerance: float) -> "np.ndarray":
+    """
+    Simplifica uma polilinha com o algoritmo de Ramer–Douglas–Peucker.
+    As distâncias de cada trecho são calculadas de forma vetorizada com NumPy,
+    e a recursão é substituída por uma pilha para suportar traços longos.
+
+    Args:
+        points (np.ndarray): Array (N, 2) com os pontos do traço.
+        tolerance (float): Distância máxima permitida entre o traço original e o simplificado.
+
+    Returns:
+        np.ndarray: Os pontos mantidos, na ordem original.
+    """
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return points
+
+    import numpy as np
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        seg_len = np.hypot(segment[0], segment[1])
+        if seg_len == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            # Distância perpendicular de cada ponto à reta start-end (produto vetorial)
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / seg_len
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return points[keep]
+
+def path_to_points(path: QPainterPath) -> "np.ndarray":
+    """Extrai os pontos (coordenadas normalizadas) de um QPainterPath como array (N, 2)."""
+    import numpy as np
+    count = path.elementCount()
+    points = np.empty((count, 2), dtype=np.float64)
+    for i in range(count):
+        el = path.elementAt(i)
+        points[i, 0] = el.x
+        points[i, 1] = el.y
+    return points
+
+def points_to_path(points) -> QPainterPath:
+    """Constrói uma polilinha QPainterPath a partir de uma sequência de pontos (x, y)."""
+    path = QPainterPath()
+    if len(points):
+        path.moveTo(QPointF(float(points[0][0]), float(points[0][1])))
+        for x, y in points[1:]:
+            path.lineTo(QPointF(float(x), float(y)))
+    return path
+
+def simplify_path(path: QPainterPath, tolerance_px: float, reference_size: tuple[int, int]) -> QPainterPath:
+    """
+    Simplifica um traço em coordenadas normalizadas (0-1) usando uma tolerância
+    em pixels de saída.
+
+    Args:
+        path (QPainterPath): O traço a simplificar.
+        tolerance_px (float): A tolerância, em pixels da saída.
+        reference_size (tuple): Largura e altura (px) ocupadas pela imagem na saída.
+
+    Returns:
+        QPainterPath: O traço simplificado (ou o original, se nada puder ser removido).
+    """
+    points = path_to_points(path)
+    if len(points) < 3 or tolerance_px <= 0:
+        return path
+
+    # Converte para pixels de saída para que a tolerância seja isotrópica
+    import numpy as np
+    scale = np.array(reference_size, dtype=np.float64)
+    simplified = simplify_points(points * scale, tolerance_px) / scale
+    if len(simplified) == len(points):
+        return path
+    return points_to_path(simplified)
@@ -0,0 +1,85 @@
+# core/text_fit.py
+
+"""
+Ajuste de texto ao maior tamanho de fonte que cabe numa área, medido com
+QFontMetrics (mesmo resultado que o QPainter usará ao desenhar). Equivale à
+busca binária que a página HTML das anotações fazia no DOM, sem navegador.
+
+Os resultados ficam em cache por (texto, tamanho da área, família), então
+reexibir uma anotação, ou preparar a de um slide vizinho antes da troca,
+não mede o texto de novo. layout_text entrega o texto já quebrado em linhas,
+para ser desenhado sem refazer a quebra a cada pintura. Requer uma
+QGuiApplication (fontes do sistema).
+"""
+
+import math
+from functools import lru_cache
+from PySide6 import QtGui
+from PySide6.QtCore import Qt, QPointF, QRect
+from PySide6.QtGui import QFont, QFontMetrics, QFontMetricsF, QTextLayout, QTextOption
+
+# Centralizado e com quebra de linha nas palavras; usados na medição e no desenho
+TEXT_FLAGS = int(Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap)
+
+MIN_PIXEL_SIZE = 10
+MAX_PIXEL_SIZE = 400
+
+def make_font(family: str, pixel_size: int) -> QFont:
+    font = QFont(family)
+    font.setPixelSize(pixel_size)
+    return font
+
+def might_be_rich_text(text: str) -> bool:
+    """Qt.mightBeRichText (no PySide6, só o namespace Qt do QtGui a expõe)."""
+    return QtGui.Qt.mightBeRichText(text)
+
+def layout_text(text: str, family: str, pixel_size: int, width: int) -> tuple[QTextLayout, float]:
+    """
+    `text` quebrado em palavras em linhas de até `width` pixels, centralizadas:
+    o mesmo resultado de QPainter.drawText com TEXT_FLAGS, que refaz essa
+    quebra a cada chamada. Retorna o layout, desenhado com QTextLayout.draw,
+    e a altura do texto (para a centralização vertical).
+    """
+    font = make_font(family, pixel_size)
+    # Como no drawText: a quebra de linha do texto vira separador de linha do layout
+    layout = QTextLayout(text.replace("\n", "\u2028"), font)
+    option = QTextOption(Qt.AlignmentFlag.AlignLeft)
+    option.setWrapMode(QTextOption.WrapMode.WordWrap)
+    layout.setTextOption(option)
+    leading = QFontMetricsF(font).leading()
+    height = -leading
+    layout.beginLayout()
+    while True:
+        line = layout.createLine()
+        if not line.isValid():
+            break
+        line.setLineWidth(width)
+        # Posições do drawText: cada linha em pixel inteiro e centralizada pelo avanço do texto
+        height = math.ceil(height + leading)
+        line.setPosition(QPointF((width - line.horizontalAdvance()) / 2, height))
+        height += line.ascent() + line.descent()
+    layout.endLayout()
+    return layout, max(height, 0.0)
+
+@lru_cache(maxsize=256)
+def fit_font_pixel_size(text: str, width: int, height: int, family: str,
+                        min_size: int = MIN_PIXEL_SIZE, max_size: int = MAX_PIXEL_SIZE) -> int:
+    """
+    Maior tamanho de fonte (em pixels) com que `text`, quebrado em palavras,
+    cabe em width x height. Retorna `min_size` se nem ele couber.
+    """
+    if not text or width <= 0 or height <= 0:
+        return min_size
+    area = QRect(0, 0, width, height)
+    best = min_size
+    low, high = min_size, max_size
+    while low <= high:
+        size = (low + high) // 2
+        bounds = QFontMetrics(make_font(family, size)).boundingRect(area, TEXT_FLAGS, text)
+        # Palavras mais largas que a área transbordam a largura e também reprovam o tamanho
+        if bounds.width() <= width and bounds.height() <= height:
+            best = size
+            low = size + 1
+        else:
+            high = size - 1
+    return best
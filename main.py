@@ -1,28 +1,156 @@
 # main.py
 
+from utils.startup_timer import startup # Primeiro import: origem da medição de inicialização
+
 import sys
+import json
+import argparse
 import logging
 from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt
 from ui.main_window import MainWindow
 from utils.logger import setup_logger # Importa nossa função de setup
+from core.pixel_cache import PixelCache
+from core.image_decoder import DECODERS, set_format_decoder
+from utils.profiler import Profiler, TracingApplication
+from utils.stall_watchdog import StallWatchdog
+
+startup.mark("importações")
+
+def decoder_choice(value: str) -> tuple[str, str]:
+    """Valida um --decoder FORMATO=BACKEND, retornando (formato, backend)."""
+    extension, _, name = value.partition("=")
+    if not extension or name not in DECODERS:
+        raise argparse.ArgumentTypeError(f"use FORMATO=BACKEND, com BACKEND entre: {', '.join(DECODERS)}")
+    return extension, name
+
+def frame_size(value: str) -> tuple[int, int]:
+    """Valida um tamanho LxA (ex.: 1280x720), retornando (largura, altura)."""
+    width, _, height = value.lower().partition("x")
+    try:
+        size = int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError("use LARGURAxALTURA, ex.: 1280x720")
+    if min(size) <= 0:
+        raise argparse.ArgumentTypeError("largura e altura devem ser positivas")
+    return size
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Projetor de Imagens")
+    parser.add_argument("--pixel-cache", nargs="?", const=PixelCache.default_dir(), default=None, metavar="DIR",
+                        help="Guarda os pixels decodificados em disco (mapeados em memória) para reabrir galerias instantaneamente.")
+    parser.add_argument("--pixel-cache-size", type=float, default=4.0, metavar="GB",
+                        help="Tamanho máximo do cache de pixels, em GB (padrão: 4).")
+    parser.add_argument("--decoder", action="append", type=decoder_choice, default=[], metavar="FORMATO=BACKEND",
+                        help=f"Decodificador de um formato, ex.: png=qt (backends: {', '.join(DECODERS)}). Pode ser repetido.")
+    parser.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                        help="Captura a sessão desde o início (trace Chrome em DIR, gravado ao sair). F4 liga/desliga durante o uso; "
+                             "sem esta opção, as capturas do F4 não medem o despacho de eventos Qt.")
+    parser.add_argument("--profile-cprofile", action="store_true", help="Inclui um perfil cProfile (.prof) na captura.")
+    parser.add_argument("--profile-tracemalloc", action="store_true", help="Inclui um snapshot de memória do tracemalloc na captura.")
+    parser.add_argument("--stall-threshold", type=float, default=250, metavar="MS",
+                        help="Registra travamentos da interface acima deste tempo, com a pilha da thread principal (0 desliga; padrão: 250).")
+    parser.add_argument("--remote-port", type=int, default=0, metavar="PORTA",
+                        help="Ativa o controle remoto (HTTP e WebSocket) nesta porta (0 desliga; padrão: 0).")
+    parser.add_argument("--remote-host", default="127.0.0.1", metavar="ENDEREÇO",
+                        help="Endereço do controle remoto (padrão: 127.0.0.1; use 0.0.0.0 para aceitar outros aparelhos da rede, com o token registrado no log).")
+    parser.add_argument("--stream-port", type=int, default=0, metavar="PORTA",
+                        help="Transmite a projeção (MJPEG em /stream.mjpg e JPEG por WebSocket) nesta porta (0 desliga; padrão: 0).")
+    parser.add_argument("--stream-host", default="127.0.0.1", metavar="ENDEREÇO",
+                        help="Endereço da transmissão (padrão: 127.0.0.1; use 0.0.0.0 para outros aparelhos da rede, com o token registrado no log).")
+    parser.add_argument("--stream-size", type=frame_size, default="1280x720", metavar="LxA",
+                        help="Tamanho máximo do quadro transmitido (padrão: 1280x720).")
+    parser.add_argument("--stream-quality", type=int, default=75, metavar="Q", help="Qualidade JPEG da transmissão, 1-100 (padrão: 75).")
+    parser.add_argument("--stream-fps", type=float, default=15, metavar="FPS",
+                        help="Limite de quadros por segundo da transmissão (padrão: 15).")
+    parser.add_argument("--stream-laser-fps", type=float, default=5, metavar="FPS",
+                        help="Limite quando só o laser se move (padrão: 5).")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Abre a janela, imprime o relatório de inicialização em JSON e encerra (código 1 se exceder o orçamento).")
+    parser.add_argument("--startup-budget", type=float, default=2000, metavar="MS",
+                        help="Orçamento do início do programa até a janela aparecer (padrão: 2000).")
+    # Argumentos desconhecidos ficam para o Qt (ex.: -platform)
+    return parser.parse_known_args()
 
 if __name__ == "__main__":
+    args, qt_args = parse_args()
+
     # 1. Configura o logger assim que o programa inicia
     app_logger = setup_logger()
+    startup.mark("logger")
     
     try:
         app_logger.info("=====================================")
         app_logger.info("      Iniciando Nova Sessão")
         app_logger.info("=====================================")
 
-        app = QApplication(sys.argv)
+        # Entrega todos os eventos de mouse/caneta sem agrupamento, para a captura dos traços ao vivo
+        QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressHighFrequencyEvents, False)
+        # O QtWebEngine das notas em HTML é importado só quando necessário, com a aplicação já criada:
+        # o compartilhamento de contextos OpenGL que ele exige precisa ser pedido antes
+        QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+        # A medição de cada evento despachado (notify) só é instalada quando há captura pedida
+        app_class = TracingApplication if args.profile else QApplication
+        app = app_class(sys.argv[:1] + qt_args)
         
         # Adiciona um estilo básico para melhorar a aparência
         app.setStyle("Fusion")
+        startup.mark("QApplication")
+
+        for extension, name in args.decoder:
+            set_format_decoder(extension, name)
+            app_logger.info(f"Decodificador '{name}' selecionado para o formato '{extension}'.")
+
+        pixel_cache = None
+        if args.pixel_cache:
+            pixel_cache = PixelCache(args.pixel_cache, int(args.pixel_cache_size * 1024 ** 3))
+            app.aboutToQuit.connect(pixel_cache.shutdown)
+            app_logger.info(f"Cache de pixels ativo em: {args.pixel_cache}")
+
+        profiler = Profiler(args.profile or "profiles", args.profile_cprofile, args.profile_tracemalloc)
+        if args.profile:
+            profiler.start()
+            app.aboutToQuit.connect(profiler.stop)
 
         # 2. Passa o logger para a janela principal
-        main_win = MainWindow(logger=app_logger)
+        main_win = MainWindow(logger=app_logger, pixel_cache=pixel_cache, profiler=profiler)
+        startup.mark("janela principal")
         main_win.show()
+
+        def on_window_shown():
+            startup.log_report()
+            over_budget = startup.total_ms() > args.startup_budget
+            if over_budget:
+                app_logger.warning(f"Inicialização acima do orçamento: {startup.total_ms():.0f} ms > {args.startup_budget:.0f} ms.")
+            if args.measure_startup:
+                print(json.dumps({**startup.report(), "budget_ms": args.startup_budget, "over_budget": over_budget}, indent=4, ensure_ascii=False))
+                app.exit(1 if over_budget else 0)
+                return
+
+            # Subsistemas adiados: só começam depois que a janela já está na tela
+            if args.stall_threshold > 0:
+                watchdog = StallWatchdog(threshold=args.stall_threshold / 1000, parent=app)
+                watchdog.start()
+                app.aboutToQuit.connect(watchdog.stop)
+                app.aboutToQuit.connect(watchdog.log_summary)
+            if args.remote_port:
+                from core.remote_control import RemoteControlServer
+                remote = RemoteControlServer(args.remote_host, args.remote_port, parent=app)
+                if remote.start():
+                    main_win.connect_remote_control(remote)
+                    app.aboutToQuit.connect(remote.stop)
+            if args.stream_port:
+                from PySide6.QtCore import QSize
+                from ui.frame_streamer import FrameStreamServer
+                streamer = FrameStreamServer(args.stream_host, args.stream_port, QSize(*args.stream_size),
+                                             args.stream_quality, args.stream_fps, args.stream_laser_fps, parent=app)
+                if streamer.start():
+                    main_win.connect_frame_streamer(streamer)
+                    app.aboutToQuit.connect(streamer.stop)
+
+        # A primeira pintura marca o fim da inicialização; o restante roda fora do paintEvent
+        main_win.first_painted.connect(lambda: startup.mark("janela exibida"))
+        main_win.first_painted.connect(on_window_shown, Qt.ConnectionType.QueuedConnection)
         
         sys.exit(app.exec())
 
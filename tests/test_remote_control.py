@@ -0,0 +1,100 @@
+# tests/test_remote_control.py
+
+import json
+import time
+import threading
+import urllib.request
+import urllib.error
+import pytest
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QAbstractSocket
+from PySide6.QtWebSockets import QWebSocket
+from core.remote_control import RemoteControlServer
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+@pytest.fixture
+def server(app):
+    server = RemoteControlServer("127.0.0.1", 0)
+    assert server.start()
+    yield server
+    server.stop()
+
+def spin(app, seconds: float, until=None):
+    """Processa eventos do Qt por até `seconds` (ou até `until()` ser verdadeiro)."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end and not (until and until()):
+        app.processEvents()
+        time.sleep(0.001)
+
+def http(app, server, method: str, path: str, headers: dict | None = None) -> int:
+    """Faz o pedido numa thread enquanto o laço de eventos atende o servidor; retorna o status."""
+    result = {}
+    def request():
+        req = urllib.request.Request(f"http://127.0.0.1:{server.port}{path}", method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                result["status"] = response.status
+        except urllib.error.HTTPError as error:
+            result["status"] = error.code
+    thread = threading.Thread(target=request)
+    thread.start()
+    spin(app, 5, until=lambda: not thread.is_alive())
+    thread.join()
+    return result["status"]
+
+def test_post_next(app, server):
+    received = []
+    server.next_requested.connect(lambda: received.append("next"))
+    assert http(app, server, "POST", "/api/next") == 200
+    assert received == ["next"]
+    assert http(app, server, "GET", "/api/next") == 405
+
+def test_malformed_content_length(app, server):
+    assert http(app, server, "POST", "/api/next", {"Content-Length": "abc"}) == 400
+
+def test_foreign_origin_is_rejected(app, server):
+    received = []
+    server.next_requested.connect(lambda: received.append("next"))
+    assert http(app, server, "POST", "/api/next", {"Origin": "http://example.com"}) == 403
+    assert http(app, server, "POST", "/api/next", {"Origin": f"http://127.0.0.1:{server.port}"}) == 200
+    assert received == ["next"]
+
+def test_token_required_outside_loopback(app):
+    server = RemoteControlServer("0.0.0.0", 0)
+    assert server.start()
+    try:
+        assert server.token
+        assert http(app, server, "POST", "/api/next") == 403
+        assert http(app, server, "POST", f"/api/next?token={server.token}") == 200
+        assert http(app, server, "POST", "/api/next", {"X-Token": server.token}) == 200
+    finally:
+        server.stop()
+
+def test_laser_burst_is_coalesced(app, server):
+    positions = []
+    server.laser_moved.connect(positions.append)
+    client = QWebSocket()
+    client.open(QUrl(f"ws://127.0.0.1:{server.port}/ws"))
+    spin(app, 2, until=lambda: server._clients and client.state() == QAbstractSocket.SocketState.ConnectedState)
+    assert server._clients
+
+    burst = 200
+    for i in range(burst):
+        client.sendTextMessage(json.dumps({"cmd": "laser", "x": i / burst, "y": 0.5, "t": time.time() * 1000}))
+    spin(app, 2, until=lambda: server.laser_received == burst and not server._laser_timer.isActive())
+
+    assert server.laser_received == burst
+    # Uma rajada chega em poucos quadros: só a posição mais recente de cada um é aplicada
+    assert 1 <= len(positions) < burst // 4
+    assert positions[-1].x() == pytest.approx((burst - 1) / burst)
+    assert server.stats()["laser_applied"] == len(positions)
+    client.close()
+
+def test_foreign_origin_websocket_is_rejected(app, server):
+    client = QWebSocket("http://example.com")
+    client.open(QUrl(f"ws://127.0.0.1:{server.port}/ws"))
+    spin(app, 1)
+    assert not server._clients
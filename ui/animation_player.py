@@ -0,0 +1,103 @@
+# ui/animation_player.py
+
+import time
+import logging
+from PySide6.QtCore import QObject, QTimer, Qt, Signal, Slot
+from core.frame_stream import FrameStream
+from utils.perf_monitor import perf
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class AnimationPlayer(QObject):
+    """
+    Reprodução de uma animação na projeção. Os quadros vêm de uma FrameStream
+    (decodificados numa thread, poucos à frente) e são entregues pelo sinal
+    `frame_ready` no instante previsto pela soma das durações desde o início,
+    e não "duração após o último quadro": atrasos não se acumulam. Se a
+    exibição atrasar mais que um quadro, os quadros vencidos são descartados
+    para voltar ao ritmo; se a decodificação não acompanhar, espera-se por ela.
+    """
+    frame_ready = Signal(object, int) # (imagem PIL, índice do quadro)
+
+    # Nova verificação quando o próximo quadro ainda não foi decodificado
+    UNDERRUN_RETRY_MS = 5
+
+    def __init__(self, file_path: str, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._stream = None
+        self._pending = None
+        self._due = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._on_timer)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.underruns = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+
+    def start(self):
+        self.stop()
+        self._reset_stats()
+        self._stream = FrameStream(self.file_path)
+        self._pending = None
+        self._due = time.perf_counter()
+        self.timer.start(0)
+
+    def stop(self):
+        if self._stream is None:
+            return
+        self.timer.stop()
+        self._stream.close()
+        self._stream = None
+        self._pending = None
+        if self.frames_shown:
+            logger.info("Animação %s: %d quadros exibidos, %d descartados, %d esperas pela decodificação, "
+                        "atraso médio %.1f ms (máx. %.1f ms).", self.file_path, self.frames_shown,
+                        self.frames_dropped, self.underruns, self.total_lateness / self.frames_shown * 1000,
+                        self.max_lateness * 1000)
+
+    @Slot()
+    def _on_timer(self):
+        now = time.perf_counter()
+        if self._pending is None:
+            self._pending = self._stream.next_frame()
+            if self._pending is None:
+                if not self._stream.is_alive:
+                    # Nenhum quadro virá mais (arquivo ilegível): a projeção fica no último exibido
+                    logger.warning(f"Animação {self.file_path}: a decodificação terminou; reprodução interrompida.")
+                    self.stop()
+                    return
+                # A decodificação ficou para trás: o relógio é reiniciado quando o quadro chegar
+                self.underruns += 1
+                self._due = max(self._due, now)
+                self.timer.start(self.UNDERRUN_RETRY_MS)
+                return
+
+        shown = None
+        lateness = 0.0
+        # Entrega o quadro mais recente já vencido; os vencidos antes dele são descartados
+        while self._pending is not None and self._due <= now:
+            if shown is not None:
+                self.frames_dropped += 1
+            shown = self._pending
+            lateness = now - self._due
+            self._due += shown[2] / 1000
+            self._pending = self._stream.next_frame()
+
+        if shown is not None:
+            index, image, _ = shown
+            self.frames_shown += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            if perf.enabled:
+                perf.record("animação.atraso", lateness)
+            self.frame_ready.emit(image, index)
+
+        delay = (self._due - time.perf_counter()) * 1000
+        self.timer.start(max(0, round(delay)))
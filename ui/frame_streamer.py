@@ -0,0 +1,229 @@
+# ui/frame_streamer.py
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, QTimer, Qt, Signal, Slot
+from PySide6.QtGui import QImage
+from core.local_server import LocalServer
+from utils.perf_monitor import perf
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class FrameStreamServer(LocalServer):
+    """
+    Transmissão da projeção pela rede local (salas extras, gravadores): o
+    quadro da ProjectionWindow, com traços e laser, em JPEG, como MJPEG em
+    GET /stream.mjpg, quadro avulso em GET /frame.jpg ou mensagens binárias
+    no WebSocket.
+
+    A captura só acontece depois que a janela terminou de pintar na tela, e
+    a codificação roda numa thread própria: a projeção local não espera pela
+    transmissão. Um quadro só é capturado se algo mudou desde o último e há
+    alguém assistindo; mudanças só do laser são limitadas a `laser_fps`, as
+    demais a `max_fps`. Enquanto um quadro é codificado, as mudanças seguintes
+    viram uma única captura ao final. Clientes lentos perdem quadros em vez
+    de acumulá-los.
+    """
+    _encoded = Signal(object, float) # (JPEG, instante da captura)
+
+    BOUNDARY = "quadro"
+    # Clientes com mais que isto ainda por enviar pulam o próximo quadro
+    MAX_PENDING_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, size: QSize = QSize(1280, 720),
+                 quality: int = 75, max_fps: float = 15, laser_fps: float = 5, parent=None):
+        """
+        Args:
+            size (QSize): Tamanho máximo do quadro transmitido (mantida a proporção da projeção).
+            quality (int): Qualidade JPEG, de 1 a 100.
+            max_fps (float): Limite de quadros por segundo quando a imagem muda.
+            laser_fps (float): Limite de quadros por segundo quando só o laser se move.
+        """
+        super().__init__("Transmissão da projeção", host, port, parent)
+        self.size = QSize(size)
+        self.quality = max(1, min(100, quality))
+        self.max_fps = max_fps
+        self.laser_fps = laser_fps
+        self.window = None
+        self._mjpeg_clients = set()
+        self._ws_clients = set()
+        self._latest_jpeg = None
+        self._captured_version = None
+        self._last_capture = 0.0
+        self._encoding = False
+        self._capture_again = False
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FrameStream")
+        self._encoded.connect(self._on_encoded)
+
+        self._capture_timer = QTimer(self)
+        self._capture_timer.setSingleShot(True)
+        self._capture_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._capture_timer.timeout.connect(self._capture)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.frames_encoded = 0
+        self.encode_total_ms = 0.0
+        self.capture_total_ms = 0.0
+        self.frames_skipped = 0
+
+    def stop(self):
+        if not self.is_listening:
+            return
+        self._capture_timer.stop()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for client in list(self._ws_clients):
+            client.close()
+        self._ws_clients.clear()
+        self._mjpeg_clients.clear()
+        super().stop()
+        self.log_stats()
+
+    def log_stats(self):
+        if not self.frames_encoded:
+            return
+        logger.info(f"Transmissão: {self.frames_encoded} quadros; captura média {self.capture_total_ms / self.frames_encoded:.1f} ms, "
+                    f"codificação média {self.encode_total_ms / self.frames_encoded:.1f} ms (fora da thread da interface), "
+                    f"{self.frames_skipped} envios pulados por clientes lentos.")
+
+    # --- Janela transmitida ---
+
+    def attach(self, window):
+        """Passa a transmitir `window` (a projeção principal); a anterior deixa de ser acompanhada."""
+        self.detach()
+        self.window = window
+        self._captured_version = None
+        window.frame_painted.connect(self._on_frame_painted)
+        window.destroyed.connect(self._on_window_destroyed)
+        self._on_frame_painted()
+
+    def detach(self):
+        if self.window is not None:
+            self.window.frame_painted.disconnect(self._on_frame_painted)
+            self.window.destroyed.disconnect(self._on_window_destroyed)
+        self._on_window_destroyed()
+
+    @Slot()
+    def _on_window_destroyed(self):
+        # As conexões de uma janela destruída já foram desfeitas pelo Qt
+        self.window = None
+        self._capture_timer.stop()
+
+    def _has_viewers(self) -> bool:
+        return bool(self._mjpeg_clients or self._ws_clients)
+
+    @Slot()
+    def _on_frame_painted(self):
+        if self.window is None or not self._has_viewers():
+            return
+        content_changed = self.window.content_version != self._captured_version
+        fps = self.max_fps if content_changed else self.laser_fps
+        if fps <= 0:
+            return
+        delay_ms = max(0.0, (self._last_capture + 1 / fps - time.perf_counter()) * 1000)
+        # Fora da pintura atual: a captura nunca atrasa o quadro exibido na tela
+        if not self._capture_timer.isActive() or delay_ms < self._capture_timer.remainingTime():
+            self._capture_timer.start(round(delay_ms))
+
+    @Slot()
+    def _capture(self):
+        if self.window is None or not self._has_viewers():
+            return
+        if self._encoding:
+            self._capture_again = True
+            return
+        started = time.perf_counter()
+        self._captured_version = self.window.content_version
+        self._last_capture = started
+        size = self.window.size()
+        if size.width() > self.size.width() or size.height() > self.size.height():
+            size = size.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio)
+        image = self.window.capture_frame(size)
+        self.capture_total_ms += (time.perf_counter() - started) * 1000
+        self._encoding = True
+        future = self._pool.submit(self._encode, image, self.quality)
+        future.add_done_callback(lambda f: self._encoded.emit(f.result() if not f.cancelled() and not f.exception() else None, started))
+
+    @staticmethod
+    def _encode(image: QImage, quality: int):
+        """Codifica o quadro em JPEG (roda na thread da transmissão)."""
+        started = time.perf_counter()
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "JPG", quality)
+        return bytes(data), time.perf_counter() - started
+
+    @Slot(object, float)
+    def _on_encoded(self, result, captured_at: float):
+        self._encoding = False
+        if result is None:
+            logger.error("Transmissão: falha ao codificar o quadro.")
+            return
+        jpeg, encode_seconds = result
+        self._latest_jpeg = jpeg
+        self.frames_encoded += 1
+        self.encode_total_ms += encode_seconds * 1000
+        if perf.enabled:
+            perf.record("transmissão.codificação", encode_seconds)
+            perf.record("transmissão.quadro", time.perf_counter() - captured_at)
+        self._broadcast(jpeg)
+        if self._capture_again:
+            self._capture_again = False
+            self._on_frame_painted()
+
+    def _broadcast(self, jpeg: bytes):
+        part = (f"--{self.BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n").encode("latin-1") + jpeg + b"\r\n"
+        for socket in list(self._mjpeg_clients):
+            if socket.bytesToWrite() > self.MAX_PENDING_BYTES:
+                self.frames_skipped += 1
+                continue
+            socket.write(part)
+        for client in list(self._ws_clients):
+            if client.bytesToWrite() > self.MAX_PENDING_BYTES:
+                self.frames_skipped += 1
+                continue
+            client.sendBinaryMessage(QByteArray(jpeg))
+
+    # --- HTTP e WebSocket ---
+
+    def _route(self, socket, method: str, path: str):
+        if method != "GET":
+            self.respond(socket, 405, {"error": "use GET"})
+        elif path in ("/", "/index.html"):
+            stream = "/stream.mjpg" + (f"?token={self.token}" if self.token else "")
+            self.respond(socket, 200, '<!DOCTYPE html><html><body style="margin:0;background:#000">'
+                                      f'<img src="{stream}" style="width:100vw;height:100vh;object-fit:contain">'
+                                      '</body></html>', "text/html; charset=utf-8")
+        elif path == "/frame.jpg":
+            if self._latest_jpeg is None:
+                self.respond(socket, 404, {"error": "nenhum quadro transmitido ainda"})
+            else:
+                self.write_head(socket, 200, "image/jpeg", {"Content-Length": str(len(self._latest_jpeg)), "Connection": "close"})
+                socket.write(self._latest_jpeg)
+                socket.disconnectFromHost()
+        elif path == "/stream.mjpg":
+            self.write_head(socket, 200, f"multipart/x-mixed-replace; boundary={self.BOUNDARY}", {"Connection": "close"})
+            self._add_viewer(self._mjpeg_clients, socket)
+        else:
+            self.respond(socket, 404, {"error": "não encontrado"})
+
+    def _on_socket_closed(self, socket):
+        self._mjpeg_clients.discard(socket)
+
+    def _on_websocket(self, client):
+        self._add_viewer(self._ws_clients, client)
+        client.disconnected.connect(lambda client=client: self._on_ws_disconnected(client))
+
+    def _on_ws_disconnected(self, client):
+        self._ws_clients.discard(client)
+        client.disconnected.disconnect()
+        client.deleteLater()
+
+    def _add_viewer(self, clients: set, client):
+        clients.add(client)
+        logger.info(f"Transmissão: espectador conectado de {client.peerAddress().toString()}.")
+        # O novo espectador recebe um quadro atual, mesmo que nada mude
+        self._captured_version = None
+        self._on_frame_painted()
@@ -1,31 +1,70 @@
 # ui/main_window.py
 
 import os
-import numpy as np
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                                QComboBox, QApplication, QFileDialog, QSlider, QLabel,
-                               QListWidgetItem, QColorDialog, QLineEdit, QGroupBox,
+                               QListWidgetItem, QColorDialog, QLineEdit, QPlainTextEdit, QGroupBox,
                                QSplitter, QCheckBox, QToolButton, QButtonGroup,
-                               QAbstractButton, QMessageBox)
-from PySide6.QtCore import Slot, Qt, QSize, QRectF, QPointF
-from PySide6.QtGui import QIcon, QScreen, QTransform
+                               QAbstractButton, QMessageBox, QSpinBox)
+from PySide6.QtCore import Signal, Slot, Qt, QSize, QRectF, QPointF, QTimer
+from PySide6.QtGui import QIcon, QScreen, QColor
 
 from core.monitor_manager import get_available_screens, get_secondary_screen
 from core.image_handler import ImageHandler
 from core.canvas_state import CanvasState
+from core.history import STROKES
 from core.playlist_manager import PlaylistManager
-from ui.projection_window import ProjectionWindow
+from core.geometry import calculate_crop_info
+from ui.projection_window import ProjectionWindow, ScaledFrameCache, LaserClock
+from ui.show_cache import ShowCache
+from ui.animation_player import AnimationPlayer
 from ui.notes_window import NotesWindow
 from ui.widgets.zoom_preview import ZoomPreview
 from ui.widgets.thumbnail_list import ThumbnailListWidget
+from ui.widgets.perf_hud import PerfHud
+from utils.perf_monitor import perf
+from utils.profiler import Profiler
 
 class MainWindow(QMainWindow):
-    def __init__(self, logger):
+    # Emitido uma única vez, quando a janela é pintada pela primeira vez (fim da inicialização)
+    first_painted = Signal()
+
+    # Transições da apresentação automática e suas durações (ms)
+    SLIDESHOW_TRANSITIONS = {
+        "Esmaecer": 600,
+        "Corte": 0,
+    }
+
+    def __init__(self, logger, pixel_cache=None, profiler=None):
         super().__init__()
         self.logger = logger
+        self.pixel_cache = pixel_cache
+        self.profiler = profiler or Profiler()
         self.setWindowTitle("Visor de Imagens - Painel do Operador")
         
         self.projection_win = None
+        # Saídas extras (ex.: monitores de retorno) que espelham a projeção principal
+        self.mirror_wins = []
+        # Compartilhados pelas saídas: o mesmo quadro é redimensionado uma vez por resolução
+        self.scaled_frames = ScaledFrameCache()
+        self.laser_clock = LaserClock(self)
+        # Quadro da projeção já renderizado para o próximo slide da apresentação
+        self._next_frame = None
+        # Quadros da galeria inteira preparados para a tela de projeção ("Preparar Apresentação")
+        self.show_cache = None
+        # Reprodução do GIF/WebP animado projetado no momento
+        self.animation_player = None
+        # (handler, primeiro quadro) da animação em curso, restaurado quando ela para
+        self._animation_first_frame = None
+        # Servidor de controle remoto (opcional, conectado por connect_remote_control)
+        self.remote_control = None
+        # Transmissão da projeção pela rede (opcional, conectada por connect_frame_streamer)
+        self.frame_streamer = None
+        # Enquanto True, _refresh_all_displays não faz nada (várias alterações viram uma renderização)
+        self._refresh_suspended = False
+        self._painted = False
+        self.slideshow_timer = QTimer(self)
+        self.slideshow_timer.setSingleShot(True)
         self.notes_win = None
         self.images_data = [] 
         self.current_image_index = -1
@@ -38,6 +77,9 @@ class MainWindow(QMainWindow):
 
         self.setup_ui_elements()
         self.connect_signals()
+
+        # Sobreposição de desempenho (F3), só na janela do operador
+        self.perf_hud = PerfHud(self)
         
         primary_screen = QApplication.primaryScreen()
         if primary_screen: self.move(primary_screen.geometry().topLeft())
@@ -100,13 +142,17 @@ class MainWindow(QMainWindow):
         self.pen_button = QToolButton(); self.pen_button.setText("Caneta"); self.pen_button.setCheckable(True)
         self.highlighter_button = QToolButton(); self.highlighter_button.setText("Marca-Texto"); self.highlighter_button.setCheckable(True)
         self.laser_button = QToolButton(); self.laser_button.setText("Laser"); self.laser_button.setCheckable(True)
+        self.eraser_button = QToolButton(); self.eraser_button.setText("Borracha"); self.eraser_button.setCheckable(True)
         self.clear_drawings_button = QPushButton("Limpar Desenhos")
+        self.undo_button = QPushButton("Desfazer")
+        self.redo_button = QPushButton("Refazer")
         self.tool_button_group = QButtonGroup(self)
         self.tool_button_group.setExclusive(True)
         self.tool_button_group.addButton(self.pen_button)
         self.tool_button_group.addButton(self.highlighter_button)
         self.tool_button_group.addButton(self.laser_button)
-        drawing_toolbar.addWidget(self.pen_button); drawing_toolbar.addWidget(self.highlighter_button); drawing_toolbar.addWidget(self.laser_button); drawing_toolbar.addStretch(); drawing_toolbar.addWidget(self.clear_drawings_button)
+        self.tool_button_group.addButton(self.eraser_button)
+        drawing_toolbar.addWidget(self.pen_button); drawing_toolbar.addWidget(self.highlighter_button); drawing_toolbar.addWidget(self.laser_button); drawing_toolbar.addWidget(self.eraser_button); drawing_toolbar.addStretch(); drawing_toolbar.addWidget(self.undo_button); drawing_toolbar.addWidget(self.redo_button); drawing_toolbar.addWidget(self.clear_drawings_button)
 
         # Gerenciamento de Imagem
         management_layout = QHBoxLayout()
@@ -115,6 +161,15 @@ class MainWindow(QMainWindow):
         self.sort_by_name_button = QPushButton("Ordenar por Nome")
         self.sort_by_original_name_button = QPushButton("Ordenar por Original")
         management_layout.addWidget(self.rename_edit); management_layout.addWidget(self.sort_by_name_button); management_layout.addWidget(self.sort_by_original_name_button)
+        # Páginas de um TIFF de várias páginas (visível só para esses arquivos)
+        self.page_widget = QWidget()
+        page_layout = QHBoxLayout(self.page_widget); page_layout.setContentsMargins(0, 0, 0, 0)
+        self.prev_page_button = QToolButton(); self.prev_page_button.setText("◀")
+        self.next_page_button = QToolButton(); self.next_page_button.setText("▶")
+        self.page_label = QLabel()
+        page_layout.addWidget(QLabel("Página:")); page_layout.addWidget(self.prev_page_button); page_layout.addWidget(self.page_label); page_layout.addWidget(self.next_page_button)
+        self.page_widget.setVisible(False)
+        management_layout.addWidget(self.page_widget)
 
         # Controles de Exibição
         display_controls_layout = QHBoxLayout()
@@ -147,8 +202,23 @@ class MainWindow(QMainWindow):
         self.monitor_combo = QComboBox()
         self.project_button = QPushButton("▶️ Projetar")
         self.project_button.setObjectName("ProjectButton")
-        projection_controls_layout.addWidget(self.monitor_combo); projection_controls_layout.addWidget(self.project_button)
+        self.mirror_button = QPushButton("➕ Espelhar")
+        self.mirror_button.setToolTip("Abre mais uma saída da projeção no monitor selecionado")
+        projection_controls_layout.addWidget(self.monitor_combo); projection_controls_layout.addWidget(self.project_button); projection_controls_layout.addWidget(self.mirror_button)
         
+        # Apresentação Automática
+        slideshow_controls_layout = QHBoxLayout()
+        slideshow_controls_layout.addWidget(QLabel("Apresentação:"))
+        self.slideshow_interval_spin = QSpinBox()
+        self.slideshow_interval_spin.setRange(1, 3600); self.slideshow_interval_spin.setValue(10); self.slideshow_interval_spin.setSuffix(" s")
+        self.slideshow_transition_combo = QComboBox()
+        self.slideshow_transition_combo.addItems(self.SLIDESHOW_TRANSITIONS.keys())
+        self.slideshow_button = QPushButton("▶️ Apresentação Automática")
+        self.slideshow_button.setCheckable(True)
+        self.prepare_show_button = QPushButton("🎬 Preparar Apresentação")
+        self.prepare_show_button.setToolTip("Renderiza todas as imagens para o monitor de projeção selecionado antes da apresentação")
+        slideshow_controls_layout.addWidget(self.slideshow_interval_spin); slideshow_controls_layout.addWidget(self.slideshow_transition_combo); slideshow_controls_layout.addWidget(self.slideshow_button); slideshow_controls_layout.addStretch(); slideshow_controls_layout.addWidget(self.prepare_show_button)
+
         # Controles de Anotações
         notes_controls_layout = QHBoxLayout()
         notes_controls_layout.addWidget(QLabel("Monitor de Anotações:"))
@@ -158,6 +228,14 @@ class MainWindow(QMainWindow):
         notes_controls_layout.addWidget(self.notes_monitor_combo)
         notes_controls_layout.addWidget(self.toggle_notes_button)
 
+        # Anotações do apresentador para a imagem atual
+        notes_edit_layout = QHBoxLayout()
+        notes_edit_layout.addWidget(QLabel("Anotações da Imagem:"))
+        self.notes_edit = QPlainTextEdit()
+        self.notes_edit.setPlaceholderText("Texto exibido no monitor de anotações quando esta imagem estiver projetada")
+        self.notes_edit.setMaximumHeight(80)
+        notes_edit_layout.addWidget(self.notes_edit)
+
         # Adiciona tudo ao layout principal
         self.main_layout.addLayout(top_bar_layout)
         self.main_layout.addWidget(main_splitter, stretch=1)
@@ -166,24 +244,35 @@ class MainWindow(QMainWindow):
         self.main_layout.addLayout(display_controls_layout)
         self.main_layout.addWidget(self.adjustments_group)
         self.main_layout.addLayout(projection_controls_layout)
+        self.main_layout.addLayout(slideshow_controls_layout)
         self.main_layout.addLayout(notes_controls_layout)
+        self.main_layout.addLayout(notes_edit_layout)
         
         self.update_controls_state()
 
     def connect_signals(self):
         self.project_button.clicked.connect(self.toggle_projection)
+        self.mirror_button.clicked.connect(self.add_mirror_projection)
+        self.slideshow_button.toggled.connect(self.toggle_slideshow)
+        self.slideshow_timer.timeout.connect(self.advance_slideshow)
+        self.prepare_show_button.clicked.connect(self.prepare_show)
         self.tool_button_group.buttonClicked.connect(self.on_tool_button_clicked)
         self.clear_drawings_button.clicked.connect(self.clear_current_drawings)
+        self.undo_button.clicked.connect(self.undo_last_action)
+        self.redo_button.clicked.connect(self.redo_last_action)
         self.browse_folder_button.clicked.connect(self.browse_folder)
         self.thumbnail_list.itemClicked.connect(self.on_thumbnail_clicked)
         self.prev_button.clicked.connect(self.previous_image)
         self.next_button.clicked.connect(self.next_image)
+        self.prev_page_button.clicked.connect(self.previous_page)
+        self.next_page_button.clicked.connect(self.next_page)
         self.rotate_button.clicked.connect(self.rotate_image)
         self.rotate_lupa_button.clicked.connect(self.rotate_lupa)
         self.brightness_slider.valueChanged.connect(self.change_brightness)
         self.display_mode_combo.currentTextChanged.connect(self.on_display_mode_changed)
         self.bg_color_button.clicked.connect(self.select_background_color)
         self.rename_edit.editingFinished.connect(self.rename_current_image)
+        self.notes_edit.textChanged.connect(self.on_notes_text_changed)
         self.sort_by_name_button.clicked.connect(lambda: self.sort_images_by('name'))
         self.sort_by_original_name_button.clicked.connect(lambda: self.sort_images_by('path'))
         self.auto_contrast_button.clicked.connect(self.apply_auto_contrast)
@@ -225,16 +314,20 @@ class MainWindow(QMainWindow):
                 return
             self.images_data = []
             self.current_image_index = -1
-            for item_data in loaded_data:
-                if os.path.exists(item_data['path']):
-                    item_data['handler'] = ImageHandler(item_data['path'])
-                    self.images_data.append(item_data)
-                else:
-                    self.logger.warning(f"Imagem não encontrada, pulando: {item_data['path']}")
+            self._discard_show_cache()
+            with perf.measure("carregamento.galeria"):
+                for item_data in loaded_data:
+                    if os.path.exists(item_data['path']):
+                        item_data['handler'] = ImageHandler(item_data['path'], self.pixel_cache)
+                        if item_data.get('page'): item_data['handler'].set_page(item_data['page'])
+                        self.images_data.append(item_data)
+                    else:
+                        self.logger.warning(f"Imagem não encontrada, pulando: {item_data['path']}")
             self.repopulate_thumbnail_list()
             self.update_controls_state()
             if self.images_data: self.load_image_by_index(0)
 
+    @perf.timed("carregamento.miniaturas")
     def repopulate_thumbnail_list(self):
         current_selection_path = None
         if 0 <= self.current_image_index < len(self.images_data):
@@ -273,12 +366,14 @@ class MainWindow(QMainWindow):
         if folder_path:
             self.images_data = []
             self.current_image_index = -1
-            supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tiff')
+            self._discard_show_cache()
+            supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.gif', '.tif', '.tiff')
             filenames = sorted(os.listdir(folder_path))
-            for filename in filenames:
-                if filename.lower().endswith(supported_formats):
-                    full_path = os.path.join(folder_path, filename)
-                    self.images_data.append({'path': full_path, 'name': filename, 'handler': ImageHandler(full_path), 'canvas_state': CanvasState()})
+            with perf.measure("carregamento.pasta"):
+                for filename in filenames:
+                    if filename.lower().endswith(supported_formats):
+                        full_path = os.path.join(folder_path, filename)
+                        self.images_data.append({'path': full_path, 'name': filename, 'notes': '', 'handler': ImageHandler(full_path, self.pixel_cache), 'canvas_state': CanvasState()})
             self.repopulate_thumbnail_list()
             self.update_controls_state()
             if self.images_data: self.load_image_by_index(0)
@@ -288,41 +383,223 @@ class MainWindow(QMainWindow):
             return self.images_data[self.current_image_index]['canvas_state']
         return None
 
+    @perf.timed("refresh_all_displays")
     def _refresh_all_displays(self):
-        if self.current_image_index == -1: return
+        if self.current_image_index == -1 or self._refresh_suspended: return
         state = self._get_current_state()
+        # Desfazer/refazer: _on_history_replayed atualiza só o que mudou
+        if state.is_replaying_history: return
+
+        self._refresh_preview_pixmap(state)
+        self.redraw_current_thumbnail()
+        self.update_projection()
+        self._update_history_buttons()
+
+    def _refresh_preview_pixmap(self, state: CanvasState):
         handler = self.images_data[self.current_image_index]['handler']
-        
-        base_pixmap_for_preview = handler.get_processed_pixmap_for_preview(state)
+        # A pré-visualização nunca precisa de mais pixels que o monitor do operador
+        preview_screen = self.zoom_preview_widget.screen()
+        preview_size = preview_screen.size() if preview_screen else None
+        base_pixmap_for_preview = handler.get_processed_pixmap_for_preview(state, preview_size)
         if base_pixmap_for_preview:
-            self.zoom_preview_widget.set_canvas_state(state, base_pixmap_for_preview)
-        
-        self.redraw_current_thumbnail()
+            self.zoom_preview_widget.set_canvas_state(state, base_pixmap_for_preview, state.rotation)
+
+    @Slot(object)
+    def _on_history_replayed(self, changed: set):
+        """
+        Depois de desfazer/refazer, refaz só as etapas que dependem do que mudou:
+        traços e lupa são pintados pela própria pré-visualização sobre a imagem
+        já processada, e a miniatura só depende da rotação.
+        """
+        if self.current_image_index == -1: return
+        state = self._get_current_state()
+        if changed & {'rotation', 'brightness', 'contrast_applied'}:
+            self._refresh_preview_pixmap(state)
+        else:
+            self.zoom_preview_widget.update()
+        if 'rotation' in changed:
+            self.redraw_current_thumbnail()
+        if changed - {STROKES}:
+            self._sync_controls_with_state(state)
         self.update_projection()
+        self._update_history_buttons()
+
+    def _projection_outputs(self) -> list:
+        """Janelas que exibem a projeção: a principal seguida das espelhadas."""
+        if self.projection_win is None: return []
+        return [self.projection_win] + self.mirror_wins
 
     @Slot()
     def _update_laser_only(self):
         self.zoom_preview_widget.update()
-        if self.projection_win: self.projection_win.update()
+        for output in self._projection_outputs(): output.update()
+
+    def _render_projection_frame(self, index: int, output_size: QSize):
+        """Renderiza o quadro da projeção da imagem `index`; retorna (pixmap, ink_transform, ink_scale, rotation)."""
+        item_data = self.images_data[index]
+        state, handler = item_data['canvas_state'], item_data['handler']
+        crop_info = calculate_crop_info(state, handler.image_size) if state.zoom_enabled and handler.image_size else None
+        final_pixmap = handler.get_processed_pixmap_for_projection(state, crop_info, output_size)
+        ink_transform = handler.get_projection_transform(state, crop_info, output_size)
+        ink_scale = handler.get_projection_ink_scale(state, crop_info, output_size)
+        rotation = handler.get_projection_rotation(state, crop_info)
+        return final_pixmap, ink_transform, ink_scale, rotation
+
+    def _frame_key(self, index: int, output_size: QSize):
+        """Identifica um quadro renderizado: muda com a imagem, a versão do estado e o tamanho de saída."""
+        item_data = self.images_data[index]
+        return (item_data['path'], item_data['handler'].page, item_data['handler'].source_version,
+                id(item_data['canvas_state']), item_data['canvas_state'].revision,
+                output_size.width(), output_size.height())
+
+    def _projection_output_size(self, outputs: list) -> QSize:
+        # Um único quadro, grande o bastante para todas as saídas; cada janela só o redimensiona
+        return QSize(max(o.width() for o in outputs), max(o.height() for o in outputs))
 
     def update_projection(self):
-        if self.current_image_index == -1 or self.projection_win is None: return
+        outputs = self._projection_outputs()
+        if self.current_image_index == -1 or not outputs: return
         state = self._get_current_state()
-        handler = self.images_data[self.current_image_index]['handler']
-        
-        crop_info = self._calculate_crop_info(state, handler) if state.zoom_enabled else None
-        
-        final_pixmap = handler.get_processed_pixmap_for_projection(state, crop_info)
-        self.projection_win.update_display(final_pixmap, state)
 
-    def load_image_by_index(self, index):
+        # Quadro de "Preparar Apresentação": as saídas do tamanho dele só o copiam
+        # (durante uma animação, o quadro preparado é só o primeiro)
+        animating = self.animation_player is not None
+        if self.show_cache: self.show_cache.set_current(self.images_data[self.current_image_index])
+        frame = self.show_cache.frame(self.images_data[self.current_image_index]) if self.show_cache and not animating else None
+        if frame is not None:
+            pixmap = self.show_cache.pixmap(frame)
+            for output in outputs:
+                if output.size() == self.show_cache.size:
+                    output.show_prerendered(pixmap, state, frame.ink_transform, frame.frame_size, frame.draw_rect, frame.ink_scale)
+            outputs = [output for output in outputs if output.size() != self.show_cache.size]
+            if not outputs: return
+
+        output_size = self._projection_output_size(outputs)
+        key = self._frame_key(self.current_image_index, output_size)
+        if self._next_frame is not None and self._next_frame[0] == key:
+            final_pixmap, ink_transform, ink_scale, rotation = self._next_frame[1]
+        else:
+            final_pixmap, ink_transform, ink_scale, rotation = self._render_projection_frame(self.current_image_index, output_size)
+        for output in outputs:
+            output.update_display(final_pixmap, state, ink_transform, rotation, ink_scale)
+
+    @Slot()
+    def prerender_next_frame(self):
+        """Renderiza (e escala para cada saída) o quadro do próximo slide da apresentação."""
+        outputs = self._projection_outputs()
+        if not self.slideshow_button.isChecked() or not outputs or not self.images_data: return
+        index = (self.current_image_index + 1) % len(self.images_data)
+        # O que load_image_by_index ajustaria no estado é ajustado antes, para o quadro continuar válido
+        next_state = self.images_data[index]['canvas_state']
+        selected_screen = self.monitor_combo.currentData()
+        if isinstance(selected_screen, QScreen): self._apply_projection_screen(next_state, selected_screen)
+        frame = self.show_cache.frame(self.images_data[index]) if self.show_cache else None
+        if frame is not None:
+            # Já preparado: basta deixar o QPixmap pronto
+            self.show_cache.pixmap(frame)
+            outputs = [output for output in outputs if output.size() != self.show_cache.size]
+            if not outputs: return
+        output_size = self._projection_output_size(outputs)
+        key = self._frame_key(index, output_size)
+        if self._next_frame is None or self._next_frame[0] != key:
+            with perf.measure("apresentação.pré-renderização"):
+                self._next_frame = (key, self._render_projection_frame(index, output_size))
+        final_pixmap, _, _, rotation = self._next_frame[1]
+        for output in outputs:
+            output.prepare_frame(final_pixmap, self.images_data[index]['canvas_state'], rotation)
+
+    @Slot()
+    def prepare_show(self):
+        if not self.images_data: return
+        selected_screen = self.monitor_combo.currentData()
+        if not isinstance(selected_screen, QScreen):
+            QMessageBox.warning(self, "Nenhum Monitor", "Nenhum monitor de projeção selecionado.")
+            return
+        size = self.projection_win.size() if self.projection_win else selected_screen.size()
+        background = self.projection_win.background_color if self.projection_win else QColor("#000000")
+        if self.show_cache is None or self.show_cache.size != size:
+            self._discard_show_cache()
+            self.show_cache = ShowCache(size, background, self.pixel_cache, parent=self)
+            self.show_cache.progress.connect(lambda done, total: self.statusBar().showMessage(f"Preparando apresentação: {done}/{total}"))
+            self.show_cache.finished.connect(self.on_show_prepared)
+        # Cada estado já recebe os ajustes do monitor que load_image_by_index faria, para os quadros continuarem válidos
+        for item_data in self.images_data:
+            self._apply_projection_screen(item_data['canvas_state'], selected_screen)
+        self.show_cache.prepare(self.images_data)
+
+    @Slot(float)
+    def on_show_prepared(self, seconds):
+        megabytes = self.show_cache.memory_bytes() / (1024 * 1024)
+        self.statusBar().showMessage(f"Apresentação preparada em {seconds:.1f} s ({megabytes:.0f} MB).", 10000)
+        self.update_projection()
+
+    def _discard_show_cache(self):
+        if self.show_cache is not None:
+            self.show_cache.shutdown()
+            self.show_cache.deleteLater()
+            self.show_cache = None
+
+    @Slot(bool)
+    def toggle_slideshow(self, checked):
+        if not checked:
+            self.slideshow_timer.stop()
+            self._next_frame = None
+            self.slideshow_button.setText("▶️ Apresentação Automática")
+            return
+        if self.projection_win is None or not self.images_data:
+            QMessageBox.warning(self, "Apresentação", "Inicie a projeção antes da apresentação automática.")
+            self.slideshow_button.setChecked(False)
+            return
+        self.logger.info(f"Apresentação automática iniciada ({self.slideshow_interval_spin.value()} s por imagem, "
+                         f"transição '{self.slideshow_transition_combo.currentText()}').")
+        self.slideshow_button.setText("⏹️ Parar Apresentação")
+        self._schedule_slideshow(0)
+
+    def _schedule_slideshow(self, transition_ms: int):
+        """Reinicia a contagem até o próximo slide e pré-renderiza esse slide depois da transição atual."""
+        self.slideshow_timer.start(self.slideshow_interval_spin.value() * 1000)
+        QTimer.singleShot(transition_ms + 50, self.prerender_next_frame)
+
+    @Slot()
+    def advance_slideshow(self):
+        if not self.images_data or self.projection_win is None:
+            self.slideshow_button.setChecked(False)
+            return
+        transition_ms = self.SLIDESHOW_TRANSITIONS.get(self.slideshow_transition_combo.currentText(), 0)
+        for output in self._projection_outputs():
+            output.start_transition(transition_ms)
+        # load_image_by_index reinicia a contagem (também vale para a navegação manual)
+        self.load_image_by_index((self.current_image_index + 1) % len(self.images_data), transition_ms)
+
+    @Slot(QPointF, QPointF)
+    def _on_live_stroke_extended(self, p1, p2):
+        # A pré-visualização repinta o próprio segmento; aqui só o levamos à projeção
+        for output in self._projection_outputs(): output.draw_live_segment(p1, p2)
+        # A simplificação ao confirmar o traço usa a escala da imagem exibida (zoom, corte e
+        # bordas incluídos), e não o tamanho da tela de projeção
+        extent = self.projection_win.image_pixel_extent() if self.projection_win else None
+        state = self._get_current_state()
+        if extent and state: state.stroke_reference_size = extent
+
+    @Slot()
+    def _on_live_stroke_finished(self):
+        for output in self._projection_outputs(): output.clear_live_ink()
+
+    @perf.timed("carregamento.imagem")
+    def load_image_by_index(self, index, transition_ms: int = 0):
         if not (0 <= index < len(self.images_data)): return
         
         if self.current_canvas_state:
             try:
                 self.current_canvas_state.state_changed.disconnect(self._refresh_all_displays)
+                self.current_canvas_state.history_replayed.disconnect(self._on_history_replayed)
                 self.current_canvas_state.laser_position_changed.disconnect(self._update_laser_only)
+                self.current_canvas_state.live_stroke_extended.disconnect(self._on_live_stroke_extended)
+                self.current_canvas_state.live_stroke_finished.disconnect(self._on_live_stroke_finished)
             except RuntimeError: pass
+        if 0 <= self.current_image_index < len(self.images_data) and self.current_image_index != index:
+            # Só o slide exibido guarda a região da projeção já processada
+            self.images_data[self.current_image_index]['handler'].release_projection_base()
 
         self.current_image_index = index
         self.thumbnail_list.setCurrentRow(index)
@@ -332,48 +609,215 @@ class MainWindow(QMainWindow):
         
         if self.current_canvas_state:
             self.current_canvas_state.state_changed.connect(self._refresh_all_displays)
+            self.current_canvas_state.history_replayed.connect(self._on_history_replayed)
             self.current_canvas_state.laser_position_changed.connect(self._update_laser_only)
+            self.current_canvas_state.live_stroke_extended.connect(self._on_live_stroke_extended)
+            self.current_canvas_state.live_stroke_finished.connect(self._on_live_stroke_finished)
         
-        self.on_monitor_changed()
+        # Os ajustes abaixo alteram o estado várias vezes; as telas são renderizadas uma vez, no final
+        self._refresh_suspended = True
+        try:
+            self._load_controls_for_index(index, state)
+        finally:
+            self._refresh_suspended = False
+        self._refresh_all_displays()
+        self._update_animation()
+        self._publish_remote_status()
+
+        if self.slideshow_button.isChecked():
+            self._schedule_slideshow(transition_ms)
+
+    def connect_remote_control(self, server):
+        """Liga os comandos do controle remoto à navegação, às ferramentas e ao laser."""
+        self.remote_control = server
+        server.next_requested.connect(self.next_image)
+        server.previous_requested.connect(self.previous_image)
+        server.goto_requested.connect(self.load_image_by_index)
+        server.tool_requested.connect(self.select_tool)
+        server.laser_moved.connect(self.on_remote_laser_moved)
+        self._publish_remote_status()
+
+    def connect_frame_streamer(self, streamer):
+        """Transmite a projeção principal sempre que ela estiver aberta."""
+        self.frame_streamer = streamer
+        if self.projection_win is not None: streamer.attach(self.projection_win)
+
+    def _publish_remote_status(self):
+        if self.remote_control is None: return
+        item_data = self.images_data[self.current_image_index] if self.current_image_index != -1 else {}
+        self.remote_control.publish_status({
+            'index': self.current_image_index, 'count': len(self.images_data), 'name': item_data.get('name', ''),
+        })
+
+    @Slot(str)
+    def select_tool(self, tool: str):
+        """Seleciona uma ferramenta de desenho como se o botão dela fosse clicado ("none" desmarca todas)."""
+        button = {"pen": self.pen_button, "highlighter": self.highlighter_button,
+                  "laser": self.laser_button, "eraser": self.eraser_button}.get(tool)
+        if button is None:
+            # Num grupo exclusivo, o botão marcado só pode ser desmarcado com a exclusividade desligada
+            self.tool_button_group.setExclusive(False)
+            for other in self.tool_button_group.buttons(): other.setChecked(False)
+            self.tool_button_group.setExclusive(True)
+        else:
+            button.setChecked(True)
+        self.on_tool_button_clicked(button)
 
-        self.brightness_slider.setValue(int(state.brightness * 100))
+    @Slot(object)
+    def on_remote_laser_moved(self, position):
+        state = self._get_current_state()
+        if state: state.update_laser_position(position)
+
+    def _update_animation(self):
+        """Reproduz na projeção a imagem atual, se for animada; para a reprodução anterior."""
+        if self.animation_player is not None:
+            self.animation_player.stop()
+            self.animation_player.deleteLater()
+            self.animation_player = None
+        if self._animation_first_frame is not None:
+            # Miniaturas e demais telas voltam ao primeiro quadro, e não ao último exibido
+            handler, first_frame = self._animation_first_frame
+            self._animation_first_frame = None
+            handler.set_frame_image(first_frame)
+        if self.projection_win is None or self.current_image_index == -1: return
+        handler = self.images_data[self.current_image_index]['handler']
+        if not handler.is_animated: return
+        self.animation_player = AnimationPlayer(handler.file_path, self)
+        self.animation_player.frame_ready.connect(lambda image, index, handler=handler: self._on_animation_frame(handler, image, index))
+        self.animation_player.start()
+
+    def _on_animation_frame(self, handler: ImageHandler, image, index: int):
+        if self.current_image_index == -1 or self.images_data[self.current_image_index]['handler'] is not handler: return
+        if index == 0 and self._animation_first_frame is None:
+            self._animation_first_frame = (handler, image)
+        handler.set_frame_image(image)
+        self.update_projection()
+
+    def _update_page_controls(self):
+        handler = self.images_data[self.current_image_index]['handler'] if self.current_image_index != -1 else None
+        has_pages = handler is not None and handler.sequence_kind == "pages"
+        self.page_widget.setVisible(has_pages)
+        if has_pages:
+            self.page_label.setText(f"{handler.page + 1}/{handler.page_count}")
+            self.prev_page_button.setEnabled(handler.page > 0)
+            self.next_page_button.setEnabled(handler.page < handler.page_count - 1)
+
+    def _step_page(self, step: int):
+        if self.current_image_index == -1: return
+        handler = self.images_data[self.current_image_index]['handler']
+        if handler.set_page(handler.page + step):
+            self.logger.info(f"Página {handler.page + 1}/{handler.page_count} de {handler.file_path}.")
+            # Cada página tem os próprios traços; as telas são renderizadas uma vez, no final
+            self._refresh_suspended = True
+            try:
+                self._get_current_state().show_page_strokes(handler.page)
+            finally:
+                self._refresh_suspended = False
+            if self.show_cache:
+                self.show_cache.invalidate(self.images_data[self.current_image_index])
+            self._update_page_controls()
+            self._refresh_all_displays()
+
+    @Slot()
+    def next_page(self):
+        self._step_page(1)
+
+    @Slot()
+    def previous_page(self):
+        self._step_page(-1)
+
+    def _load_controls_for_index(self, index, state: CanvasState):
+        # Os controles refletem o estado antes de on_monitor_changed, que relê o slider de zoom
+        self._sync_controls_with_state(state)
         self.rename_edit.setText(self.images_data[index]['name'])
+        self.notes_edit.blockSignals(True)
+        self.notes_edit.setPlainText(self.images_data[index].get('notes', ''))
+        self.notes_edit.blockSignals(False)
+        self.update_notes_display()
         self.display_mode_combo.setCurrentText(state.display_mode)
+        self._update_page_controls()
+
+        self.on_monitor_changed()
+        
+        if self.tool_button_group.checkedButton():
+            self.tool_button_group.checkedButton().setChecked(False)
+        state.set_property('active_tool', "none")
+        
+        self.update_controls_state()
+
+    def _sync_controls_with_state(self, state: CanvasState):
+        """Atualiza os controles sem disparar seus sinais (não gera novas entradas no histórico)."""
+        self.brightness_slider.blockSignals(True)
+        self.brightness_slider.setValue(round(state.brightness * 100))
+        self.brightness_slider.blockSignals(False)
+        self.brightness_label.setText(f"Brilho: {self.brightness_slider.value()}%")
         self.update_contrast_buttons_visibility(state.contrast_applied)
         
         self.zoom_enabled_checkbox.blockSignals(True)
         self.zoom_factor_slider.blockSignals(True)
         self.zoom_enabled_checkbox.setChecked(state.zoom_enabled)
         
-        slider_value = int(state.zoom_rect.width() * 100)
+        # round(): int() truncaria larguras como 0.29 (0.28999...) e o slider não refletiria o estado
+        slider_value = round(state.zoom_rect.width() * 100)
         self.zoom_factor_slider.setValue(slider_value)
 
         self.zoom_enabled_checkbox.blockSignals(False)
         self.zoom_factor_slider.blockSignals(False)
-        
-        if self.tool_button_group.checkedButton():
-            self.tool_button_group.checkedButton().setChecked(False)
-        state.set_property('active_tool', "none")
-        
-        self.update_controls_state()
-        self._refresh_all_displays()
+
+    def _update_history_buttons(self):
+        state = self._get_current_state()
+        self.undo_button.setEnabled(bool(state and state.history.can_undo()))
+        self.redo_button.setEnabled(bool(state and state.history.can_redo()))
+
+    @Slot()
+    def undo_last_action(self):
+        # As telas e os controles são atualizados por _on_history_replayed
+        state = self._get_current_state()
+        if state: state.undo()
+
+    @Slot()
+    def redo_last_action(self):
+        state = self._get_current_state()
+        if state: state.redo()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
 
     def keyPressEvent(self, event):
-        if QApplication.focusWidget() in [self.rename_edit]:
+        if QApplication.focusWidget() in [self.rename_edit, self.notes_edit]:
             super().keyPressEvent(event)
             return
             
         key = event.key()
-        if key == Qt.Key.Key_Escape: self.toggle_projection()
+        modifiers = event.modifiers()
+        if modifiers & Qt.KeyboardModifier.ControlModifier and key == Qt.Key.Key_Z:
+            if modifiers & Qt.KeyboardModifier.ShiftModifier: self.redo_last_action()
+            else: self.undo_last_action()
+        elif modifiers & Qt.KeyboardModifier.ControlModifier and key == Qt.Key.Key_Y: self.redo_last_action()
+        elif key == Qt.Key.Key_Escape: self.toggle_projection()
+        elif key == Qt.Key.Key_F3: self.perf_hud.toggle()
+        elif key == Qt.Key.Key_F4: self.toggle_profiler()
         elif key in [Qt.Key.Key_Right, Qt.Key.Key_PageDown]: self.next_image()
         elif key in [Qt.Key.Key_Left, Qt.Key.Key_PageUp]: self.previous_image()
+        elif key == Qt.Key.Key_Down: self.next_page()
+        elif key == Qt.Key.Key_Up: self.previous_page()
         else: super().keyPressEvent(event)
 
+    def toggle_profiler(self):
+        written = self.profiler.toggle()
+        if self.profiler.is_running:
+            self.statusBar().showMessage("Captura de desempenho em andamento (F4 para encerrar)...")
+        elif written:
+            self.statusBar().showMessage(f"Captura gravada: {written[0]}", 10000)
+
     @Slot()
     def toggle_projection(self):
         if self.projection_win is not None:
             self.logger.info("Ação: RECOLHER.")
-            self.projection_win.close()
+            for output in self._projection_outputs(): output.close()
             return
 
         self.logger.info("Ação: PROJETAR.")
@@ -387,29 +831,57 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Nenhum Monitor", "Nenhum monitor de projeção selecionado.")
             return
             
-        self.projection_win = ProjectionWindow(screen=selected_screen)
+        self.projection_win = ProjectionWindow(selected_screen, self.scaled_frames, self.laser_clock)
         self.projection_win.destroyed.connect(self.on_projection_destroyed_safeguard)
+        if self.frame_streamer: self.frame_streamer.attach(self.projection_win)
         
         self.project_button.setText("⏹️ Recolher")
         self.update_controls_state()
         self.projection_win.showFullScreen()
         self.update_projection()
+        self._update_animation()
         self.logger.info("Projeção concluída com sucesso.")
 
     @Slot()
     def on_projection_destroyed_safeguard(self):
         self.logger.warning("--- Sinal 'destroyed' (salvaguarda) recebido. ---")
-        if self.projection_win is not None:
+        # A janela já foi liberada (WA_DeleteOnClose); o sinal não volta a ser emitido
+        self.projection_win = None
+        self.slideshow_button.setChecked(False)
+        self._update_animation()
+        # Sem a projeção principal, as espelhadas também são fechadas
+        for mirror in self.mirror_wins:
             try:
-                self.projection_win.destroyed.disconnect(self.on_projection_destroyed_safeguard)
+                mirror.close()
             except RuntimeError:
                 pass
-            self.projection_win = None
+        self.mirror_wins = []
         
         self.project_button.setText("▶️ Projetar")
         self.update_controls_state()
         self.logger.info("Estado resetado para 'recolhido'.")
 
+    @Slot()
+    def add_mirror_projection(self):
+        selected_screen = self.monitor_combo.currentData()
+        if self.projection_win is None or not isinstance(selected_screen, QScreen): return
+        if selected_screen.name() in [output.screen_name for output in self._projection_outputs()]:
+            QMessageBox.information(self, "Monitor em Uso", "A projeção já está sendo exibida neste monitor.")
+            return
+
+        self.logger.info(f"Ação: ESPELHAR em '{selected_screen.name()}'.")
+        mirror = ProjectionWindow(selected_screen, self.scaled_frames, self.laser_clock)
+        mirror.set_background_color(self.projection_win.background_color.name())
+        mirror.destroyed.connect(lambda _=None, key=id(mirror): self.on_mirror_destroyed(key))
+        self.mirror_wins.append(mirror)
+        mirror.showFullScreen()
+        self.update_projection()
+        self.update_controls_state()
+
+    def on_mirror_destroyed(self, key):
+        self.mirror_wins = [mirror for mirror in self.mirror_wins if id(mirror) != key]
+        self.update_controls_state()
+
     @Slot()
     def update_monitor_state(self):
         self.populate_monitors(self.monitor_combo)
@@ -430,8 +902,7 @@ class MainWindow(QMainWindow):
 
             self.zoom_preview_widget.set_aspect_ratio(aspect_ratio)
             state = self._get_current_state()
-            if state:
-                state.set_property('projection_aspect_ratio', aspect_ratio)
+            if state: self._apply_projection_screen(state, selected_screen)
             
             self.on_zoom_factor_changed(self.zoom_factor_slider.value())
             self._refresh_all_displays()
@@ -439,6 +910,14 @@ class MainWindow(QMainWindow):
             self.zoom_preview_widget.show_message("Conecte um monitor e selecione-o para projeção.")
             self.logger.warning("Nenhum monitor de projeção válido selecionado.")
 
+    @staticmethod
+    def _apply_projection_screen(state: CanvasState, screen: QScreen):
+        """Ajusta ao monitor de projeção as propriedades do estado que dependem dele."""
+        size = screen.size()
+        aspect_ratio = size.width() / size.height() if size.height() > 0 else 16.0 / 9.0
+        state.stroke_reference_size = (size.width(), size.height())
+        state.set_property('projection_aspect_ratio', aspect_ratio)
+
     def populate_monitors(self, combo_box):
         self.logger.info(f"Atualizando a lista de monitores para {combo_box.objectName()}...")
         current_screen_name = combo_box.currentText()
@@ -462,59 +941,6 @@ class MainWindow(QMainWindow):
 
         combo_box.blockSignals(False)
 
-    def _calculate_crop_info(self, state: CanvasState, handler: ImageHandler) -> dict | None:
-        # --- CORREÇÃO: Esta função agora retorna o retângulo de corte e a rotação final ---
-        if not handler.original_image: return None
-        
-        img_w, img_h = handler.original_image.size
-        
-        # 1. Obter retângulo da lupa em coordenadas da pré-visualização (pixels)
-        preview_rect = self.zoom_preview_widget.screen_rect
-        lupa_rect_preview_unrotated = QRectF(
-            preview_rect.x() + state.zoom_rect.x() * preview_rect.width(),
-            preview_rect.y() + state.zoom_rect.y() * preview_rect.height(),
-            state.zoom_rect.width() * preview_rect.width(),
-            state.zoom_rect.height() * preview_rect.height()
-        )
-
-        # 2. Obter os 4 cantos da lupa e aplicar a rotação da lupa
-        lupa_center_abs = lupa_rect_preview_unrotated.center()
-        transform_lupa = QTransform().translate(lupa_center_abs.x(), lupa_center_abs.y()).rotate(state.lupa_rotation).translate(-lupa_center_abs.x(), -lupa_center_abs.y())
-        lupa_corners_rotated = transform_lupa.mapToPolygon(lupa_rect_preview_unrotated.toRect())
-        
-        # 3. Criar a matriz de transformação da tela para a imagem original
-        image_on_screen_rect = self.zoom_preview_widget.image_on_screen_rect
-        
-        transform_img_to_screen = QTransform()
-        transform_img_to_screen.translate(image_on_screen_rect.center().x(), image_on_screen_rect.center().y())
-        transform_img_to_screen.rotate(state.rotation)
-        transform_img_to_screen.scale(image_on_screen_rect.width() / img_w, image_on_screen_rect.height() / img_h)
-        transform_img_to_screen.translate(-img_w / 2, -img_h / 2)
-        
-        inverse_transform, invertible = transform_img_to_screen.inverted()
-        if not invertible:
-            self.logger.error("Matriz de transformação não é invertível.")
-            return None
-
-        # 4. Mapear os cantos da lupa para o espaço da imagem original
-        original_corners = [inverse_transform.map(p) for p in lupa_corners_rotated]
-        
-        # 5. Calcular o bounding box dos cantos transformados
-        min_x = min(p.x() for p in original_corners)
-        max_x = max(p.x() for p in original_corners)
-        min_y = min(p.y() for p in original_corners)
-        max_y = max(p.y() for p in original_corners)
-        
-        crop_rect = QRectF(min_x, min_y, max_x - min_x, max_y - min_y)
-        
-        # 6. Calcular a rotação final para o handler
-        final_rotation = (state.rotation - state.lupa_rotation) % 360
-
-        return {
-            "crop_rect": crop_rect,
-            "final_rotation": final_rotation
-        }
-
     def update_controls_state(self):
         has_images = bool(self.images_data)
         has_selection = self.current_image_index != -1
@@ -529,13 +955,19 @@ class MainWindow(QMainWindow):
         self.adjustments_group.setEnabled(has_selection)
         self.zoom_preview_widget.setEnabled(has_selection)
         self.rename_edit.setEnabled(has_selection)
+        self.notes_edit.setEnabled(has_selection)
         self.clear_drawings_button.setEnabled(has_selection)
+        self._update_history_buttons()
         self.pen_button.setEnabled(has_selection)
         self.highlighter_button.setEnabled(has_selection)
         self.laser_button.setEnabled(has_selection)
+        self.eraser_button.setEnabled(has_selection)
         self.rotate_lupa_button.setEnabled(has_selection)
 
         self.project_button.setEnabled(has_selection and self.monitor_combo.count() > 0)
+        self.mirror_button.setEnabled(is_projecting)
+        self.prepare_show_button.setEnabled(has_images and self.monitor_combo.count() > 0)
+        self.slideshow_button.setEnabled(is_projecting and has_images)
         self.display_mode_combo.setEnabled(is_projecting)
         self.bg_color_button.setEnabled(is_projecting)
 
@@ -591,8 +1023,10 @@ class MainWindow(QMainWindow):
     def rotate_lupa(self):
         state = self._get_current_state()
         if state:
-            state.set_property('lupa_rotation', (state.lupa_rotation + 90) % 180) # Alterna entre 0 e 90
-            self.on_zoom_factor_changed(self.zoom_factor_slider.value())
+            # Rotação e novo retângulo da lupa são desfeitos juntos
+            with state.history_group():
+                state.set_property('lupa_rotation', (state.lupa_rotation + 90) % 180) # Alterna entre 0 e 90
+                self.on_zoom_factor_changed(self.zoom_factor_slider.value())
 
     @Slot(int)
     def change_brightness(self, value):
@@ -604,7 +1038,7 @@ class MainWindow(QMainWindow):
     def on_tool_button_clicked(self, clicked_button):
         state = self._get_current_state()
         if not state: return
-        tool_map = {self.pen_button: "pen", self.highlighter_button: "highlighter", self.laser_button: "laser"}
+        tool_map = {self.pen_button: "pen", self.highlighter_button: "highlighter", self.laser_button: "laser", self.eraser_button: "eraser"}
         if clicked_button and clicked_button.isChecked():
             new_tool = tool_map.get(clicked_button, "none")
             state.set_property('active_tool', new_tool)
@@ -619,8 +1053,14 @@ class MainWindow(QMainWindow):
     @Slot()
     def select_background_color(self):
         color = QColorDialog.getColor()
-        if color.isValid() and self.projection_win is not None:
-            self.projection_win.set_background_color(color.name())
+        if color.isValid():
+            for output in self._projection_outputs(): output.set_background_color(color.name())
+            if self.show_cache:
+                # O fundo faz parte dos quadros preparados
+                self.show_cache.background = color
+                self.show_cache.invalidate_all()
+                self.show_cache.prepare(self.images_data)
+                self.update_projection()
 
     @Slot()
     def rename_current_image(self):
@@ -628,6 +1068,27 @@ class MainWindow(QMainWindow):
             new_name = self.images_data[self.current_image_index]['name'] = self.rename_edit.text()
             self.thumbnail_list.item(self.current_image_index).setText(new_name)
 
+    @Slot()
+    def on_notes_text_changed(self):
+        if self.current_image_index == -1: return
+        self.images_data[self.current_image_index]['notes'] = self.notes_edit.toPlainText()
+        self.update_notes_display(prepare_neighbours=False)
+
+    def update_notes_display(self, prepare_neighbours: bool = True):
+        """
+        Leva as anotações da imagem atual ao monitor de anotações e, ao trocar
+        de imagem, já calcula o ajuste do texto das imagens vizinhas: avançar
+        ou voltar um slide troca as anotações no mesmo quadro da projeção.
+        """
+        if self.notes_win is None or self.current_image_index == -1: return
+        self.notes_win.update_text(self.images_data[self.current_image_index].get('notes', ''))
+        if prepare_neighbours:
+            # A navegação dá a volta na galeria: do último slide se vai ao primeiro
+            count = len(self.images_data)
+            for neighbour in {(self.current_image_index + 1) % count, (self.current_image_index - 1) % count}:
+                if neighbour != self.current_image_index:
+                    self.notes_win.prepare_text(self.images_data[neighbour].get('notes', ''))
+
     @Slot(bool)
     def on_zoom_enabled_toggled(self, checked):
         state = self._get_current_state()
@@ -638,6 +1099,8 @@ class MainWindow(QMainWindow):
         factor = value / 100.0
         state = self._get_current_state()
         if not state: return
+        # O slider já reflete a lupa (ex.: reaplicado ao trocar de slide): nada muda nem entra no histórico
+        if round(state.zoom_rect.width() * 100) == value and round(state.zoom_rect.height() * 100) == value: return
         
         center = state.zoom_rect.center()
         
@@ -694,6 +1157,7 @@ class MainWindow(QMainWindow):
         self.notes_win = NotesWindow(screen=selected_screen)
         self.notes_win.destroyed.connect(self.on_notes_destroyed)
         self.notes_win.showFullScreen()
+        self.update_notes_display()
 
     @Slot()
     def on_notes_destroyed(self):
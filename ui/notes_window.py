@@ -1,14 +1,30 @@
 # ui/notes_window.py
-# Certifique-se de que o PyQtWebEngine está instalado: pip install PyQtWebEngine
+# O QtWebEngine é opcional: só é carregado para anotações em HTML (pip install PySide6-Addons)
 import logging
+from collections import OrderedDict
 from PySide6.QtWidgets import QWidget, QVBoxLayout
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QPointF, QRect
+from PySide6.QtGui import QPainter, QColor, QTextLayout
+from core.text_fit import fit_font_pixel_size, layout_text, might_be_rich_text
 from utils.html_generator import generate_html_with_dynamic_font
+from utils.logger import RATE_LIMITED
 
 logger = logging.getLogger("ImageProjectorLogger")
 
 class NotesWindow(QWidget):
+    """
+    Tela de anotações do apresentador. O texto é desenhado com QPainter no
+    maior tamanho de fonte que cabe em 95% da tela (core/text_fit), com o
+    tamanho calculado em cache por texto e resolução, e o texto já quebrado
+    em linhas guardado por (texto, tamanho, largura): repintar a tela não
+    refaz o layout. Só conteúdo HTML passa
+    por um QWebEngineView, criado sob demanda quando o QtWebEngine existe.
+    """
+    # Fração da largura/altura da tela usada pelo texto (o restante é margem)
+    TEXT_AREA_RATIO = 0.95
+    # Layouts guardados (texto atual, vizinhos preparados e alguns anteriores)
+    MAX_LAYOUTS = 8
+
     def __init__(self, screen):
         super().__init__()
         self.setWindowTitle("Anotações")
@@ -18,22 +34,91 @@ class NotesWindow(QWidget):
         # Configura para tela cheia
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         self.setGeometry(screen.geometry())
+        # O paintEvent preenche a janela inteira; o Qt não precisa apagar o fundo antes
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+        self.web_layout = QVBoxLayout(self)
+        self.web_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.text = ""
+        self.font_family = self.font().family()
+        self.webview = None # Criado no primeiro texto em HTML
+        self.web_available = True
+        self._layouts = OrderedDict() # (texto, tamanho da fonte, largura) -> (QTextLayout, altura)
+
+    def text_area(self) -> QRect:
+        """Área centralizada onde o texto é ajustado."""
+        width = int(self.width() * self.TEXT_AREA_RATIO)
+        height = int(self.height() * self.TEXT_AREA_RATIO)
+        return QRect((self.width() - width) // 2, (self.height() - height) // 2, width, height)
 
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
+    def prepare_text(self, text: str):
+        """
+        Calcula de antemão o tamanho de fonte de um texto que ainda será
+        exibido (ex.: anotações dos slides vizinhos), para que a troca
+        seja só um repaint.
+        """
+        if not text or might_be_rich_text(text):
+            return
+        self._layout(text)
 
-        self.webview = QWebEngineView()
-        layout.addWidget(self.webview)
+    def _layout(self, text: str) -> tuple[QTextLayout, float]:
+        """Layout de `text` no tamanho que cabe na área atual (criado uma vez por texto e tamanho)."""
+        area = self.text_area()
+        pixel_size = fit_font_pixel_size(text, area.width(), area.height(), self.font_family)
+        key = (text, pixel_size, area.width())
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = layout_text(text, self.font_family, pixel_size, area.width())
+            self._layouts[key] = layout
+            while len(self._layouts) > self.MAX_LAYOUTS:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+        return layout
 
     def update_text(self, text: str):
         """Atualiza o texto exibido na tela."""
-        logger.debug(f"Atualizando NotesWindow com o texto: '{text[:30]}...'")
-        html_content = generate_html_with_dynamic_font(text)
-        self.webview.setHtml(html_content)
+        # Chamado a cada tecla digitada nas anotações
+        logger.debug("Atualizando NotesWindow com o texto: '%s...'", text[:30], extra=RATE_LIMITED)
+        if might_be_rich_text(text) and self._show_html(text):
+            return
+        if self.webview is not None:
+            self.webview.hide()
+        self.text = text
+        self.update()
+
+    def _show_html(self, text: str) -> bool:
+        """Exibe o texto no QWebEngineView; retorna False se o QtWebEngine não estiver disponível."""
+        if self.webview is None:
+            if not self.web_available:
+                return False
+            try:
+                from PySide6.QtWebEngineWidgets import QWebEngineView
+            except ImportError:
+                logger.warning("QtWebEngine indisponível; anotações em HTML serão exibidas como texto.", exc_info=True)
+                self.web_available = False
+                return False
+            self.webview = QWebEngineView()
+            self.web_layout.addWidget(self.webview)
+        self.webview.setHtml(generate_html_with_dynamic_font(text))
+        self.webview.show()
+        return True
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("black"))
+        if self.text:
+            area = self.text_area()
+            layout, height = self._layout(self.text)
+            # Centralizado na vertical, como o AlignCenter do drawText
+            top = area.top() + (area.height() - height) / 2
+            painter.setPen(QColor("white"))
+            layout.draw(painter, QPointF(area.left(), top))
+        painter.end()
 
     def keyPressEvent(self, event):
         """Fecha a janela ao pressionar a tecla Escape."""
         if event.key() == Qt.Key.Key_Escape:
-            self.logger.info("Tecla Esc pressionada na NotesWindow. Fechando.")
+            logger.info("Tecla Esc pressionada na NotesWindow. Fechando.")
             self.close()
-
@@ -1,13 +1,84 @@
 # ui/projection_window.py
 
+import time
 import logging
+from collections import OrderedDict
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPixmap, QPainter, QBrush, QColor, QPen
-from PySide6.QtCore import Qt, QTimer, Slot
+from PySide6.QtGui import QPixmap, QImage, QPainter, QBrush, QColor, QPen, QTransform, QRegion
+from PySide6.QtCore import Qt, QObject, QTimer, Signal, Slot, QLineF, QPoint, QPointF, QRect, QRectF, QSize
+from core.annotation_layer import stroke_width
+from core.geometry import orientation_transform, rotated_size
+from utils.perf_monitor import perf
 
 logger = logging.getLogger("ImageProjectorLogger")
 
+class ScaledFrameCache:
+    """
+    Versões escaladas dos quadros da projeção, por (quadro, tamanho). Quando
+    várias janelas exibem o mesmo quadro, as de mesma resolução compartilham
+    um único redimensionamento.
+    """
+    MAX_ENTRIES = 4
+
+    def __init__(self):
+        self._entries = OrderedDict()
+
+    def get(self, pixmap: QPixmap, target: QSize) -> QPixmap:
+        key = (pixmap.cacheKey(), target.width(), target.height())
+        scaled = self._entries.get(key)
+        if scaled is None:
+            scaled = pixmap.scaled(target, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            self._entries[key] = scaled
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return scaled
+
+class LaserClock(QObject):
+    """
+    Relógio da animação do laser. A cada tique avança uma única vez o quadro
+    de animação de cada estado exibido e repinta as janelas com o laser
+    ativo, então várias janelas mostrando o mesmo estado pulsam juntas.
+    """
+    INTERVAL_MS = 30 # ~33 FPS
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.windows = []
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def register(self, window):
+        if window not in self.windows:
+            self.windows.append(window)
+        if not self.timer.isActive():
+            self.timer.start(self.INTERVAL_MS)
+
+    def unregister(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+        if not self.windows:
+            self.timer.stop()
+
+    @Slot()
+    def tick(self):
+        states = {id(w.canvas_state): w.canvas_state for w in self.windows if w.canvas_state}
+        for state in states.values():
+            state.laser_animation_frame += 1
+        for window in self.windows:
+            if window.canvas_state and window.canvas_state.active_tool == 'laser':
+                window.update() # Redesenha a janela para animar o laser
+
 class ProjectionWindow(QWidget):
+    # Relatório de cada transição concluída (ver _finish_transition)
+    transition_finished = Signal(dict)
+    # Emitido ao fim de cada pintura na tela (não nas capturas de capture_frame)
+    frame_painted = Signal()
+
+    # Intervalo entre quadros de uma transição; intervalos acima de 1,5x contam como quadros perdidos
+    TRANSITION_FRAME_MS = 16
+
     DISPLAY_MODES = {
         "Ajustar (Fit)": Qt.AspectRatioMode.KeepAspectRatio,
         "Preencher (Fill)": Qt.AspectRatioMode.KeepAspectRatioByExpanding,
@@ -16,31 +87,312 @@ class ProjectionWindow(QWidget):
         "Lado a Lado (Tile)": None,
     }
 
-    def __init__(self, screen):
+    def __init__(self, screen, scaled_cache: ScaledFrameCache | None = None, laser_clock: LaserClock | None = None):
+        """
+        Args:
+            screen (QScreen): A tela onde a janela é exibida.
+            scaled_cache (ScaledFrameCache, optional): Cache de redimensionamentos
+                compartilhado com outras janelas que exibem o mesmo quadro.
+            laser_clock (LaserClock, optional): Relógio do laser compartilhado com
+                essas janelas. Sem ele, a janela cria o seu.
+        """
         super().__init__()
         self.setWindowTitle("Projeção")
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
+        # Fechar libera a janela, e o sinal destroyed avisa quem a criou
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
         self.setGeometry(screen.geometry())
+        self.screen_name = screen.name()
         
         self.base_pixmap = None
         self.canvas_state = None
+        # Incrementada a cada mudança do que é exibido, exceto o laser (ver capture_frame)
+        self.content_version = 0
+        self._capturing = False
+        # True quando base_pixmap é um quadro pronto da ShowCache, já no tamanho da janela
+        self.prerendered = False
+        # Rotação aplicada ao pintar (a imagem recebida não vem girada) e tamanho já girado
+        self.rotation = 0
+        self.frame_size = QSize()
+        
+        # Cache da imagem escalada para a tela e geometria do desenho
+        self.scaled_cache = scaled_cache if scaled_cache is not None else ScaledFrameCache()
+        self._scaled_cache_key = None
+        self._scaled_pixmap = None
+        self.image_draw_rect = QRectF()
+        
+        # Tinta provisória do traço em andamento, na resolução da janela
+        self.ink_transform = QTransform()
+        # Pixels da imagem projetada por pixel da original (espessura dos traços)
+        self.ink_scale = 1.0
+        self.ink_pixmap = None
         self.background_color = QColor("#000000")
         self.setStyleSheet(f"background-color: {self.background_color.name()};")
         
-        # Timer para animação do laser
-        self.laser_timer = QTimer(self)
-        self.laser_timer.timeout.connect(self.animate_laser)
-        self.laser_timer.start(30) # ~33 FPS
+        # Transição em andamento: quadro anterior (capturado da janela) esmaecendo sobre o novo
+        self._transition = None
+        self.transition_timer = QTimer(self)
+        self.transition_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.transition_timer.timeout.connect(self.update)
+
+        # Animação do laser
+        self.laser_clock = laser_clock if laser_clock is not None else LaserClock(self)
+        self.laser_clock.register(self)
 
         logger.info(f"Janela de projeção criada para a tela {screen.name()}.")
 
-    def update_display(self, pixmap: QPixmap, state):
-        """Recebe a imagem final (com desenhos e zoom já aplicados) e a exibe."""
+    def update_display(self, pixmap: QPixmap, state, ink_transform: QTransform | None = None, rotation: int = 0,
+                       ink_scale: float = 1.0):
+        """
+        Recebe a imagem final (com desenhos e zoom já aplicados) e a exibe.
+        `rotation` (anti-horária, múltipla de 90°) é aplicada como transformação
+        ao pintar, sem gerar uma cópia girada. ink_transform mapeia coordenadas
+        normalizadas da imagem original para pixels da imagem já girada, e é
+        usada para projetar o traço em andamento; ink_scale converte a espessura
+        dele de pixels da original para pixels da imagem projetada.
+        """
         self.base_pixmap = pixmap
         self.canvas_state = state
+        self.prerendered = False
+        self.rotation = rotation % 360
+        if pixmap:
+            self.frame_size = QSize(*rotated_size(pixmap.width(), pixmap.height(), self.rotation))
+        self.ink_transform = ink_transform if ink_transform is not None else QTransform()
+        self.ink_scale = ink_scale
+        self.content_version += 1
         self.update()
 
+    @staticmethod
+    def _scaled_target(source, rotation: int, mode, area: QSize) -> QSize:
+        """Tamanho (antes da rotação) em que `source`, depois de girado, ocupa `area` conforme `mode`."""
+        target = QSize(*rotated_size(source.width(), source.height(), rotation)).scaled(area, mode)
+        if rotation % 180 == 90:
+            target.transpose()
+        return target
+
+    def show_prerendered(self, pixmap: QPixmap, state, ink_transform: QTransform, frame_size: QSize, draw_rect: QRectF,
+                         ink_scale: float = 1.0):
+        """
+        Exibe um quadro já composto para esta tela (ver render_frame_image).
+        frame_size e draw_rect descrevem onde a imagem ficou dentro do quadro,
+        para que o traço em andamento continue sendo projetado por cima.
+        """
+        self.base_pixmap = pixmap
+        self.canvas_state = state
+        self.prerendered = True
+        self.frame_size = frame_size
+        self.image_draw_rect = draw_rect
+        self.ink_transform = ink_transform
+        self.ink_scale = ink_scale
+        self.content_version += 1
+        self.update()
+
+    def _get_scaled_pixmap(self, mode) -> QPixmap:
+        """Imagem (ainda não girada) escalada para que, depois de girada, ocupe a janela conforme `mode`."""
+        cache_key = (self.base_pixmap.cacheKey(), self.width(), self.height(), mode, self.rotation)
+        if cache_key != self._scaled_cache_key:
+            target = self._scaled_target(self.base_pixmap, self.rotation, mode, self.size())
+            self._scaled_pixmap = self.scaled_cache.get(self.base_pixmap, target)
+            self._scaled_cache_key = cache_key
+        return self._scaled_pixmap
+
+    def prepare_frame(self, pixmap: QPixmap, state, rotation: int = 0):
+        """
+        Deixa pronta no cache a versão escalada de um quadro que ainda será
+        exibido (ex.: o próximo slide da apresentação), para que a troca só
+        precise desenhá-lo.
+        """
+        mode = self.DISPLAY_MODES.get(state.display_mode)
+        if pixmap and mode is not None:
+            self.scaled_cache.get(pixmap, self._scaled_target(pixmap, rotation % 360, mode, self.size()))
+
+    def start_transition(self, duration_ms: int):
+        """
+        Inicia um esmaecimento de `duration_ms` a partir do que está na tela:
+        o conteúdo atual é capturado e desenhado por cima do próximo quadro
+        (entregue em seguida por update_display) com opacidade decrescente.
+        """
+        if duration_ms <= 0 or not self.base_pixmap or not self.isVisible():
+            return
+        self._transition = {
+            "from": self.grab(),
+            "start": time.perf_counter(),
+            "duration": duration_ms / 1000,
+            "frames": [],
+        }
+        self.transition_timer.start(self.TRANSITION_FRAME_MS)
+
+    def _paint_transition(self, painter: QPainter):
+        transition = self._transition
+        now = time.perf_counter()
+        progress = (now - transition["start"]) / transition["duration"]
+        if self._capturing:
+            # Uma captura não é um quadro exibido: não entra nas estatísticas nem encerra a transição
+            if progress < 1.0:
+                painter.setOpacity(1.0 - progress)
+                painter.drawPixmap(0, 0, transition["from"])
+                painter.setOpacity(1.0)
+            return
+        self.content_version += 1
+        transition["frames"].append(now)
+        if progress >= 1.0:
+            self._finish_transition()
+            return
+        painter.setOpacity(1.0 - progress)
+        painter.drawPixmap(0, 0, transition["from"])
+        painter.setOpacity(1.0)
+
+    def _finish_transition(self):
+        """Encerra a transição e registra quantos quadros foram exibidos e quantos se perderam."""
+        transition, self._transition = self._transition, None
+        self.transition_timer.stop()
+        instants = [transition["start"]] + transition["frames"]
+        gaps = [b - a for a, b in zip(instants, instants[1:])]
+        limit = 1.5 * self.TRANSITION_FRAME_MS / 1000
+        elapsed = instants[-1] - instants[0]
+        if perf.enabled:
+            for gap in gaps:
+                perf.record("transição.quadro", gap)
+        report = {
+            "screen": self.screen_name,
+            "duration_ms": elapsed * 1000,
+            "frames": len(gaps),
+            "fps": len(gaps) / elapsed if elapsed > 0 else 0.0,
+            "max_frame_ms": max(gaps, default=0.0) * 1000,
+            "dropped": sum(1 for gap in gaps if gap > limit),
+        }
+        logger.info("Transição em %s: %d quadros em %.0f ms (%.1f FPS), maior intervalo %.1f ms, %d perdidos.",
+                    report["screen"], report["frames"], report["duration_ms"], report["fps"],
+                    report["max_frame_ms"], report["dropped"])
+        self.transition_finished.emit(report)
+
+    @staticmethod
+    def _draw_oriented(painter: QPainter, source, rotation: int, area: QRect) -> QRectF:
+        """Desenha `source` (QPixmap ou QImage) girado e centralizado em `area`; retorna o retângulo ocupado."""
+        draw_rect = QRect(QPoint(0, 0), QSize(*rotated_size(source.width(), source.height(), rotation)))
+        draw_rect.moveCenter(area.center())
+        painter.save()
+        painter.translate(draw_rect.topLeft())
+        painter.setTransform(orientation_transform(rotation, source.width(), source.height()), True)
+        if isinstance(source, QImage):
+            painter.drawImage(0, 0, source)
+        else:
+            painter.drawPixmap(0, 0, source)
+        painter.restore()
+        return QRectF(draw_rect)
+
+    @classmethod
+    def render_frame_image(cls, image: QImage, rotation: int, display_mode: str, size: QSize,
+                           background: QColor) -> tuple[QImage, QRectF]:
+        """
+        Compõe, fora da janela, o quadro exatamente como o paintEvent o
+        desenharia numa tela de `size`: fundo, modo de exibição e rotação.
+        Só usa QImage e QPainter, então pode rodar em outra thread.
+
+        Returns:
+            tuple: O quadro (RGB888, 3 bytes por pixel) e o retângulo ocupado pela imagem.
+        """
+        rotation %= 360
+        frame = QImage(size, QImage.Format.Format_RGB32)
+        frame.fill(background)
+        painter = QPainter(frame)
+        mode = cls.DISPLAY_MODES.get(display_mode)
+        if display_mode == "Lado a Lado (Tile)":
+            brush = QBrush(image)
+            brush.setTransform(orientation_transform(rotation, image.width(), image.height()))
+            painter.fillRect(frame.rect(), brush)
+            draw_rect = QRectF(0, 0, *rotated_size(image.width(), image.height(), rotation))
+        elif display_mode == "Centralizar (Center)":
+            draw_rect = cls._draw_oriented(painter, image, rotation, frame.rect())
+        else:
+            scaled = image.scaled(cls._scaled_target(image, rotation, mode, size), Qt.AspectRatioMode.IgnoreAspectRatio,
+                                  Qt.TransformationMode.SmoothTransformation)
+            draw_rect = cls._draw_oriented(painter, scaled, rotation, frame.rect())
+        painter.end()
+        return frame.convertToFormat(QImage.Format.Format_RGB888), draw_rect
+
+    def _ink_to_window(self) -> tuple[QTransform, float]:
+        """Coordenadas normalizadas da original -> pixels da janela, e a escala imagem projetada -> janela."""
+        scale_x = self.image_draw_rect.width() / self.frame_size.width()
+        scale_y = self.image_draw_rect.height() / self.frame_size.height()
+        return self.ink_transform * QTransform(scale_x, 0, 0, scale_y, self.image_draw_rect.x(), self.image_draw_rect.y()), scale_x
+
+    def image_pixel_extent(self) -> tuple[float, float] | None:
+        """
+        Largura e altura, em pixels da janela, que a imagem original inteira
+        ocupa (com zoom, corte e rotação): a escala dos traços na saída.
+        None antes de a imagem ser exibida.
+        """
+        if self.image_draw_rect.isEmpty() or self.frame_size.isEmpty():
+            return None
+        to_window, _ = self._ink_to_window()
+        origin = to_window.map(QPointF(0, 0))
+        return (QLineF(origin, to_window.map(QPointF(1, 0))).length(),
+                QLineF(origin, to_window.map(QPointF(0, 1))).length())
+
+    @Slot(QPointF, QPointF)
+    def draw_live_segment(self, p1: QPointF, p2: QPointF):
+        """Desenha apenas o novo segmento do traço em andamento e repinta só a área afetada."""
+        state = self.canvas_state
+        if not state or not state.live_stroke or not self.base_pixmap or self.image_draw_rect.isEmpty():
+            return
+
+        if self.ink_pixmap is None or self.ink_pixmap.size() != self.size():
+            self.ink_pixmap = QPixmap(self.size())
+            self.ink_pixmap.fill(Qt.GlobalColor.transparent)
+
+        to_window, scale_x = self._ink_to_window()
+        a, b = to_window.map(p1), to_window.map(p2)
+
+        stroke = state.live_stroke
+        # Mesma largura da AnnotationLayer, levada da imagem projetada para a janela
+        width = stroke_width(stroke.thickness, self.ink_scale) * scale_x
+        painter = QPainter(self.ink_pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if stroke.color.alpha() < 255:
+            # Evita acumular transparência nas junções do marca-texto
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.setPen(QPen(stroke.color, width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin))
+        painter.drawLine(a, b)
+        painter.end()
+
+        margin = width / 2 + 2
+        self.content_version += 1
+        self.update(QRectF(a, b).normalized().adjusted(-margin, -margin, margin, margin).toAlignedRect())
+
+    @Slot()
+    def clear_live_ink(self):
+        if self.ink_pixmap is not None:
+            self.ink_pixmap = None
+            self.content_version += 1
+            self.update()
+
+    def capture_frame(self, size: QSize) -> QImage:
+        """
+        O que a janela exibe (imagem, traços, laser e transição), pintado de
+        novo em `size` para ser transmitido. Não conta como quadro exibido.
+        """
+        image = QImage(size, QImage.Format.Format_RGB32)
+        painter = QPainter(image)
+        painter.scale(size.width() / max(1, self.width()), size.height() / max(1, self.height()))
+        self._capturing = True
+        try:
+            self.render(painter, QPoint(), QRegion(), QWidget.RenderFlag.DrawChildren)
+        finally:
+            self._capturing = False
+            painter.end()
+        return image
+
     def paintEvent(self, event):
+        if self._capturing:
+            self._paint(event)
+            return
+        perf.tick("projeção")
+        with perf.measure("paint.projeção"):
+            self._paint(event)
+        self.frame_painted.emit()
+
+    def _paint(self, event):
         super().paintEvent(event)
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -49,28 +401,36 @@ class ProjectionWindow(QWidget):
             painter.fillRect(self.rect(), self.background_color)
             return
 
-        painter.fillRect(self.rect(), self.background_color)
+        if not self.prerendered:
+            painter.fillRect(self.rect(), self.background_color)
         
         display_mode_name = self.canvas_state.display_mode
         mode = self.DISPLAY_MODES.get(display_mode_name)
         
-        if display_mode_name == "Lado a Lado (Tile)":
-            painter.fillRect(self.rect(), QBrush(self.base_pixmap))
+        if self.prerendered:
+            # Quadro já composto no tamanho da janela (fundo, escala e rotação): só é copiado
+            painter.drawPixmap(0, 0, self.base_pixmap)
+        elif display_mode_name == "Lado a Lado (Tile)":
+            # O padrão repete com o período da imagem girada, então girar a textura basta
+            brush = QBrush(self.base_pixmap)
+            brush.setTransform(orientation_transform(self.rotation, self.base_pixmap.width(), self.base_pixmap.height()))
+            painter.fillRect(self.rect(), brush)
+            self.image_draw_rect = QRectF(0, 0, self.frame_size.width(), self.frame_size.height())
         elif display_mode_name == "Centralizar (Center)":
-            scaled_pixmap = self.base_pixmap
-            image_draw_rect = scaled_pixmap.rect()
-            image_draw_rect.moveCenter(self.rect().center())
-            painter.drawPixmap(image_draw_rect.topLeft(), scaled_pixmap)
+            self.image_draw_rect = self._draw_oriented(painter, self.base_pixmap, self.rotation, self.rect())
         else:
-            scaled_pixmap = self.base_pixmap.scaled(self.size(), mode, Qt.TransformationMode.SmoothTransformation)
-            image_draw_rect = scaled_pixmap.rect()
-            image_draw_rect.moveCenter(self.rect().center())
-            painter.drawPixmap(image_draw_rect.topLeft(), scaled_pixmap)
+            self.image_draw_rect = self._draw_oriented(painter, self._get_scaled_pixmap(mode), self.rotation, self.rect())
+
+        if self.ink_pixmap is not None:
+            painter.drawPixmap(0, 0, self.ink_pixmap)
 
         # Desenha o laser se estiver ativo
         if self.canvas_state.active_tool == 'laser' and self.canvas_state.laser_position:
             self.draw_laser_pointer(painter)
 
+        if self._transition is not None:
+            self._paint_transition(painter)
+
     def draw_laser_pointer(self, painter: QPainter):
         state = self.canvas_state
         if not state or not state.laser_position:
@@ -95,17 +455,15 @@ class ProjectionWindow(QWidget):
             painter.setBrush(QColor(255, 100, 100, 255))
             painter.drawEllipse(QPointF(pos_x, pos_y), inner_radius, inner_radius)
 
-    @Slot()
-    def animate_laser(self):
-        if self.canvas_state:
-            self.canvas_state.laser_animation_frame += 1
-            if self.canvas_state.active_tool == 'laser':
-                self.update() # Redesenha a janela para animar o laser
-
     def set_background_color(self, color_hex: str):
         self.background_color = QColor(color_hex)
+        self.content_version += 1
         self.update() # Força o redesenho com a nova cor
 
+    def closeEvent(self, event):
+        self.laser_clock.unregister(self)
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         # Este evento é encaminhado da MainWindow, então não precisamos fechar aqui
         super().keyPressEvent(event)
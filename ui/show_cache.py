@@ -0,0 +1,304 @@
+# ui/show_cache.py
+
+import os
+import time
+import logging
+from types import SimpleNamespace
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, QSize, QRectF, QTimer, Signal, Slot
+from PySide6.QtGui import QPixmap, QColor
+from core.image_handler import ImageHandler
+from core.geometry import calculate_crop_info, rotated_size
+from ui.projection_window import ProjectionWindow
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class ShowCache(QObject):
+    """
+    Quadros de uma galeria inteira já compostos para uma tela de projeção
+    ("Preparar Apresentação"). Cada slide é renderizado em paralelo, em uma
+    thread do pool, com um ImageHandler próprio e uma cópia do estado, e o
+    quadro final (fundo, escala, rotação, ajustes, corte e traços) é guardado
+    em RGB888. Durante a apresentação a ProjectionWindow só o copia.
+
+    Cada quadro guarda a `revision` do CanvasState com que foi renderizado:
+    editar um slide invalida apenas o quadro dele, que é refeito em segundo
+    plano logo após a edição.
+
+    Os quadros ocupam até `max_bytes`: acima disso, os mais distantes (na
+    ordem da galeria) do slide atual são descartados, e os descartados que
+    voltam a ficar perto dele são refeitos em segundo plano.
+    """
+    # Emitido na thread da interface a cada quadro pronto: (prontos, total)
+    progress = Signal(int, int)
+    # Todos os quadros pedidos por prepare() ficaram prontos (duração em segundos)
+    finished = Signal(float)
+    _frame_baked = Signal(object, object)
+
+    # Espera após a última edição de um slide antes de refazer o quadro dele
+    REBAKE_DELAY_MS = 400
+    # Quadros mantidos também como QPixmap (atual e vizinhos)
+    PIXMAP_SLOTS = 3
+    DEFAULT_MAX_BYTES = 1024 ** 3
+    # Quadros descartados até esta distância do slide atual são refeitos
+    REFILL_DISTANCE = 2
+
+    def __init__(self, size: QSize, background: QColor, pixel_cache=None, max_workers: int | None = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, parent=None):
+        super().__init__(parent)
+        self.size = QSize(size)
+        self.background = QColor(background)
+        self.pixel_cache = pixel_cache
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._positions = {} # id(CanvasState) -> posição na galeria (do último prepare)
+        self._current = None # id(CanvasState) do slide exibido
+        self._evicted = set()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 4, thread_name_prefix="ShowCache")
+        self._frames = {} # id(CanvasState) -> quadro pronto
+        self._pending = set() # id(CanvasState) com renderização em andamento
+        self._items = {} # id(CanvasState) -> item da galeria acompanhado
+        self._pixmap_frames = deque() # Quadros que também têm QPixmap, do mais antigo ao mais recente
+        self._dirty = set()
+        self._batch = None # (início, total) do prepare() em andamento
+        self._batch_keys = set() # Quadros pedidos pelo prepare() em andamento que ainda não ficaram prontos
+        self._done = 0
+        # Incrementada por invalidate_all(): resultados de renderizações anteriores são descartados
+        self._generation = 0
+        self._frame_baked.connect(self._on_frame_baked)
+
+        self._rebake_timer = QTimer(self)
+        self._rebake_timer.setSingleShot(True)
+        self._rebake_timer.timeout.connect(self._rebake_dirty)
+
+    def prepare(self, images_data: list):
+        """Renderiza em paralelo o quadro de cada item da galeria que ainda não estiver válido."""
+        started = time.perf_counter()
+        jobs = [item for item in images_data if self.frame(item) is None]
+        self._positions = {id(item['canvas_state']): position for position, item in enumerate(images_data)}
+        self._evicted.clear()
+        for item in images_data:
+            self._track(item)
+        self._batch = (started, len(jobs))
+        self._batch_keys = {id(item['canvas_state']) for item in jobs}
+        self._done = 0
+        logger.info(f"Preparando {len(jobs)} quadro(s) de apresentação em {self.size.width()}x{self.size.height()}.")
+        if not jobs:
+            self._finish_batch()
+        for item in jobs:
+            self._submit(item)
+
+    def frame(self, item_data: dict) -> SimpleNamespace | None:
+        """Quadro pronto do item, ou None se não existir ou se o estado mudou depois de renderizado."""
+        state = item_data['canvas_state']
+        frame = self._frames.get(id(state))
+        handler = item_data.get('handler')
+        page = handler.page if handler else 0
+        if frame is None or frame.revision != state.revision or frame.path != item_data['path'] or frame.page != page:
+            return None
+        return frame
+
+    def pixmap(self, frame: SimpleNamespace) -> QPixmap:
+        """O quadro como QPixmap, pronto para ser desenhado (os mais recentes ficam guardados)."""
+        if frame.pixmap is None:
+            frame.pixmap = QPixmap.fromImage(frame.image)
+            self._pixmap_frames.append(frame)
+            while len(self._pixmap_frames) > self.PIXMAP_SLOTS:
+                self._pixmap_frames.popleft().pixmap = None
+        return frame.pixmap
+
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def set_current(self, item_data: dict):
+        """Informa o slide exibido: o descarte por memória preserva os quadros perto dele."""
+        key = id(item_data['canvas_state'])
+        if key == self._current:
+            return
+        self._current = key
+        for evicted in [k for k in self._evicted if self._distance(k) <= self.REFILL_DISTANCE]:
+            self._evicted.discard(evicted)
+            if evicted in self._items:
+                self._submit(self._items[evicted])
+
+    def _distance(self, key) -> int:
+        """Distância na galeria (circular, como a navegação) entre o quadro e o slide atual."""
+        count = len(self._positions)
+        if key not in self._positions:
+            return count
+        distance = abs(self._positions[key] - self._positions.get(self._current, 0))
+        return min(distance, count - distance)
+
+    def _store(self, key, frame: SimpleNamespace):
+        self._drop(key)
+        self._frames[key] = frame
+        self._bytes += frame.image.sizeInBytes()
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            victim = max(self._frames, key=self._distance)
+            self._drop(victim)
+            self._evicted.add(victim)
+            logger.debug(f"Apresentação: quadro descartado por memória ({self._bytes / (1024 * 1024):.0f} MB em cache).")
+
+    def _drop(self, key):
+        frame = self._frames.pop(key, None)
+        if frame is None:
+            return
+        self._bytes -= frame.image.sizeInBytes()
+        if frame.pixmap is not None:
+            frame.pixmap = None
+            self._pixmap_frames.remove(frame)
+
+    def invalidate(self, item_data: dict):
+        """Descarta o quadro do item (ex.: outra página do TIFF); ele é refeito em segundo plano."""
+        self._track(item_data)
+        self._invalidate(id(item_data['canvas_state']))
+
+    def invalidate_all(self):
+        """Descarta todos os quadros (ex.: a cor de fundo mudou); prepare() os refaz."""
+        self._generation += 1
+        self._frames.clear()
+        self._pixmap_frames.clear()
+        self._bytes = 0
+        # Renderizações em andamento, descartes e edições pendentes se referem ao estado antigo
+        self._pending.clear()
+        self._evicted.clear()
+        self._dirty.clear()
+        self._rebake_timer.stop()
+        self._batch = None
+        self._batch_keys.clear()
+
+    def shutdown(self):
+        """Cancela as renderizações pendentes e desconecta-se dos estados acompanhados."""
+        self._rebake_timer.stop()
+        # As renderizações já em andamento terminam sozinhas; seus resultados são ignorados
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for item in self._items.values():
+            try:
+                item['canvas_state'].state_changed.disconnect(self._on_state_changed)
+            except (RuntimeError, TypeError):
+                pass
+        self._items.clear()
+        self._frames.clear()
+        self._pixmap_frames.clear()
+        self._bytes = 0
+
+    def _track(self, item_data: dict):
+        state = item_data['canvas_state']
+        if id(state) not in self._items:
+            self._items[id(state)] = item_data
+            state.state_changed.connect(self._on_state_changed)
+
+    @Slot()
+    def _on_state_changed(self):
+        state = self.sender()
+        if state is None or id(state) not in self._frames:
+            return
+        if self._frames[id(state)].revision != state.revision:
+            self._invalidate(id(state))
+
+    def _invalidate(self, key):
+        # Só este slide perde o quadro; ele é refeito quando as edições pararem
+        self._drop(key)
+        self._dirty.add(key)
+        self._rebake_timer.start(self.REBAKE_DELAY_MS)
+
+    @Slot()
+    def _rebake_dirty(self):
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            item = self._items.get(key)
+            if item is not None:
+                self._submit(item)
+
+    def _submit(self, item_data: dict):
+        state = item_data['canvas_state']
+        if id(state) in self._pending:
+            return
+        self._pending.add(id(state))
+        # Cópia do que o pipeline lê do estado: a thread não toca no CanvasState da interface
+        snapshot = SimpleNamespace(
+            rotation=state.rotation, brightness=state.brightness, contrast_applied=state.contrast_applied,
+            display_mode=state.display_mode, zoom_enabled=state.zoom_enabled, zoom_rect=QRectF(state.zoom_rect),
+            lupa_rotation=state.lupa_rotation, projection_aspect_ratio=state.projection_aspect_ratio,
+            strokes=list(state.strokes), stroke_index=None,
+        )
+        handler = item_data.get('handler')
+        decoder, page = (handler.decoder, handler.page) if handler else (None, 0)
+        future = self._pool.submit(self._bake, item_data['path'], decoder, page, snapshot, QSize(self.size), QColor(self.background))
+        key, revision, path, generation = id(state), state.revision, item_data['path'], self._generation
+        future.add_done_callback(lambda f: self._emit_baked((key, revision, path, page, generation), f))
+
+    def _emit_baked(self, job: tuple, future):
+        # Roda na thread do pool: depois de shutdown() o objeto pode já ter sido destruído
+        if self._closed:
+            return
+        try:
+            self._frame_baked.emit(job, future)
+        except RuntimeError:
+            pass
+
+    def _bake(self, path: str, decoder, page: int, state, size: QSize, background: QColor) -> SimpleNamespace | None:
+        """Renderiza um slide (roda numa thread do pool)."""
+        handler = ImageHandler(path, self.pixel_cache, decoder)
+        if not handler.image_size:
+            return None
+        if page:
+            handler.set_page(page)
+        crop_info = calculate_crop_info(state, handler.image_size) if state.zoom_enabled else None
+        image = handler.render_projection_image(state, crop_info, size)
+        if image is None:
+            return None
+        rotation = handler.get_projection_rotation(state, crop_info)
+        region = handler.pil_to_qimage(image)
+        frame_image, draw_rect = ProjectionWindow.render_frame_image(region, rotation, state.display_mode, size, background)
+        return SimpleNamespace(
+            image=frame_image,
+            pixmap=None,
+            draw_rect=draw_rect,
+            frame_size=QSize(*rotated_size(region.width(), region.height(), rotation)),
+            ink_transform=handler.get_projection_transform(state, crop_info, size),
+            ink_scale=handler.get_projection_ink_scale(state, crop_info, size),
+        )
+
+    @Slot(object, object)
+    def _on_frame_baked(self, job: tuple, future):
+        key, revision, path, page, generation = job
+        if generation != self._generation:
+            # Renderizado antes de invalidate_all() (outro fundo, por exemplo)
+            return
+        self._pending.discard(key)
+        if self._closed or future.cancelled():
+            return
+        try:
+            frame = future.result()
+        except Exception:
+            logger.error(f"Falha ao preparar o quadro de {path}", exc_info=True)
+            frame = None
+        item = self._items.get(key)
+        if frame is not None and item is not None:
+            frame.revision = revision
+            frame.path = path
+            frame.page = page
+            self._store(key, frame)
+            if item['canvas_state'].revision != revision or (item.get('handler') and item['handler'].page != page):
+                # Editado durante a renderização: refaz com o estado atual (o lote espera pelo novo quadro)
+                self._invalidate(key)
+                return
+        # Só os quadros pedidos pelo prepare() contam para o lote, não os refeitos por edição ou memória
+        if self._batch is not None and key in self._batch_keys:
+            self._batch_keys.discard(key)
+            self._done += 1
+            self.progress.emit(self._done, self._batch[1])
+            if self._done >= self._batch[1]:
+                self._finish_batch()
+
+    def _finish_batch(self):
+        started, total = self._batch
+        self._batch = None
+        elapsed = time.perf_counter() - started
+        logger.info(f"Apresentação preparada: {total} quadro(s) em {elapsed:.2f} s, "
+                    f"{self.memory_bytes() / (1024 * 1024):.0f} MB em cache.")
+        self.finished.emit(elapsed)
@@ -0,0 +1,67 @@
+# ui/widgets/perf_hud.py
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QTimer, QRectF
+from PySide6.QtGui import QPainter, QColor, QFontDatabase, QFontMetrics
+from utils.perf_monitor import perf
+
+class PerfHud(QWidget):
+    """
+    Sobreposição de desempenho da janela do operador: p50/p95 móveis de cada
+    estágio medido e o FPS de repintura da projeção e da pré-visualização.
+    Nunca aparece na janela de projeção. Enquanto visível, liga a coleta do
+    PerfMonitor; ao esconder, a instrumentação volta a custar quase nada.
+    """
+    MARGIN = 8
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self._lines = []
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.set_active(not self.isVisible())
+
+    def set_active(self, active: bool):
+        perf.enabled = active
+        if active:
+            perf.reset()
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.refresh_timer.start(500)
+        else:
+            self.refresh_timer.stop()
+            self.hide()
+
+    def refresh(self):
+        lines = [f"{'estágio':24s} {'p50':>8s} {'p95':>8s} {'n':>5s}"]
+        for stage, (p50, p95, count) in sorted(perf.stats().items()):
+            lines.append(f"{stage:24s} {p50:6.1f}ms {p95:6.1f}ms {count:5d}")
+        fps = "  ".join(f"{counter}: {perf.fps(counter):4.1f}" for counter in sorted(perf.frame_counters()))
+        lines.append(f"FPS  {fps or '-'}")
+        self._lines = lines
+
+        metrics = QFontMetrics(self.font())
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 2 * self.MARGIN
+        height = metrics.lineSpacing() * len(lines) + 2 * self.MARGIN
+        parent = self.parentWidget()
+        self.setGeometry(parent.width() - width - self.MARGIN, self.MARGIN, width, height)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 190))
+        painter.setPen(QColor(120, 255, 120))
+        metrics = QFontMetrics(self.font())
+        y = self.MARGIN
+        for line in self._lines:
+            painter.drawText(QRectF(self.MARGIN, y, self.width(), metrics.lineSpacing()),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, line)
+            y += metrics.lineSpacing()
@@ -4,6 +4,8 @@ import logging
 from PySide6.QtWidgets import QWidget
 from PySide6.QtCore import Qt, QRectF, QPointF, QSize
 from PySide6.QtGui import QPixmap, QPainter, QPen, QColor, QTransform
+from core.geometry import orientation_transform, rotated_size
+from utils.perf_monitor import perf
 
 logger = logging.getLogger("ImageProjectorLogger")
 
@@ -13,23 +15,34 @@ class ZoomPreview(QWidget):
         self.setMouseTracking(True)
         
         self.pixmap_to_display = None
+        self.pixmap_rotation = 0 # Aplicada ao pintar; a imagem recebida não vem girada
         self.canvas_state = None
         self.message_to_show = "Carregue uma pasta ou galeria para começar."
         self.aspect_ratio = 16.0 / 9.0
         
         self.is_dragging_lupa = False
+        self.is_drawing = False
+        self.is_erasing = False
         self.drag_start_pos = QPointF()
         self.rect_start_pos = QPointF()
         
         self.screen_rect = QRectF()
         self.image_on_screen_rect = QRectF()
+        # Coordenadas normalizadas (0-1) da imagem não girada -> pixels do widget (com a rotação)
+        self.image_transform = QTransform()
+        self._stroke_scale = 1.0 # Largura em pixels da imagem não girada, na tela
+
+        # Cache da imagem já escalada: evita reescalar a cada repintura parcial (ex.: traço ao vivo)
+        self._scaled_cache_key = None
+        self._scaled_pixmap = None
 
         self.setMinimumSize(320, 180)
 
-    def set_canvas_state(self, state_object, pixmap):
+    def set_canvas_state(self, state_object, pixmap, rotation: int = 0):
         self.message_to_show = None
         self.canvas_state = state_object
         self.pixmap_to_display = pixmap
+        self.pixmap_rotation = rotation % 360
         self.update()
 
     def show_message(self, message: str):
@@ -43,7 +56,9 @@ class ZoomPreview(QWidget):
             self.aspect_ratio = ratio
             self.update()
 
+    @perf.timed("paint.preview")
     def paintEvent(self, event):
+        perf.tick("preview")
         super().paintEvent(event)
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -69,22 +84,44 @@ class ZoomPreview(QWidget):
         if not self.pixmap_to_display or not self.canvas_state:
             return
 
-        img_pixmap = self.pixmap_to_display
-        scaled_pixmap = img_pixmap.scaled(self.screen_rect.size().toSize(), 
-                                          Qt.AspectRatioMode.KeepAspectRatio, 
-                                          Qt.TransformationMode.SmoothTransformation)
+        scaled_pixmap = self._get_scaled_pixmap()
         
-        self.image_on_screen_rect = QRectF(scaled_pixmap.rect())
+        rotated_w, rotated_h = rotated_size(scaled_pixmap.width(), scaled_pixmap.height(), self.pixmap_rotation)
+        self.image_on_screen_rect = QRectF(0, 0, rotated_w, rotated_h)
         self.image_on_screen_rect.moveCenter(self.screen_rect.center())
         
-        painter.drawPixmap(self.image_on_screen_rect.topLeft(), scaled_pixmap)
+        orientation = orientation_transform(self.pixmap_rotation, scaled_pixmap.width(), scaled_pixmap.height())
+        top_left = self.image_on_screen_rect.topLeft()
+        self.image_transform = (QTransform.fromScale(scaled_pixmap.width(), scaled_pixmap.height()) * orientation
+                                * QTransform.fromTranslate(top_left.x(), top_left.y()))
+        self._stroke_scale = scaled_pixmap.width()
+
+        painter.save()
+        painter.translate(top_left)
+        painter.setTransform(orientation, True)
+        painter.drawPixmap(0, 0, scaled_pixmap)
+        painter.restore()
         
-        self.draw_strokes(painter)
+        self.draw_strokes(painter, QRectF(event.rect()))
+        self.draw_live_stroke(painter)
         self.draw_laser_pointer(painter)
 
         if self.canvas_state.zoom_enabled:
             self.draw_rotated_zoom_rect(painter)
 
+    def _get_scaled_pixmap(self) -> QPixmap:
+        """Imagem (ainda não girada) escalada para caber na tela depois de girada."""
+        target_size = self.screen_rect.size().toSize()
+        cache_key = (self.pixmap_to_display.cacheKey(), target_size.width(), target_size.height(), self.pixmap_rotation)
+        if cache_key != self._scaled_cache_key:
+            if self.pixmap_rotation % 180 == 90:
+                target_size.transpose()
+            self._scaled_pixmap = self.pixmap_to_display.scaled(target_size,
+                                                                Qt.AspectRatioMode.KeepAspectRatio,
+                                                                Qt.TransformationMode.SmoothTransformation)
+            self._scaled_cache_key = cache_key
+        return self._scaled_pixmap
+
     def draw_rotated_zoom_rect(self, painter: QPainter):
         """Desenha o retângulo de zoom, aplicando a rotação da lupa."""
         state = self.canvas_state
@@ -110,23 +147,56 @@ class ZoomPreview(QWidget):
         
         painter.restore()
 
-    def draw_strokes(self, painter: QPainter):
+    def draw_strokes(self, painter: QPainter, dirty_rect: QRectF | None = None):
         state = self.canvas_state
         if not state or not state.strokes:
             return
 
+        strokes = state.strokes
+        if dirty_rect is not None and not dirty_rect.contains(self.image_on_screen_rect):
+            # Repintura parcial: só os traços que tocam a região suja, via índice espacial
+            img_rect = self.image_on_screen_rect
+            dirty_relative = self.image_transform.inverted()[0].mapRect(dirty_rect)
+            margin = (state.stroke_index.max_thickness / 2 + 1) / min(img_rect.width(), img_rect.height())
+            strokes = state.stroke_index.query_rect(dirty_relative, margin)
+
         painter.save()
-        painter.translate(self.image_on_screen_rect.topLeft())
-        painter.scale(self.image_on_screen_rect.width(), self.image_on_screen_rect.height())
+        # Os traços estão na imagem não girada: a mesma transformação da imagem exibida
+        painter.setTransform(self.image_transform, True)
 
-        for stroke in state.strokes:
+        for stroke in strokes:
             pen = QPen(stroke.color, stroke.thickness, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
-            pen.setWidthF(stroke.thickness / self.image_on_screen_rect.width())
+            pen.setWidthF(stroke.thickness / self._stroke_scale)
             painter.setPen(pen)
             painter.drawPath(stroke.path)
         
         painter.restore()
 
+    def draw_live_stroke(self, painter: QPainter):
+        """Desenha o traço em andamento (a repintura é recortada ao último segmento)."""
+        state = self.canvas_state
+        if not state or not state.live_stroke:
+            return
+
+        painter.save()
+        painter.setTransform(self.image_transform, True)
+        stroke = state.live_stroke
+        pen = QPen(stroke.color, stroke.thickness / self._stroke_scale, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+        painter.setPen(pen)
+        painter.drawPath(stroke.path)
+        painter.restore()
+
+    def _to_image_relative(self, pos: QPointF) -> QPointF:
+        """Posição do ponteiro em coordenadas normalizadas da imagem não girada (as dos traços)."""
+        return self.image_transform.inverted()[0].map(pos)
+
+    def _segment_dirty_rect(self, p1: QPointF, p2: QPointF, thickness: float):
+        """Retângulo (em pixels do widget) coberto por um segmento, incluindo a espessura da caneta."""
+        a = self.image_transform.map(p1)
+        b = self.image_transform.map(p2)
+        margin = thickness / 2 + 2
+        return QRectF(a, b).normalized().adjusted(-margin, -margin, margin, margin).toAlignedRect()
+
     def draw_laser_pointer(self, painter: QPainter):
         state = self.canvas_state
         if not state or state.active_tool != 'laser' or not state.laser_position:
@@ -152,6 +222,17 @@ class ZoomPreview(QWidget):
         if not self.canvas_state or not self.screen_rect.contains(event.position()):
             return
 
+        if self.canvas_state.active_tool in ("pen", "highlighter"):
+            if self.image_on_screen_rect.contains(event.position()):
+                self.is_drawing = True
+                self.canvas_state.begin_live_stroke(self._to_image_relative(event.position()))
+            return
+
+        if self.canvas_state.active_tool == "eraser":
+            self.is_erasing = True
+            self.canvas_state.erase_at(self._to_image_relative(event.position()))
+            return
+
         if self.canvas_state.zoom_enabled:
             state = self.canvas_state
             
@@ -179,6 +260,18 @@ class ZoomPreview(QWidget):
                 self.setCursor(Qt.CursorShape.SizeAllCursor)
 
     def mouseMoveEvent(self, event):
+        if self.is_erasing and self.canvas_state:
+            self.canvas_state.erase_at(self._to_image_relative(event.position()))
+            return
+
+        if self.is_drawing and self.canvas_state and self.canvas_state.live_stroke:
+            stroke = self.canvas_state.live_stroke
+            last_pos = stroke.path.currentPosition()
+            new_pos = self._to_image_relative(event.position())
+            self.canvas_state.extend_live_stroke(new_pos)
+            self.update(self._segment_dirty_rect(last_pos, new_pos, stroke.thickness))
+            return
+
         if not self.canvas_state or not self.is_dragging_lupa:
             return
 
@@ -200,6 +293,12 @@ class ZoomPreview(QWidget):
         self.canvas_state.set_property('zoom_rect', new_rect)
 
     def mouseReleaseEvent(self, event):
+        self.is_erasing = False
+        if self.is_drawing:
+            self.is_drawing = False
+            if self.canvas_state:
+                self.canvas_state.finish_live_stroke()
+            self.update()
         if self.is_dragging_lupa:
             self.is_dragging_lupa = False
             self.setCursor(Qt.CursorShape.ArrowCursor)
@@ -90,3 +90,88 @@ def generate_html_with_dynamic_font(text: str) -> str:
     </html>
     """
 
+
+def generate_remote_control_html() -> str:
+    """
+    Página do controle remoto (servida por RemoteControlServer): botões de
+    navegação e ferramentas e uma área de toque que envia a posição do laser
+    pelo WebSocket a cada movimento, com o instante do envio para a medição
+    do atraso. Sem dependências externas: funciona sem internet.
+    """
+    return """
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1, user-scalable=no">
+    <title>Controle Remoto</title>
+    <style>
+        body { margin: 0; padding: 8px; background: #202020; color: #eee; font-family: sans-serif; }
+        .row { display: flex; gap: 8px; margin-bottom: 8px; }
+        button, input { flex: 1; font-size: 1.2em; padding: 12px; }
+        #status { margin-bottom: 8px; }
+        /* Área de toque com a proporção da projeção (16:9) */
+        #pad { width: 100%; aspect-ratio: 16 / 9; background: #000; border: 1px solid #666; touch-action: none; }
+    </style>
+    </head>
+    <body>
+    <div id="status">Conectando...</div>
+    <div class="row"><button data-cmd="previous">◀ Anterior</button><button data-cmd="next">Próxima ▶</button></div>
+    <div class="row"><input id="index" type="number" min="1" placeholder="Nº"><button id="goto">Ir</button></div>
+    <div class="row">
+        <button data-tool="none">Nenhuma</button><button data-tool="laser">Laser</button>
+        <button data-tool="pen">Caneta</button><button data-tool="highlighter">Marca-Texto</button>
+    </div>
+    <div id="pad"></div>
+    <script>
+        (function() {
+            const status = document.getElementById('status');
+            let socket = null;
+            let rtt = null;
+
+            function send(message) {
+                if (socket && socket.readyState === WebSocket.OPEN) socket.send(JSON.stringify(message));
+            }
+
+            function connect() {
+                // Fora do loopback o servidor exige o token da sessão, recebido na URL da página
+                const token = new URLSearchParams(location.search).get('token');
+                socket = new WebSocket('ws://' + location.host + '/ws' + (token ? '?token=' + encodeURIComponent(token) : ''));
+                socket.onmessage = function(event) {
+                    const message = JSON.parse(event.data);
+                    if (message.type === 'pong') rtt = Date.now() - message.t;
+                    if (message.type === 'status') {
+                        status.textContent = (message.index + 1) + '/' + message.count + ' - ' + message.name +
+                            (rtt !== null ? ' (' + rtt + ' ms)' : '');
+                    }
+                };
+                // Reconecta se o projetor for reiniciado
+                socket.onclose = function() { status.textContent = 'Desconectado'; setTimeout(connect, 1000); };
+            }
+            connect();
+            setInterval(function() { send({cmd: 'ping', t: Date.now()}); }, 2000);
+
+            document.querySelectorAll('[data-cmd]').forEach(function(button) {
+                button.onclick = function() { send({cmd: button.dataset.cmd}); };
+            });
+            document.querySelectorAll('[data-tool]').forEach(function(button) {
+                button.onclick = function() { send({cmd: 'tool', name: button.dataset.tool}); };
+            });
+            document.getElementById('goto').onclick = function() {
+                send({cmd: 'goto', index: parseInt(document.getElementById('index').value, 10) - 1});
+            };
+
+            // Cada movimento é enviado; o servidor aplica só o mais recente de cada quadro
+            const pad = document.getElementById('pad');
+            function laser(event) {
+                const rect = pad.getBoundingClientRect();
+                send({cmd: 'laser', x: (event.clientX - rect.left) / rect.width, y: (event.clientY - rect.top) / rect.height, t: Date.now()});
+            }
+            pad.onpointerdown = function(event) { pad.setPointerCapture(event.pointerId); send({cmd: 'tool', name: 'laser'}); laser(event); };
+            pad.onpointermove = function(event) { if (event.buttons || event.pointerType === 'touch') laser(event); };
+            pad.onpointerup = function() { send({cmd: 'laser', x: null, y: null, t: Date.now()}); };
+        })();
+    </script>
+    </body>
+    </html>
+    """
@@ -1,17 +1,80 @@
 # utils/logger.py
 
 import logging
+import logging.handlers
 import os
+import queue
+import time
+import atexit
+import threading
 
 # Define o diretório e o nome do arquivo de log
 LOG_DIR = "logs"
 LOG_FILE = os.path.join(LOG_DIR, "app.log")
 
+# Rotação por tamanho: app.log, app.log.1 ... app.log.5
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Cada ponto quente do código (arquivo:linha) emite no máximo uma mensagem de debug por intervalo
+DEBUG_RATE_INTERVAL = 1.0 # segundos
+
+# Passado como `extra` nas mensagens de debug de caminhos quentes: só elas são limitadas
+RATE_LIMITED = {"rate_limited": True}
+
+_listener = None
+_atexit_registered = False
+
+class CallSiteRateLimitFilter(logging.Filter):
+    """
+    Limita por ponto de chamada as mensagens de nível DEBUG (ou abaixo)
+    marcadas com `extra=RATE_LIMITED`. As suprimidas são contadas e
+    informadas na próxima mensagem liberada daquele ponto, então caminhos
+    quentes (ex.: atualização de monitores, texto das anotações) não inundam
+    o log nem a fila; as demais mensagens de debug passam todas.
+    """
+    def __init__(self, interval: float = DEBUG_RATE_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._sites = {} # (arquivo, linha) -> [último envio, suprimidas]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not getattr(record, "rate_limited", False):
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is not None and now - site[0] < self.interval:
+                site[1] += 1
+                return False
+            suppressed = site[1] if site is not None else 0
+            self._sites[key] = [now, 0]
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} suprimidas)"
+        return True
+
+class _ThreadQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler para uma fila dentro do mesmo processo: na thread de quem
+    registra só a mensagem é montada; formatação (data, nível...) e escrita
+    ficam para a thread do QueueListener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 def setup_logger():
     """
     Configura um logger global para salvar em um arquivo e exibir no console.
-    Esta versão apaga o log anterior a cada nova inicialização do programa.
+    As mensagens entram numa fila e são gravadas por uma thread própria
+    (QueueListener), então o registro nunca espera por disco ou terminal. O
+    arquivo é rotacionado por tamanho em vez de apagado a cada inicialização.
     """
+    global _listener, _atexit_registered
+
     # Garante que o diretório de logs exista
     os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -22,16 +85,20 @@ def setup_logger():
     # Evita adicionar múltiplos handlers se a função for chamada acidentalmente mais de uma vez
     if logger.hasHandlers():
         logger.handlers.clear()
+    # Chamada de novo: a thread anterior grava o que tiver na fila e fecha seus arquivos
+    shutdown_logger()
 
     # Formato do log: Data e Hora - Nível do Log - Módulo - Mensagem
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(module)s] - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 
-    # --- FileHandler com modo 'w' para apagar o log anterior ---
+    handlers = []
+    # --- Arquivo com rotação por tamanho (modo de acréscimo: o log anterior é preservado) ---
     try:
         # O encoding='utf-8' é importante para suportar caracteres especiais
-        file_handler = logging.FileHandler(LOG_FILE, mode='w', encoding='utf-8')
+        file_handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES,
+                                                            backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
         # Se houver um problema ao criar o arquivo de log, imprime no console
         print(f"Erro ao configurar o logger de arquivo: {e}")
@@ -39,7 +106,28 @@ def setup_logger():
     # --- StreamHandler para exibir logs no console ---
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
+
+    # --- Fila: quem registra só enfileira; a escrita acontece na thread do listener ---
+    log_queue = queue.SimpleQueue()
+    queue_handler = _ThreadQueueHandler(log_queue)
+    queue_handler.addFilter(CallSiteRateLimitFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Esvazia a fila ao encerrar, para que as últimas mensagens (inclusive erros fatais) sejam gravadas
+    if not _atexit_registered:
+        atexit.register(shutdown_logger)
+        _atexit_registered = True
 
     return logger
 
+def shutdown_logger():
+    """Para a thread de escrita depois de gravar tudo o que estiver na fila."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
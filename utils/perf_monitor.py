@@ -0,0 +1,117 @@
+# utils/perf_monitor.py
+
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+class PerfMonitor:
+    """
+    Instrumentação leve dos estágios de renderização. Cada estágio guarda as
+    últimas `window` durações (para p50/p95 móveis) e cada contador de quadros
+    guarda os instantes das últimas repinturas (para o FPS alcançado).
+
+    Desligado (padrão), measure() e timed() custam apenas a verificação de
+    `enabled`; o HUD liga a coleta enquanto está visível, e um `tracer`
+    (captura do profiler) recebe também cada intervalo medido.
+    """
+    def __init__(self, window: int = 240):
+        self.collecting = False
+        self.tracer = None
+        self.window = window
+        self._durations = {}
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.collecting or self.tracer is not None
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self.collecting = value
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._durations.get(stage)
+            if samples is None:
+                samples = self._durations[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    @contextmanager
+    def _measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.record(stage, end - start)
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.add_span(stage, start, end)
+
+    def measure(self, stage: str):
+        """Context manager que mede o bloco como `stage` (nulo se desligado)."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure(stage)
+
+    def timed(self, stage: str):
+        """Decorador equivalente a envolver a função inteira em measure(stage)."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._measure(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def tick(self, counter: str):
+        """Registra uma repintura concluída de `counter` (ex.: a janela de projeção)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            frames = self._frames.get(counter)
+            if frames is None:
+                frames = self._frames[counter] = deque(maxlen=self.window)
+            frames.append(time.perf_counter())
+
+    def stats(self) -> dict:
+        """{estágio: (p50 em ms, p95 em ms, amostras)} sobre a janela móvel."""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._durations.items() if samples}
+        result = {}
+        for stage, samples in snapshot.items():
+            p50 = samples[int(0.50 * (len(samples) - 1))]
+            p95 = samples[int(0.95 * (len(samples) - 1))]
+            result[stage] = (p50 * 1000, p95 * 1000, len(samples))
+        return result
+
+    def fps(self, counter: str, period: float = 1.0) -> float:
+        """Repinturas por segundo de `counter` no último `period`."""
+        now = time.perf_counter()
+        with self._lock:
+            frames = self._frames.get(counter, ())
+            recent = sum(1 for t in frames if now - t <= period)
+        return recent / period
+
+    def frame_counters(self) -> list[str]:
+        with self._lock:
+            return list(self._frames)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._frames.clear()
+
+class _NullContext:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL_CONTEXT = _NullContext()
+
+# Instância única compartilhada por todo o programa
+perf = PerfMonitor()
@@ -0,0 +1,132 @@
+# utils/profiler.py
+
+import os
+import json
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import tracemalloc
+from PySide6.QtWidgets import QApplication
+from utils.perf_monitor import perf
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class Profiler:
+    """
+    Captura de sessão para análise posterior. Enquanto ativa, cada intervalo
+    medido pelo PerfMonitor (pipeline de renderização, carregamentos, slots)
+    e cada evento Qt despachado pela TracingApplication viram eventos "X" do
+    formato Chrome trace (abrir em chrome://tracing ou ui.perfetto.dev).
+    Opcionalmente grava, ao lado do trace, um perfil cProfile (.prof) e um
+    snapshot do tracemalloc (.tracemalloc e um resumo .txt).
+    """
+    # Eventos Qt mais curtos que isto não entram no trace (movimentos de mouse, timers vazios...)
+    MIN_EVENT_DURATION = 0.0002 # segundos
+
+    def __init__(self, output_dir: str = "profiles", use_cprofile: bool = False, use_tracemalloc: bool = False):
+        self.output_dir = output_dir
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self._events = []
+        self._lock = threading.Lock()
+        self._origin = 0.0
+        self._cprofile = None
+        self._thread_names = {}
+
+    @property
+    def is_running(self) -> bool:
+        return perf.tracer is self
+
+    def start(self):
+        if self.is_running:
+            return
+        with self._lock:
+            self._events = []
+            self._thread_names = {}
+        self._origin = time.perf_counter()
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        if self.use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        perf.tracer = self
+        logger.info(f"Captura de desempenho iniciada (destino: {self.output_dir}).")
+
+    def stop(self) -> list[str]:
+        """Encerra a captura e grava os arquivos; retorna os caminhos gravados."""
+        if not self.is_running:
+            return []
+        perf.tracer = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime("captura_%Y%m%d_%H%M%S"))
+        written = [self._write_trace(f"{base}.json")]
+        if self._cprofile is not None:
+            pstats.Stats(self._cprofile).dump_stats(f"{base}.prof")
+            written.append(f"{base}.prof")
+            self._cprofile = None
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            snapshot.dump(f"{base}.tracemalloc")
+            with open(f"{base}_memoria.txt", "w", encoding="utf-8") as f:
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+            written += [f"{base}.tracemalloc", f"{base}_memoria.txt"]
+        logger.info(f"Captura de desempenho gravada: {', '.join(written)}")
+        return written
+
+    def toggle(self) -> list[str]:
+        if self.is_running:
+            return self.stop()
+        self.start()
+        return []
+
+    def add_span(self, name: str, start: float, end: float, category: str | None = None):
+        """Registra um intervalo (instantes de time.perf_counter) da thread atual."""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category or name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    def _write_trace(self, path: str) -> str:
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        for tid, name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+class TracingApplication(QApplication):
+    """
+    QApplication que, durante uma captura, mede o despacho de cada evento
+    (inclusive as chamadas de slots em conexões enfileiradas e os slots
+    disparados por cliques e teclas). Fora da captura só repassa o evento.
+    """
+    def notify(self, receiver, event):
+        tracer = perf.tracer
+        if tracer is None:
+            return super().notify(receiver, event)
+        start = time.perf_counter()
+        try:
+            return super().notify(receiver, event)
+        finally:
+            end = time.perf_counter()
+            if end - start >= Profiler.MIN_EVENT_DURATION:
+                name = f"{type(receiver).__name__}.{event.type().name}"
+                tracer.add_span(name, start, end, category="qt")
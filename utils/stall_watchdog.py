@@ -0,0 +1,134 @@
+# utils/stall_watchdog.py
+
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+from PySide6.QtCore import QObject, Signal, Slot
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StallWatchdog(QObject):
+    """
+    Vigia de travamentos da thread da interface. Uma thread separada envia um
+    "ping" (sinal com conexão enfileirada) a cada `interval` segundos; se o
+    laço de eventos não responder em `threshold` segundos, registra no log a
+    pilha Python da thread principal naquele instante e, quando a resposta
+    chega, a duração total do travamento. As estatísticas da sessão ficam em
+    stats() e são resumidas no log por log_summary().
+    """
+    ping = Signal()
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.threshold = threshold
+        self._main_thread_id = threading.main_thread().ident
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._ping_sent_at = None # Ping ainda sem resposta
+        self._stall_site = None # Local do travamento em andamento (já registrado no log)
+        self.stall_count = 0
+        self.total_stall_time = 0.0
+        self.max_stall_time = 0.0
+        self._by_site = {} # local -> [ocorrências, tempo total, maior]
+
+        # Criado na thread principal: o sinal emitido pela thread do vigia chega enfileirado aqui
+        self.ping.connect(self._on_ping)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Vigia de travamentos ativo (limite de {self.threshold * 1000:.0f} ms).")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    @Slot()
+    def _on_ping(self):
+        now = time.monotonic()
+        with self._lock:
+            sent_at, site = self._ping_sent_at, self._stall_site
+            self._ping_sent_at = None
+            self._stall_site = None
+        if sent_at is None or site is None:
+            return
+        duration = now - sent_at
+        with self._lock:
+            self.stall_count += 1
+            self.total_stall_time += duration
+            self.max_stall_time = max(self.max_stall_time, duration)
+            entry = self._by_site.setdefault(site, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        logger.warning(f"Interface travada por {duration * 1000:.0f} ms em {site}.")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                sent_at, reported = self._ping_sent_at, self._stall_site is not None
+                if sent_at is None:
+                    self._ping_sent_at = now
+            if sent_at is None:
+                self.ping.emit()
+            elif not reported and now - sent_at >= self.threshold:
+                self._report_stall(now - sent_at)
+
+    def _report_stall(self, elapsed: float):
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        site = self._blocking_site(stack)
+        with self._lock:
+            if self._ping_sent_at is None:
+                return # Respondeu enquanto a pilha era capturada
+            self._stall_site = site
+        logger.warning(f"Interface sem resposta há {elapsed * 1000:.0f} ms. Pilha da thread principal:\n"
+                       + "".join(traceback.format_list(stack)))
+
+    @staticmethod
+    def _blocking_site(stack) -> str:
+        """Quadro mais interno que pertence ao projeto (ex.: 'core/image_handler.py:123 _read_region')."""
+        for entry in reversed(stack):
+            path = os.path.abspath(entry.filename)
+            if path.startswith(PROJECT_ROOT) and path != os.path.abspath(__file__):
+                return f"{os.path.relpath(path, PROJECT_ROOT)}:{entry.lineno} {entry.name}"
+        entry = stack[-1]
+        return f"{entry.filename}:{entry.lineno} {entry.name}"
+
+    def stats(self) -> dict:
+        """Estatísticas da sessão; `sites` vem ordenado pelo tempo total travado."""
+        with self._lock:
+            sites = sorted(self._by_site.items(), key=lambda item: item[1][1], reverse=True)
+            return {
+                "count": self.stall_count,
+                "total_ms": self.total_stall_time * 1000,
+                "max_ms": self.max_stall_time * 1000,
+                "sites": [{"site": site, "count": count, "total_ms": total * 1000, "max_ms": longest * 1000}
+                          for site, (count, total, longest) in sites],
+            }
+
+    def log_summary(self):
+        stats = self.stats()
+        if not stats["count"]:
+            logger.info("Nenhum travamento da interface nesta sessão.")
+            return
+        lines = [f"{s['count']:4d}x  total {s['total_ms']:8.0f} ms  máx {s['max_ms']:6.0f} ms  {s['site']}" for s in stats["sites"]]
+        logger.info(f"Travamentos da interface nesta sessão: {stats['count']}, total {stats['total_ms']:.0f} ms, "
+                    f"máximo {stats['max_ms']:.0f} ms\n" + "\n".join(lines))
@@ -0,0 +1,39 @@
+# utils/startup_timer.py
+
+import time
+import logging
+
+logger = logging.getLogger("ImageProjectorLogger")
+
+class StartupTimer:
+    """
+    Marca as fases da inicialização (importações, QApplication, janela...) a
+    partir do momento em que este módulo é importado, o primeiro import do
+    main.py. Só usa a biblioteca padrão, para não pesar na própria medição.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.marks = []
+
+    def mark(self, phase: str):
+        self.marks.append((phase, time.perf_counter()))
+
+    def total_ms(self) -> float:
+        return (self.marks[-1][1] - self.origin) * 1000 if self.marks else 0.0
+
+    def report(self) -> dict:
+        """{"total_ms": ..., "phases": [{"phase", "ms", "at_ms"}...]} com a duração de cada fase."""
+        phases = []
+        previous = self.origin
+        for phase, instant in self.marks:
+            phases.append({"phase": phase, "ms": (instant - previous) * 1000, "at_ms": (instant - self.origin) * 1000})
+            previous = instant
+        return {"total_ms": self.total_ms(), "phases": phases}
+
+    def log_report(self):
+        report = self.report()
+        lines = [f"  {p['phase']:28s} {p['ms']:8.1f} ms  (em {p['at_ms']:8.1f} ms)" for p in report["phases"]]
+        logger.info(f"Inicialização em {report['total_ms']:.0f} ms:\n" + "\n".join(lines))
+
+# Criado na importação: a origem é o início do main.py
+startup = StartupTimer()